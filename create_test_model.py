@@ -0,0 +1,38 @@
+"""
+Build the tiny stand-in ONNX segmentation model used by the tests.
+
+It mimics the interface of a U^2-Net style model (1x3x64x64 normalized
+image in, 1x1x64x64 foreground map out) with a single 1x1 convolution
+that treats bright pixels as background. Requires the `onnx` package.
+"""
+from pathlib import Path
+
+import numpy as np
+import onnx
+from onnx import helper, numpy_helper, TensorProto
+
+output_path = Path(__file__).parent / "src" / "models" / "tiny_segmenter.onnx"
+
+# Sum of the normalized channels is high for white and low for saturated
+# or dark colors; foreground = sigmoid(3 - sum)
+weights = numpy_helper.from_array(-np.ones((1, 3, 1, 1), dtype=np.float32), name="weight")
+bias = numpy_helper.from_array(np.array([3.0], dtype=np.float32), name="bias")
+
+graph = helper.make_graph(
+    [
+        helper.make_node("Conv", ["input", "weight", "bias"], ["logits"]),
+        helper.make_node("Sigmoid", ["logits"], ["mask"]),
+    ],
+    "tiny_segmenter",
+    [helper.make_tensor_value_info("input", TensorProto.FLOAT, [1, 3, 64, 64])],
+    [helper.make_tensor_value_info("mask", TensorProto.FLOAT, [1, 1, 64, 64])],
+    initializer=[weights, bias],
+)
+
+model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+model.ir_version = 7  # Loadable by older onnxruntime releases
+onnx.checker.check_model(model)
+output_path.parent.mkdir(parents=True, exist_ok=True)
+onnx.save(model, str(output_path))
+
+print(f"✅ Created {output_path} for testing")
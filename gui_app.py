@@ -10,6 +10,7 @@ from pathlib import Path
 import sys
 import os
 import threading
+import queue
 
 # Add the current directory to Python path
 current_dir = Path(__file__).parent
@@ -18,7 +19,7 @@ sys.path.insert(0, str(current_dir))
 try:
     from src.gif_processor import GIFProcessor
     from src.background_remover import BackgroundRemover
-    from src.utils import create_output_path
+    from src.utils import create_output_path, ProcessingCancelled
 except ImportError as e:
     print(f"Import Error: {e}")
     print("Make sure all modules are available")
@@ -31,7 +32,7 @@ class GIFBackgroundRemoverGUI:
         self.root.resizable(True, True)
         
         # Initialize processors
-        self.processor = GIFProcessor()
+        self.processor = GIFProcessor(cache_size=2)  # Cache decoded frames for repeated previews
         self.remover = BackgroundRemover()
         
         # Variables
@@ -42,6 +43,12 @@ class GIFBackgroundRemoverGUI:
         self.tolerance_var = tk.IntVar(value=40)
         self.is_processing = False
         
+        # Worker thread → UI communication: the worker only puts events on
+        # this queue; the UI drains it at a fixed rate in _poll_events
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.poll_interval_ms = 100
+        
         self.setup_gui()
         
     def setup_gui(self):
@@ -70,6 +77,8 @@ class GIFBackgroundRemoverGUI:
         ttk.Entry(input_frame, textvariable=self.input_path).grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(5, 5))
         ttk.Button(input_frame, text="Browse", command=self.browse_input).grid(row=0, column=2)
         ttk.Button(input_frame, text="Get Info", command=self.get_gif_info).grid(row=0, column=3, padx=(5, 0))
+        self.preview_btn = ttk.Button(input_frame, text="Preview", command=self.preview_gif)
+        self.preview_btn.grid(row=0, column=4, padx=(5, 0))
         
         # Output File Section
         output_frame = ttk.LabelFrame(main_frame, text="Output Settings", padding="10")
@@ -117,8 +126,12 @@ class GIFBackgroundRemoverGUI:
                                      command=self.process_gif, state=tk.DISABLED)
         self.process_btn.grid(row=0, column=0, padx=(0, 10))
         
-        ttk.Button(button_frame, text="Clear", command=self.clear_all).grid(row=0, column=1, padx=(0, 10))
-        ttk.Button(button_frame, text="Exit", command=self.root.quit).grid(row=0, column=2)
+        self.cancel_btn = ttk.Button(button_frame, text="Cancel", 
+                                    command=self.cancel_processing, state=tk.DISABLED)
+        self.cancel_btn.grid(row=0, column=1, padx=(0, 10))
+        
+        ttk.Button(button_frame, text="Clear", command=self.clear_all).grid(row=0, column=2, padx=(0, 10))
+        ttk.Button(button_frame, text="Exit", command=self.root.quit).grid(row=0, column=3)
         
         # Progress Section
         progress_frame = ttk.LabelFrame(main_frame, text="Progress", padding="10")
@@ -130,7 +143,7 @@ class GIFBackgroundRemoverGUI:
         self.progress_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         # Progress bar
-        self.progress_bar = ttk.Progressbar(main_frame, mode='indeterminate')
+        self.progress_bar = ttk.Progressbar(main_frame, mode='determinate', maximum=100)
         self.progress_bar.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
         
         # Status bar
@@ -161,7 +174,8 @@ class GIFBackgroundRemoverGUI:
         filename = filedialog.asksaveasfilename(
             title="Save Output GIF As",
             defaultextension=".gif",
-            filetypes=[("GIF files", "*.gif"), ("All files", "*.*")]
+            filetypes=[("GIF files", "*.gif"), ("Animated WebP", "*.webp"),
+                       ("Animated PNG", "*.png"), ("All files", "*.*")]
         )
         if filename:
             self.output_path.set(filename)
@@ -215,7 +229,85 @@ Duration: {info['duration']:.2f} seconds"""
         """Add message to progress text"""
         self.progress_text.insert(tk.END, message + "\n")
         self.progress_text.see(tk.END)
-        self.root.update()
+    
+    def _method_kwargs(self):
+        """Collect removal parameters from the form (None if invalid)"""
+        kwargs = {}
+        if self.method_var.get() == 'color':
+            try:
+                color_parts = self.target_color.get().split(',')
+                if len(color_parts) == 3:
+                    kwargs['target_color'] = tuple(int(x.strip()) for x in color_parts)
+                else:
+                    raise ValueError("Color should be in format: R,G,B")
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid color format: {e}")
+                return None
+            kwargs['tolerance'] = self.tolerance_var.get()
+        return kwargs
+    
+    def preview_gif(self):
+        """Show a low-resolution contact sheet of a few processed frames"""
+        if self.is_processing:
+            return
+        
+        if not self.input_path.get() or not Path(self.input_path.get()).exists():
+            messagebox.showerror("Error", "Please select a valid GIF file first")
+            return
+        
+        kwargs = self._method_kwargs()
+        if kwargs is None:
+            return
+        
+        # Removal may load the AI model, so the preview runs on a worker thread too
+        self.is_processing = True
+        self.process_btn.config(state=tk.DISABLED)
+        self.preview_btn.config(state=tk.DISABLED)
+        self.status_var.set("Building preview...")
+        
+        thread = threading.Thread(target=self._preview_thread,
+                                  args=(self.input_path.get(), self.method_var.get(), kwargs))
+        thread.daemon = True
+        thread.start()
+        self.root.after(self.poll_interval_ms, self._poll_events)
+    
+    def _preview_thread(self, input_path, method, kwargs):
+        """Background thread for the preview; posts the contact sheet via self.events"""
+        try:
+            samples, indices = self.processor.sample_frames(input_path)
+            if method == 'auto':
+                detected = self.remover.detect_background_color(samples)
+                if detected['colors']:
+                    kwargs['target_color'] = detected['colors'][0]
+                    kwargs['tolerance'] = detected['tolerance']
+            previews = self.remover.process_frames(samples, method=method, **kwargs)
+            sheet = self.processor.create_contact_sheet(samples, previews)
+            self.events.put(('preview', sheet, indices, method))
+        except Exception as e:
+            self.events.put(('preview_error', str(e)))
+    
+    def _show_preview(self, sheet, indices, method):
+        """Open the preview window (UI thread)"""
+        self._preview_finished()
+        
+        from PIL import ImageTk
+        
+        window = tk.Toplevel(self.root)
+        window.title(f"Preview - frames {indices}")
+        window.photo = ImageTk.PhotoImage(sheet)  # Keep a reference so Tk doesn't drop it
+        ttk.Label(window, image=window.photo).pack(padx=10, pady=10)
+        self.status_var.set(f"Preview of {len(indices)} frames ({method} method)")
+    
+    def _preview_error(self, error_message):
+        """Handle a failed preview"""
+        self._preview_finished()
+        self.status_var.set("Preview failed!")
+        messagebox.showerror("Error", f"Preview failed:\n{error_message}")
+    
+    def _preview_finished(self):
+        self.is_processing = False
+        self.process_btn.config(state=tk.NORMAL)
+        self.preview_btn.config(state=tk.NORMAL)
     
     def process_gif(self):
         """Process the GIF with background removal"""
@@ -231,79 +323,138 @@ Duration: {info['duration']:.2f} seconds"""
             messagebox.showerror("Error", "Please specify an output file path")
             return
         
+        # Parse parameters on the UI thread before starting work
+        kwargs = self._method_kwargs()
+        if kwargs is None:
+            return
+        
         # Start processing in a separate thread
         self.is_processing = True
+        self.cancel_event.clear()
         self.process_btn.config(state=tk.DISABLED)
-        self.progress_bar.start()
+        self.cancel_btn.config(state=tk.NORMAL)
+        self.progress_bar['value'] = 0
         
-        thread = threading.Thread(target=self._process_gif_thread)
+        thread = threading.Thread(target=self._process_gif_thread,
+                                  args=(self.input_path.get(), self.output_path.get(),
+                                        self.method_var.get(), kwargs))
         thread.daemon = True
         thread.start()
+        self.root.after(self.poll_interval_ms, self._poll_events)
     
-    def _process_gif_thread(self):
-        """Background thread for GIF processing"""
-        try:
-            # Prepare parameters
-            kwargs = {}
-            if self.method_var.get() == 'color':
-                try:
-                    color_parts = self.target_color.get().split(',')
-                    if len(color_parts) == 3:
-                        kwargs['target_color'] = tuple(int(x.strip()) for x in color_parts)
-                    else:
-                        raise ValueError("Color should be in format: R,G,B")
-                except ValueError as e:
-                    self.root.after(0, lambda: messagebox.showerror("Error", f"Invalid color format: {e}"))
-                    return
-                kwargs['tolerance'] = self.tolerance_var.get()
+    def cancel_processing(self):
+        """Request cancellation; the worker stops between frames"""
+        if self.is_processing:
+            self.cancel_event.set()
+            self.cancel_btn.config(state=tk.DISABLED)
+            self.status_var.set("Cancelling...")
+    
+    def _poll_events(self):
+        """Drain worker events at a fixed rate and update the UI in one batch"""
+        latest_progress = None
+        finished = False
+        
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
             
-            # Update UI
-            self.root.after(0, lambda: self.log_message("🔄 Starting background removal..."))
-            self.root.after(0, lambda: self.log_message(f"📁 Input: {self.input_path.get()}"))
-            self.root.after(0, lambda: self.log_message(f"📁 Output: {self.output_path.get()}"))
-            self.root.after(0, lambda: self.log_message(f"🎯 Method: {self.method_var.get()}"))
+            kind = event[0]
+            if kind == 'log':
+                self.log_message(event[1])
+            elif kind == 'progress':
+                latest_progress = event[1:]
+            elif kind == 'complete':
+                finished = True
+                self._process_complete()
+            elif kind == 'cancelled':
+                finished = True
+                self._process_cancelled()
+            elif kind == 'error':
+                finished = True
+                self._process_error(event[1])
+            elif kind == 'preview':
+                finished = True
+                self._show_preview(*event[1:])
+            elif kind == 'preview_error':
+                finished = True
+                self._preview_error(event[1])
+        
+        # Only the most recent progress value matters for this tick
+        if latest_progress is not None:
+            self._update_progress(*latest_progress)
+        
+        if not finished:
+            self.root.after(self.poll_interval_ms, self._poll_events)
+    
+    def _process_gif_thread(self, input_path, output_path, method, kwargs):
+        """Background thread for GIF processing; communicates only via self.events"""
+        log = lambda message: self.events.put(('log', message))
+        try:
+            log("🔄 Starting background removal...")
+            log(f"📁 Input: {input_path}")
+            log(f"📁 Output: {output_path}")
+            log(f"🎯 Method: {method}")
             
-            if self.method_var.get() == 'color':
-                self.root.after(0, lambda: self.log_message(f"🎨 Target color: {kwargs['target_color']}"))
-                self.root.after(0, lambda: self.log_message(f"📏 Tolerance: {kwargs['tolerance']}"))
+            if method == 'color':
+                log(f"🎨 Target color: {kwargs['target_color']}")
+                log(f"📏 Tolerance: {kwargs['tolerance']}")
             
             # Extract frames
-            self.root.after(0, lambda: self.log_message("\n📂 Extracting frames..."))
-            frames, durations = self.processor.extract_frames(self.input_path.get())
-            self.root.after(0, lambda: self.log_message(f"✅ Extracted {len(frames)} frames"))
+            log("\n📂 Extracting frames...")
+            frames, durations = self.processor.extract_frames(input_path)
+            log(f"✅ Extracted {len(frames)} frames")
             
-            # Process frames
-            self.root.after(0, lambda: self.log_message("\n🎨 Removing backgrounds..."))
-            processed_frames = []
+            if method == 'auto':
+                detected = self.remover.detect_background_color(frames)
+                if detected['colors']:
+                    kwargs['target_color'] = detected['colors'][0]
+                    kwargs['tolerance'] = detected['tolerance']
             
-            for i, frame in enumerate(frames):
-                processed_frame = self.remover.process_frame(frame, method=self.method_var.get(), **kwargs)
-                processed_frames.append(processed_frame)
-                
-                # Update progress
-                progress = (i + 1) / len(frames) * 100
-                if i % 5 == 0 or i == len(frames) - 1:  # Update every 5 frames to reduce UI updates
-                    self.root.after(0, lambda p=progress, idx=i: self._update_progress(p, idx, len(frames)))
+            # Process frames in parallel; progress is reported as events
+            log("\n🎨 Removing backgrounds...")
+            processed_frames = self.remover.process_frames(
+                frames,
+                method=method,
+                progress_callback=lambda done, total: self.events.put(('progress', done, total)),
+                cancel_event=self.cancel_event,
+                **kwargs
+            )
             
-            # Create output GIF
-            self.root.after(0, lambda: self.log_message("\n💾 Saving output GIF..."))
-            self.processor.create_gif(processed_frames, durations, self.output_path.get())
+            # Create output animation (format from the file extension)
+            log("\n💾 Saving output...")
+            self.processor.save_animation(processed_frames, durations, output_path)
+            self.remover.log_summary()
             
-            # Show completion message
-            self.root.after(0, self._process_complete)
+            self.events.put(('complete',))
             
+        except ProcessingCancelled as e:
+            log(f"\n⏹️ {e}")
+            self.events.put(('cancelled',))
         except Exception as e:
-            self.root.after(0, lambda: self._process_error(str(e)))
+            self.events.put(('error', str(e)))
     
-    def _update_progress(self, progress, current, total):
+    def _update_progress(self, current, total):
         """Update progress in UI thread"""
-        self.log_message(f"  🖼️ Processed frame {current + 1}/{total} ({progress:.1f}%)")
+        progress = current / total * 100 if total else 100
+        self.progress_bar['value'] = progress
+        self.status_var.set(f"Processed frame {current}/{total} ({progress:.1f}%)")
+    
+    def _process_cancelled(self):
+        """Handle a cancelled run"""
+        self.is_processing = False
+        self.process_btn.config(state=tk.NORMAL)
+        self.cancel_btn.config(state=tk.DISABLED)
+        self.progress_bar['value'] = 0
+        self.status_var.set("Processing cancelled")
     
     def _process_complete(self):
         """Handle process completion"""
-        self.progress_bar.stop()
+        self.progress_bar['value'] = 100
         self.is_processing = False
         self.process_btn.config(state=tk.NORMAL)
+        self.cancel_btn.config(state=tk.DISABLED)
         
         # Show file sizes
         input_size = Path(self.input_path.get()).stat().st_size / 1024
@@ -335,9 +486,9 @@ Duration: {info['duration']:.2f} seconds"""
     
     def _process_error(self, error_message):
         """Handle processing errors"""
-        self.progress_bar.stop()
         self.is_processing = False
         self.process_btn.config(state=tk.NORMAL)
+        self.cancel_btn.config(state=tk.DISABLED)
         
         self.log_message(f"\n❌ Error: {error_message}")
         self.status_var.set("Processing failed!")
@@ -14,7 +14,9 @@ import os
 import sys
 from pathlib import Path
 import argparse
+import io
 import logging
+import time
 
 # Check if GUI is requested
 if len(sys.argv) == 1 or '--gui' in sys.argv or '-g' in sys.argv:
@@ -34,8 +36,13 @@ current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
 try:
-    from src.gif_processor import GIFProcessor
+    from src.gif_processor import GIFProcessor, FORMAT_EXTENSIONS, OUTPUT_SUFFIXES
     from src.background_remover import BackgroundRemover
+    from src.pipeline import GIFPipeline
+    from src.batch import BatchRunner
+    from src.watcher import FolderWatcher
+    from src.masks import save_masks, MaskFile
+    from src.methods import METHODS
     from src.utils import create_output_path
 except ImportError as e:
     print(f"❌ Import Error: {e}")
@@ -92,16 +99,63 @@ def print_method_info(method):
         "edges": "✂️ Edges - Detect and keep foreground objects"
     }
     
-    print(f"\n🎯 Selected Method: {methods.get(method, method)}")
+    spec = METHODS.get(method)
+    fallback = f"🧩 {method} - {spec.description}" if spec is not None else method
+    print(f"\n🎯 Selected Method: {methods.get(method, fallback)}")
     
     if method == "color":
         print("💡 Tip: Use --color R G B to specify background color")
         print("   Example: --color 255 255 255 for white background")
+        print("   Omit --color to auto-detect it from the frame borders")
     elif method == "edges":
         print("💡 Tip: Best for images with clear foreground/background separation")
     elif method == "ai":
         print("💡 Tip: Best for complex images, portraits, animals")
         print("   Note: First run may download AI model (~176MB)")
+        print("   Offline nodes: use --method onnx --onnx-model model.onnx instead")
+    elif method == "onnx":
+        print("💡 Tip: Runs a local ONNX model on CPU, no download needed")
+        print("   Add --onnx-int8 for a faster quantized model")
+
+def collect_batch_inputs(paths):
+    """Expand files and directories given to --batch into a sorted GIF list"""
+    inputs = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            inputs.extend(sorted(p for p in path.iterdir() if p.suffix.lower() == '.gif'))
+        elif path.exists():
+            inputs.append(path)
+        else:
+            print(f"⚠️  Skipping missing batch input: {path}")
+    return inputs
+
+def build_method_kwargs(args):
+    """Removal parameters from the command line, without auto-detected values"""
+    kwargs = {}
+    if args.method == 'color':
+        if args.color:
+            kwargs['target_color'] = tuple(args.color)
+        if args.tolerance is not None:
+            kwargs['tolerance'] = args.tolerance
+    elif args.method == 'edges':
+        kwargs['blur_kernel'] = args.blur_kernel
+        kwargs['canny_low'] = args.canny_low
+        kwargs['canny_high'] = args.canny_high
+    elif args.method == 'onnx':
+        kwargs['model_path'] = args.onnx_model
+        kwargs['intra_op_threads'] = args.onnx_threads
+        kwargs['inter_op_threads'] = args.onnx_inter_threads
+        kwargs['int8'] = args.onnx_int8
+    if args.tile_size:
+        kwargs['tile_size'] = args.tile_size
+        kwargs['tile_overlap'] = args.tile_overlap
+    if args.refine_radius or args.morph_kernel:
+        kwargs['refine_radius'] = args.refine_radius
+        kwargs['refine_eps'] = args.refine_eps
+        kwargs['morph_kernel'] = args.morph_kernel
+    if args.removal_scale:
+        kwargs['removal_scale'] = args.removal_scale
+    return kwargs
 
 def main():
     parser = argparse.ArgumentParser(
@@ -112,11 +166,20 @@ Examples:
   {sys.argv[0]} input.gif                    # Auto-detect best method
   {sys.argv[0]} input.gif --method ai        # Use AI-powered removal
   {sys.argv[0]} input.gif --method color --color 255 255 255  # Remove white background
+  {sys.argv[0]} input.gif --method color     # Auto-detect background color
   {sys.argv[0]} input.gif --method edges     # Use edge detection
+  {sys.argv[0]} input.gif --format webp      # Animated WebP with soft alpha
+  {sys.argv[0]} clip.mp4 --max-fps 12        # Video clip straight to a transparent GIF
+  {sys.argv[0]} input.gif --masks-only       # Write only the per-frame alpha masks
+  {sys.argv[0]} input.gif --apply-masks input_nobg.masks  # Re-apply saved masks
   {sys.argv[0]} input.gif --info             # Show GIF information
   {sys.argv[0]} input.gif --preview          # Preview frame extraction
+  {sys.argv[0]} input.gif --preview-sheet --tolerance 30  # Quick low-res parameter preview
   {sys.argv[0]} --gui                        # Launch graphical interface
   {sys.argv[0]} --check-deps                 # Check dependencies
+  cat input.gif | {sys.argv[0]} - -o - > out.gif   # Stream through stdin/stdout
+  {sys.argv[0]} --batch gifs/ --output-dir out/     # Resumable batch run over a folder
+  {sys.argv[0]} --watch inbox/ --output-dir out/     # Process GIFs as they arrive
 
 Background Removal Methods:
   auto    - Automatically choose best method (AI → Color → Edges)
@@ -131,25 +194,53 @@ Output Quality:
     )
     
     # Required arguments
-    parser.add_argument('input', nargs='?', help='Input GIF file path')
+    parser.add_argument('input', nargs='?', help='Input GIF or video clip (MP4, WebM, ...) path ("-" reads a GIF from stdin)')
     
     # Output options
-    parser.add_argument('-o', '--output', help='Output GIF file path')
+    parser.add_argument('-o', '--output', help='Output GIF file path ("-" writes to stdout)')
     parser.add_argument('--suffix', default='_nobg', help='Suffix for output file (default: _nobg)')
+    parser.add_argument('--batch', nargs='+', metavar='PATH',
+                       help='Process many GIFs (files or directories); finished ones are skipped on restart')
+    parser.add_argument('--watch', default=None, metavar='DIR',
+                       help='Keep running and process GIFs as they appear in DIR')
+    parser.add_argument('--settle-time', type=float, default=1.0,
+                       help='Seconds a watched file must stay unchanged before processing (default: 1.0)')
+    parser.add_argument('--output-dir', default=None,
+                       help='Output directory for --batch/--watch (default: next to each input)')
+    parser.add_argument('--journal', default=None, metavar='PATH',
+                       help='Batch journal file (default: .gif_bg_journal.jsonl in the output directory)')
+    parser.add_argument('--checkpoint-frames', type=int, default=100,
+                       help='Checkpoint frames of batch GIFs with at least this many frames (default: 100)')
     parser.add_argument('--quality', type=int, choices=[1, 2, 3], default=2,
                        help='Output quality: 1=Fast, 2=Balanced, 3=Best (default: 2)')
+    parser.add_argument('--format', choices=['gif', 'webp', 'apng'], default=None,
+                       help='Output format; WebP/APNG keep soft 8-bit alpha edges (default: from output extension, else gif)')
+    parser.add_argument('--target-size', type=float, default=None, metavar='KB',
+                       help='Search palette size, dithering, frame decimation and scale for a GIF under this many KB')
+    parser.add_argument('--masks-only', action='store_true',
+                       help='Write only the per-frame alpha masks (compact indexed .masks file) instead of an animation')
+    parser.add_argument('--sprite-sheet', nargs='?', const='', default=None, metavar='PATH',
+                       help='Write a packed PNG sprite sheet of the trimmed, deduplicated frames plus a JSON manifest')
+    parser.add_argument('--apply-masks', default=None, metavar='MASKS',
+                       help='Apply a .masks file to the input instead of running background removal')
+    parser.add_argument('--reprocess', action='store_true',
+                       help='Run removal even on inputs whose background is already transparent')
+    parser.add_argument('--keyframe-interval', type=int, default=None,
+                       help='Run removal on every Nth frame only (default: 2 for --quality 1 on GIFs over 10 frames, else 1)')
+    parser.add_argument('--skip-mode', choices=['reuse', 'interpolate', 'drop'], default='interpolate',
+                       help='Non-key frames: reuse or interpolate key masks, or drop them and merge durations (default: interpolate)')
     
     # Background removal options
     parser.add_argument('--method', 
-                       choices=['color', 'edges', 'ai', 'auto'], 
+                       choices=METHODS.names(), 
                        default='auto',
                        help='Background removal method (default: auto)')
     
     # Color-based removal options
     parser.add_argument('--color', nargs=3, type=int, metavar=('R', 'G', 'B'),
                        help='Target background color (e.g., 255 255 255 for white)')
-    parser.add_argument('--tolerance', type=int, default=40,
-                       help='Color tolerance for color-based removal (0-255, default: 40)')
+    parser.add_argument('--tolerance', type=int, default=None,
+                       help='Color tolerance for color-based removal (0-255, default: auto-detected)')
     
     # Edge-based removal options
     parser.add_argument('--blur-kernel', type=int, default=5,
@@ -159,15 +250,90 @@ Output Quality:
     parser.add_argument('--canny-high', type=int, default=150,
                        help='Canny edge detection higher threshold (default: 150)')
     
+    parser.add_argument('--max-dimension', type=int, default=None,
+                       help='Reject GIFs wider or taller than this many pixels')
+    parser.add_argument('--max-frames', type=int, default=None,
+                       help='Reject GIFs with more frames than this')
+    parser.add_argument('--max-pixels', type=int, default=None,
+                       help='Reject GIFs whose decoded size (width x height x frames) exceeds this')
+    parser.add_argument('--max-fps', type=float, default=None,
+                       help='Drop frames of video inputs down to this frame rate (timing is preserved)')
+    parser.add_argument('--max-size', type=int, default=None,
+                       help='Downscale frames right after decoding so neither side exceeds this many pixels')
+    parser.add_argument('--scale', type=float, default=None,
+                       help='Resize frames by this factor right after decoding (e.g. 0.5)')
+    parser.add_argument('--removal-scale', type=float, default=None,
+                       help='Run removal at this fraction of the output size and upscale the masks (e.g. 0.5)')
+    parser.add_argument('--tile-size', type=int, default=None,
+                       help='Process frames larger than this in overlapping tiles (bounds memory for 4K+ frames)')
+    parser.add_argument('--tile-overlap', type=int, default=32,
+                       help='Overlap between tiles in pixels, blended to hide seams (default: 32)')
+    parser.add_argument('--refine-radius', type=int, default=0,
+                       help='Soften mask edges with a guided filter of this radius (default: 0 = off)')
+    parser.add_argument('--refine-eps', type=float, default=1e-3,
+                       help='Guided filter regularization; higher smooths more (default: 0.001)')
+    parser.add_argument('--morph-kernel', type=int, default=0,
+                       help='Remove specks and fill pinholes in masks with this kernel size (default: 0 = off)')
+    parser.add_argument('--trim', action='store_true',
+                       help='Crop the animation to the union bounding box of visible pixels across all frames')
+    parser.add_argument('--trim-padding', type=int, default=0,
+                       help='Transparent margin kept around the --trim box in pixels (default: 0)')
+    parser.add_argument('--temporal-window', type=int, default=1,
+                       help='Stabilize masks over this many neighbouring frames (odd; default: 1 = off)')
+    parser.add_argument('--temporal-mode', choices=['median', 'majority'], default='median',
+                       help='Temporal filter: median alpha or 0/255 majority vote (default: median)')
+    parser.add_argument('--hysteresis', type=int, default=0,
+                       help='Keep the previous frame\'s alpha unless it changes by more than this (default: 0 = off)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Number of parallel frame workers (default: CPU count)')
+    parser.add_argument('--parallel-encode', action='store_true',
+                       help='LZW-encode GIF frames in parallel and splice them (faster on many cores, slightly larger files)')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='Overlap decoding, removal and encoding (processes every frame; keyframe options are ignored)')
+    
+    # Offline ONNX backend options
+    parser.add_argument('--onnx-model', default=None, metavar='PATH',
+                       help='Local ONNX segmentation model for --method onnx (default: $GIF_BG_ONNX_MODEL)')
+    parser.add_argument('--onnx-threads', type=int, default=None,
+                       help='ONNX Runtime intra-op threads (default: runtime choice)')
+    parser.add_argument('--onnx-inter-threads', type=int, default=None,
+                       help='ONNX Runtime inter-op threads (default: runtime choice)')
+    parser.add_argument('--onnx-int8', action='store_true',
+                       help='Use a dynamically quantized INT8 copy of the ONNX model (cached in $GIF_BG_CACHE_DIR or ~/.cache)')
+    
     # Information and debugging
     parser.add_argument('--info', action='store_true', help='Show GIF information only')
     parser.add_argument('--preview', action='store_true', help='Preview frame extraction')
+    parser.add_argument('--preview-sheet', nargs='?', const='', default=None, metavar='PATH',
+                       help='Process a few sampled frames at low resolution and write a PNG contact sheet')
+    parser.add_argument('--preview-frames', type=int, default=4,
+                       help='Number of frames sampled for --preview-sheet (default: 4)')
+    parser.add_argument('--preview-size', type=int, default=160,
+                       help='Maximum frame size for --preview-sheet (default: 160)')
     parser.add_argument('--check-deps', action='store_true', help='Check dependencies and exit')
     parser.add_argument('--verbose', action='store_true', help='Enable verbose logging')
+    parser.add_argument('--trace', action='store_true', help='Log per-frame removal details (implies --verbose)')
     parser.add_argument('-g', '--gui', action='store_true', help='Launch graphical user interface')
     
     args = parser.parse_args()
     
+    if args.batch or args.watch:
+        # Batch and watch runs write one animation per input with --format/--quality only
+        unsupported = {'--output': args.output, '--trim': args.trim, '--target-size': args.target_size,
+                       '--masks-only': args.masks_only, '--sprite-sheet': args.sprite_sheet is not None,
+                       '--apply-masks': args.apply_masks, '--preview-sheet': args.preview_sheet is not None,
+                       '--temporal-window': args.temporal_window > 1, '--hysteresis': args.hysteresis > 0,
+                       '--parallel-encode': args.parallel_encode}
+        flags = [flag for flag, used in unsupported.items() if used]
+        if flags:
+            parser.error(f"{'--batch' if args.batch else '--watch'} does not support {', '.join(flags)}")
+    
+    # "-" streams the GIF through stdin/stdout; all messages then go to stderr
+    stdout_stream = None
+    if not (args.info or args.preview) and (args.output == '-' or (args.input == '-' and not args.output)):
+        stdout_stream = sys.stdout.buffer
+        sys.stdout = sys.stderr
+    
     # Print banner
     print_banner()
     
@@ -177,7 +343,7 @@ Output Quality:
         return
     
     # If no input provided and not GUI, show help
-    if not args.input and not args.gui:
+    if not args.input and not args.gui and not args.batch and not args.watch:
         parser.print_help()
         print(f"\n💡 Quick Start:")
         print(f"  1. Create test images: python create_test_images.py")
@@ -188,22 +354,83 @@ Output Quality:
         return
     
     # Validate input file exists (if provided)
-    if args.input and not Path(args.input).exists():
+    if args.input and args.input != '-' and not Path(args.input).exists():
         print(f"❌ Error: Input file '{args.input}' not found")
         print(f"💡 Current directory: {os.getcwd()}")
         sys.exit(1)
     
     # Setup processors
-    log_level = logging.DEBUG if args.verbose else logging.INFO
-    processor = GIFProcessor(log_level=log_level)
-    remover = BackgroundRemover(log_level=log_level)
+    log_level = logging.DEBUG if args.verbose or args.trace else logging.INFO
+    processor = GIFProcessor(log_level=log_level,
+                             max_dimension=args.max_dimension,
+                             max_frames=args.max_frames,
+                             max_pixels=args.max_pixels,
+                             max_size=args.max_size,
+                             scale=args.scale,
+                             max_fps=args.max_fps)
+    remover = BackgroundRemover(log_level=log_level, trace=args.trace)
+    preset = ['fast', 'balanced', 'best'][args.quality - 1]
+    
+    if args.batch:
+        # Resumable batch run: journal of finished outputs plus frame checkpoints
+        inputs = collect_batch_inputs(args.batch)
+        journal = args.journal or Path(args.output_dir or '.') / '.gif_bg_journal.jsonl'
+        print(f"\n📚 Batch processing {len(inputs)} GIFs (journal: {journal})")
+        print_method_info(args.method)
+        runner = BatchRunner(journal, processor=processor, remover=remover,
+                             checkpoint_min_frames=args.checkpoint_frames,
+                             max_workers=args.workers, skip_transparent=not args.reprocess,
+                             log_level=log_level)
+        try:
+            stats = runner.run(inputs, output_dir=args.output_dir, suffix=args.suffix,
+                               method=args.method, output_format=args.format or 'gif', preset=preset,
+                               **build_method_kwargs(args))
+        except KeyboardInterrupt:
+            print(f"\n❌ Batch interrupted; rerun the same command to resume")
+            sys.exit(1)
+        remover.log_summary()
+        print(f"\n🎉 Batch Complete!")
+        print(f"  ✅ Processed: {len(stats['processed'])}")
+        print(f"  ⏭️  Skipped (already done): {len(stats['skipped'])}")
+        print(f"  ❌ Failed: {len(stats['failed'])}")
+        if stats['failed']:
+            sys.exit(1)
+        return
+    
+    if args.watch:
+        # Resident watcher: one warm remover for every file that arrives
+        print(f"\n👀 Watching {args.watch} for new GIFs (Ctrl+C to stop)")
+        print_method_info(args.method)
+        watcher = None
+        try:
+            watcher = FolderWatcher(args.watch, output_dir=args.output_dir, suffix=args.suffix,
+                                    method=args.method, output_format=args.format or 'gif', preset=preset,
+                                    max_workers=args.workers or 2, settle_time=args.settle_time,
+                                    skip_transparent=not args.reprocess,
+                                    processor=processor, remover=remover, log_level=log_level,
+                                    **build_method_kwargs(args))
+            stats = watcher.run()
+        except KeyboardInterrupt:
+            if watcher is None:
+                print(f"\n❌ Watcher interrupted before it started")
+                sys.exit(1)
+            stats = {'processed': watcher.processed, 'failed': watcher.failed}
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+        remover.log_summary()
+        print(f"\n🛑 Watcher stopped: {stats['processed']} processed, {stats['failed']} failed")
+        return
+    
+    source = sys.stdin.buffer.read() if args.input == '-' else args.input
+    input_label = '<stdin>' if args.input == '-' else args.input
     
     try:
         if args.info or args.preview:
             # Show GIF information
-            info = processor.get_gif_info(args.input)
+            info = processor.get_gif_info(source)
             print(f"\n📊 GIF Information:")
-            print(f"  File: {args.input}")
+            print(f"  File: {input_label}")
             print(f"  Frames: {info['frame_count']}")
             print(f"  Size: {info['size']}")
             print(f"  Mode: {info['mode']}")
@@ -212,92 +439,283 @@ Output Quality:
             
             if args.preview:
                 print(f"\n🔍 Frame Preview:")
-                processor.preview_frames(args.input)
+                processor.preview_frames(source)
         
         else:
             # Process the GIF with background removal
-            output_path = args.output or create_output_path(args.input, args.suffix)
+            if stdout_stream is not None:
+                output_path = '-'
+            elif args.preview_sheet is not None:
+                output_path = args.preview_sheet or create_output_path(args.input, '_preview').with_suffix('.png')
+            elif args.sprite_sheet:
+                output_path = Path(args.sprite_sheet)
+            else:
+                output_path = args.output or create_output_path(args.input, args.suffix)
+            if args.format:
+                output_format = args.format
+            else:
+                output_format = processor.output_format_for(output_path) if stdout_stream is None else 'gif'
+            if (args.output and stdout_stream is None and not args.masks_only
+                    and Path(args.output).suffix.lower() not in FORMAT_EXTENSIONS):
+                print(f"❌ Error: Unsupported output extension '{Path(args.output).suffix}' "
+                      f"(use {', '.join(FORMAT_EXTENSIONS)})")
+                sys.exit(1)
+            if args.target_size and output_format != 'gif':
+                print(f"❌ Error: --target-size only applies to GIF output, not {output_format.upper()}")
+                sys.exit(1)
+            if not (args.output or args.sprite_sheet) and stdout_stream is None and args.preview_sheet is None:
+                output_path = output_path.with_suffix('.masks' if args.masks_only else
+                                                      '.png' if args.sprite_sheet is not None else
+                                                      OUTPUT_SUFFIXES[output_format])
+            # Output to stdout is encoded in memory first and written at the end
+            output_target = io.BytesIO() if stdout_stream is not None else output_path
             
             print(f"\n🔄 Processing GIF:")
-            print(f"  Input: {args.input}")
+            print(f"  Input: {input_label}")
             print(f"  Output: {output_path}")
             print(f"  Quality: {['Fast', 'Balanced', 'Best'][args.quality-1]}")
+            print(f"  Format: {'Masks' if args.masks_only else 'Sprite sheet' if args.sprite_sheet is not None else output_format.upper()}")
+            
+            if args.apply_masks:
+                # Reuse stored masks: no background removal at all
+                frames, durations = processor.extract_frames(source)
+                masks = MaskFile(args.apply_masks)
+                print(f"\n🎭 Applying {len(masks)} saved masks from {args.apply_masks}...")
+                processor.save_animation(masks.apply(frames), durations, output_target,
+                                         output_format=output_format, preset=preset)
+                if stdout_stream is not None:
+                    stdout_stream.write(output_target.getvalue())
+                    stdout_stream.flush()
+                print(f"\n✅ Masked output written to {output_path}")
+                return
             
             # Print method information
             print_method_info(args.method)
             
+            if args.method == 'ai' and not check_dependencies():
+                print("⚠️  AI method selected but rembg not available.")
+                print("💡 Falling back to auto mode...")
+                args.method = 'auto'
+            
             # Prepare kwargs for background removal
-            kwargs = {}
+            kwargs = build_method_kwargs(args)
             if args.method == 'color':
-                if args.color:
-                    kwargs['target_color'] = tuple(args.color)
-                else:
-                    kwargs['target_color'] = (255, 255, 255)  # Default to white
-                kwargs['tolerance'] = args.tolerance
-                print(f"  Target color: {kwargs['target_color']}")
-                print(f"  Tolerance: {args.tolerance}")
-            
+                print(f"  Target color: {kwargs.get('target_color', 'auto-detect from frame borders')}")
+                if args.tolerance is not None:
+                    print(f"  Tolerance: {args.tolerance}")
             elif args.method == 'edges':
-                kwargs['blur_kernel'] = args.blur_kernel
-                kwargs['canny_low'] = args.canny_low
-                kwargs['canny_high'] = args.canny_high
                 print(f"  Blur kernel: {args.blur_kernel}")
                 print(f"  Canny thresholds: {args.canny_low}-{args.canny_high}")
-            
-            elif args.method == 'ai':
-                ai_available = check_dependencies()
-                if not ai_available:
-                    print("⚠️  AI method selected but rembg not available.")
-                    print("💡 Falling back to auto mode...")
-                    args.method = 'auto'
-            
+            elif args.method == 'onnx':
+                print(f"  ONNX model: {args.onnx_model or '$GIF_BG_ONNX_MODEL'}{' (INT8)' if args.onnx_int8 else ''}")
             elif args.method == 'auto':
                 print(f"  Auto-selecting best removal method...")
             
-            # Extract frames
-            print(f"\n📂 Extracting frames...")
-            frames, durations = processor.extract_frames(args.input)
-            print(f"✅ Extracted {len(frames)} frames")
+            if args.tile_size:
+                print(f"  Tiles: {args.tile_size}px with {args.tile_overlap}px overlap")
+            if args.refine_radius or args.morph_kernel:
+                print(f"  Mask refinement: guided filter r={args.refine_radius}, cleanup kernel {args.morph_kernel}")
+            if args.max_size or args.scale:
+                resize = [f"scale {args.scale:g}"] if args.scale else []
+                resize += [f"max {args.max_size}px"] if args.max_size else []
+                print(f"  Resize after decode: {', '.join(resize)}")
+            if args.removal_scale:
+                print(f"  Removal at {args.removal_scale:g}x, masks upscaled to output size")
             
-            # Adjust processing based on quality setting
-            if args.quality == 1 and len(frames) > 10:
-                # Fast mode: process every other frame for long GIFs
-                print("⚡ Fast mode: Processing key frames only")
-                frames = frames[::2]
-                durations = durations[::2]
+            # Inputs from earlier runs need no removal; a plain GIF output is just a copy
+            skip_removal = False
+            if not args.reprocess and args.preview_sheet is None:
+                transparency = processor.check_transparency(source)
+                # Only skip when the chosen method and key would leave the sampled alpha as is
+                if (transparency['already_transparent']
+                        and not remover.changes_alpha(transparency['samples'], args.method, **kwargs)):
+                    print(f"\n💡 Input already has a transparent background "
+                          f"({transparency['border_transparency']:.0%} of sampled border pixels transparent)")
+                    transforms = (args.masks_only or args.sprite_sheet is not None or args.trim
+                                  or args.target_size or args.temporal_window > 1 or args.hysteresis > 0)
+                    if transparency['can_copy'] and output_format == 'gif' and not transforms:
+                        data = source if isinstance(source, bytes) else Path(source).read_bytes()
+                        if stdout_stream is not None:
+                            stdout_stream.write(data)
+                            stdout_stream.flush()
+                        else:
+                            Path(output_path).write_bytes(data)
+                        print(f"✅ Copied input unchanged to {output_path} (use --reprocess to force removal)")
+                        return
+                    print(f"⏭️  Skipping background removal; frames go straight to the output (use --reprocess to force it)")
+                    skip_removal = True
             
-            # Process frames with background removal
-            print(f"\n🎨 Removing backgrounds...")
-            processed_frames = []
+            if args.preview_sheet is not None:
+                # Low-resolution preview: a few sampled frames only
+                start = time.perf_counter()
+                samples, indices = processor.sample_frames(source, args.preview_frames, args.preview_size)
+                if args.method in ('color', 'auto') and 'target_color' not in kwargs:
+                    detected = remover.detect_background_color(samples)
+                    if detected['colors']:
+                        kwargs['target_color'] = detected['colors'][0]
+                        kwargs.setdefault('tolerance', detected['tolerance'])
+                previews = remover.process_frames(samples, method=args.method, max_workers=args.workers, **kwargs)
+                sheet = processor.create_contact_sheet(samples, previews)
+                sheet.save(output_target, format='PNG')
+                if stdout_stream is not None:
+                    stdout_stream.write(output_target.getvalue())
+                    stdout_stream.flush()
+                elapsed = time.perf_counter() - start
+                print(f"\n👀 Preview of frames {indices} written to {output_path} ({elapsed:.2f}s)")
+                return
             
-            for i, frame in enumerate(frames):
-                processed_frame = remover.process_frame(frame, method=args.method, **kwargs)
-                processed_frames.append(processed_frame)
-                
-                # Progress indicator
-                progress = (i + 1) / len(frames) * 100
-                if args.verbose or i % 5 == 0 or i == len(frames) - 1:
-                    print(f"  🖼️  Processed frame {i+1}/{len(frames)} ({progress:.1f}%)")
+            def report_progress(done, total):
+                # Progress indicator (total is unknown while the pipeline is still decoding)
+                if total is None:
+                    print(f"  🖼️  Processed frame {done}", end='\r')
+                    return
+                progress = done / total * 100
+                if args.verbose or done % 5 == 1 or done == total:
+                    print(f"  🖼️  Processed frame {done}/{total} ({progress:.1f}%)")
                 else:
-                    print(f"  🖼️  Processed frame {i+1}/{len(frames)} ({progress:.1f}%)", end='\r')
-            
-            print(f"\n✅ Background removal completed")
+                    print(f"  🖼️  Processed frame {done}/{total} ({progress:.1f}%)", end='\r')
             
-            # Create output GIF
-            print(f"\n💾 Saving output GIF...")
             optimize = args.quality >= 2  # Optimize for balanced and best quality
-            processor.create_gif(processed_frames, durations, output_path, optimize=optimize)
+            
+            stabilize = args.temporal_window > 1 or args.hysteresis > 0
+            # These need every processed frame at once, which the streaming pipeline never holds
+            needs_all_frames = (args.masks_only or stabilize or args.trim or args.target_size
+                                or args.sprite_sheet is not None)
+            if args.pipeline and needs_all_frames:
+                print(f"\n💡 --pipeline streams frames one by one; using the regular path for this output")
+            
+            if args.pipeline and not needs_all_frames and not skip_removal:
+                # Decode, removal and encode run concurrently
+                print(f"\n🚰 Pipelined decode → remove → encode...")
+                pipeline = GIFPipeline(processor, remover, max_workers=args.workers)
+                stats = pipeline.run(source, output_target, method=args.method,
+                                     optimize=optimize, progress_callback=report_progress,
+                                     output_format=output_format, preset=preset, **kwargs)
+                print(f"\n✅ Background removal completed")
+                frame_count = stats['frames']
+                total_duration = stats['duration']
+            
+            else:
+                # Extract frames
+                print(f"\n📂 Extracting frames...")
+                frames, durations = processor.extract_frames(source)
+                print(f"✅ Extracted {len(frames)} frames")
+                
+                # Detect the background key once for the whole animation
+                if args.method in ('color', 'auto') and 'target_color' not in kwargs and not skip_removal:
+                    detected = remover.detect_background_color(frames)
+                    if detected['colors']:
+                        kwargs['target_color'] = detected['colors'][0]
+                        kwargs.setdefault('tolerance', detected['tolerance'])
+                        print(f"🔍 Detected background color: {kwargs['target_color']} "
+                              f"(tolerance {kwargs['tolerance']})")
+                
+                # Adjust processing based on quality setting
+                keyframe_interval = args.keyframe_interval
+                if keyframe_interval is None:
+                    keyframe_interval = 2 if args.quality == 1 and len(frames) > 10 else 1
+                
+                # Process frames with background removal
+                if not skip_removal:
+                    print(f"\n🎨 Removing backgrounds...")
+                
+                if skip_removal:
+                    processed_frames = frames
+                elif keyframe_interval > 1:
+                    # Fast mode: remove backgrounds on key frames only, derive the rest
+                    print(f"⚡ Fast mode: Processing every {keyframe_interval} frames ({args.skip_mode} for the rest)")
+                    processed_frames, durations = remover.process_frames_fast(
+                        frames,
+                        durations,
+                        method=args.method,
+                        keyframe_interval=keyframe_interval,
+                        # Masks must line up with the original frames, so never drop any
+                        skip_mode='interpolate' if args.masks_only and args.skip_mode == 'drop' else args.skip_mode,
+                        max_workers=args.workers,
+                        progress_callback=report_progress,
+                        **kwargs
+                    )
+                else:
+                    processed_frames = remover.process_frames(
+                        frames,
+                        method=args.method,
+                        max_workers=args.workers,
+                        progress_callback=report_progress,
+                        **kwargs
+                    )
+                
+                if not skip_removal:
+                    print(f"\n✅ Background removal completed")
+                
+                if stabilize:
+                    print(f"🎞️  Stabilizing masks over {args.temporal_window} frames ({args.temporal_mode}, hysteresis {args.hysteresis})...")
+                    processed_frames = remover.stabilize_masks(processed_frames, args.temporal_window,
+                                                               args.temporal_mode, args.hysteresis)
+                
+                if args.trim and not args.masks_only and args.sprite_sheet is None:
+                    original_size = processed_frames[0].size
+                    processed_frames, box = processor.trim_frames(processed_frames, padding=args.trim_padding)
+                    print(f"✂️  Trimmed {original_size[0]}x{original_size[1]} → "
+                          f"{processed_frames[0].size[0]}x{processed_frames[0].size[1]} (box {box})")
+                
+                if args.masks_only:
+                    # Alpha only: consumers re-apply it to the original frames
+                    print(f"\n💾 Saving masks...")
+                    save_masks(processed_frames, durations, output_target)
+                elif args.sprite_sheet is not None:
+                    # Every frame is trimmed on its own and duplicates share one rect
+                    print(f"\n💾 Packing sprite sheet...")
+                    manifest = processor.create_sprite_sheet(processed_frames, durations, output_target)
+                    if stdout_stream is None:
+                        manifest_path = Path(output_path).with_suffix('.json')
+                        manifest['image'] = Path(output_path).name
+                        processor.write_manifest(manifest, manifest_path)
+                        print(f"✅ Manifest: {manifest_path}")
+                    else:
+                        print(f"💡 Sprite sheet written to stdout; no manifest file is saved")
+                elif args.target_size and output_format == 'gif':
+                    # Byte budget: search encoder settings, write the best fit
+                    print(f"\n💾 Fitting output GIF into {args.target_size:g}KB...")
+                    data, chosen = processor.encode_to_budget(processed_frames, durations,
+                                                              int(args.target_size * 1024))
+                    if stdout_stream is not None:
+                        output_target.write(data)
+                    else:
+                        Path(output_path).write_bytes(data)
+                    durations = [sum(durations[i:i + chosen['decimation']])
+                                 for i in range(0, len(durations), chosen['decimation'])]
+                    processed_frames = processed_frames[::chosen['decimation']]
+                    print(f"{'✅' if chosen['fits'] else '⚠️ '} Chosen settings: {chosen['colors']} colors, "
+                          f"dither {'on' if chosen['dither'] else 'off'}, every {chosen['decimation']} frame(s), "
+                          f"scale {chosen['scale']:g} ({chosen['bytes'] / 1024:.1f}KB after {chosen['attempts']} attempts)")
+                else:
+                    # Create output animation
+                    print(f"\n💾 Saving output {output_format.upper()}...")
+                    processor.save_animation(processed_frames, durations, output_target,
+                                             output_format=output_format, preset=preset,
+                                             max_workers=args.workers, parallel_encode=args.parallel_encode)
+                
+                frame_count = len(processed_frames)
+                total_duration = sum(durations) / 1000
+                
+            remover.log_summary()
             
             # Show results
             print(f"\n🎉 Processing Complete!")
-            print(f"  ✅ Original: {args.input}")
+            print(f"  ✅ Original: {input_label}")
             print(f"  ✅ Processed: {output_path}")
-            print(f"  📊 Frames processed: {len(frames)}")
-            print(f"  ⏱️  Total duration: {sum(durations)/1000:.2f}s")
+            print(f"  📊 Frames written: {frame_count}")
+            print(f"  ⏱️  Total duration: {total_duration:.2f}s")
             
             # Show file sizes
-            input_size = Path(args.input).stat().st_size / 1024
-            output_size = Path(output_path).stat().st_size / 1024
+            if stdout_stream is not None:
+                output_bytes = output_target.getvalue()
+                stdout_stream.write(output_bytes)
+                stdout_stream.flush()
+                output_size = len(output_bytes) / 1024
+            else:
+                output_size = Path(output_path).stat().st_size / 1024
+            input_size = (len(source) if isinstance(source, bytes) else Path(source).stat().st_size) / 1024
             size_change = ((output_size - input_size) / input_size) * 100
             print(f"  📦 File size: {input_size:.1f}KB → {output_size:.1f}KB ({size_change:+.1f}%)")
             
@@ -15,6 +15,7 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     packages=find_packages(),
+    package_data={"src": ["models/*.onnx"]},
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -8,12 +8,30 @@ __author__ = "Your Name"
 
 from .gif_processor import GIFProcessor
 from .background_remover import BackgroundRemover
-from .utils import setup_logging, validate_gif, create_output_path
+from .utils import setup_logging, validate_gif, inspect_gif, create_output_path, ProcessingCancelled
+from .async_api import AsyncGIFProcessor
+from .pipeline import GIFPipeline
+from .batch import BatchRunner, JobJournal
+from .watcher import FolderWatcher
+from .masks import save_masks, MaskFile
+from .methods import METHODS, RemovalMethod, MethodRegistry
 
 __all__ = [
     'GIFProcessor', 
     'BackgroundRemover', 
+    'AsyncGIFProcessor',
+    'GIFPipeline',
+    'BatchRunner',
+    'JobJournal',
+    'FolderWatcher',
+    'save_masks',
+    'MaskFile',
+    'METHODS',
+    'RemovalMethod',
+    'MethodRegistry',
     'setup_logging', 
     'validate_gif', 
-    'create_output_path'
+    'inspect_gif',
+    'create_output_path',
+    'ProcessingCancelled'
 ]
\ No newline at end of file
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, List, Optional, Tuple
+
+from PIL import Image
+
+# Remove relative imports, use direct imports
+try:
+    from gif_processor import GIFProcessor
+    from background_remover import BackgroundRemover
+    from utils import setup_logging
+except ImportError:
+    # Fallback for when running as main
+    from .gif_processor import GIFProcessor
+    from .background_remover import BackgroundRemover
+    from .utils import setup_logging
+
+class AsyncGIFProcessor:
+    """
+    Asyncio front-end for GIFProcessor and BackgroundRemover
+
+    All CPU work runs on an executor so the event loop stays responsive.
+    A single semaphore caps the number of frame jobs in flight across every
+    GIF submitted to this instance, so many GIFs can be processed
+    concurrently without oversubscribing the CPU. Methods whose registry
+    ``parallelism`` is not "thread" (the AI and ONNX models) already use
+    several cores or share a session, so their frames run one at a time.
+    """
+
+    def __init__(self,
+                 executor: Optional[Executor] = None,
+                 max_concurrency: int = 4,
+                 processor: Optional[GIFProcessor] = None,
+                 remover: Optional[BackgroundRemover] = None,
+                 log_level=logging.INFO):
+        self.logger = setup_logging('AsyncGIFProcessor', log_level)
+        self.processor = processor or GIFProcessor(log_level=log_level)
+        self.remover = remover or BackgroundRemover(log_level=log_level)
+        self.max_concurrency = max(1, max_concurrency)
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=self.max_concurrency)
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._method_locks = {}
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Concurrency limit shared by all GIFs (created on the running loop)"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+            self._method_locks = {}
+        return self._semaphore
+
+    def _method_lock(self, method: str) -> Optional[asyncio.Lock]:
+        """Per-method lock for methods that must not run frames concurrently"""
+        entry = self.remover.methods.get(method)
+        if entry is None or entry.parallelism == "thread":
+            return None
+        self.semaphore  # Resets the locks when the running loop changes
+        if method not in self._method_locks:
+            self._method_locks[method] = asyncio.Lock()
+        return self._method_locks[method]
+
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking call on the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def extract_frames(self, gif_path: str) -> Tuple[List[Image.Image], List[int]]:
+        """Extract frames and durations without blocking the event loop"""
+        return await self._run(self.processor.extract_frames, gif_path)
+
+    async def create_gif(self, frames: List[Image.Image], durations: List[int],
+                         output_path: str, **kwargs) -> None:
+        """Write the output GIF without blocking the event loop"""
+        await self._run(self.processor.create_gif, frames, durations, output_path, **kwargs)
+
+    async def process_frame(self, frame: Image.Image, method: str = "auto", **kwargs) -> Image.Image:
+        """Remove the background from one frame under the concurrency limit"""
+        lock = self._method_lock(method)
+        if lock is None:
+            async with self.semaphore:
+                return await self._run(self.remover.process_frame, frame, method, **kwargs)
+        # Wait for the method before taking a slot, so queued frames don't starve other GIFs
+        async with lock:
+            async with self.semaphore:
+                return await self._run(self.remover.process_frame, frame, method, **kwargs)
+
+    async def iter_processed_frames(self, frames: List[Image.Image],
+                                    method: str = "auto",
+                                    **kwargs) -> AsyncIterator[Tuple[int, Image.Image]]:
+        """
+        Process frames concurrently and yield (index, frame) in order
+
+        At most ``max_concurrency`` frames of this animation are scheduled
+        ahead of the consumer. Cancelling the consumer (or closing the
+        iterator) cancels every frame that has not started yet.
+
+        Args:
+            frames: List of PIL Image frames
+            method: Background removal method
+            **kwargs: Additional parameters for the removal method
+        """
+        pending = []
+        next_index = 0
+        try:
+            for index in range(len(frames)):
+                while next_index < len(frames) and len(pending) < self.max_concurrency:
+                    pending.append(asyncio.ensure_future(
+                        self.process_frame(frames[next_index], method, **kwargs)))
+                    next_index += 1
+                result = await pending.pop(0)
+                yield index, result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def process_frames(self, frames: List[Image.Image],
+                             method: str = "auto",
+                             progress_callback=None,
+                             **kwargs) -> List[Image.Image]:
+        """
+        Process all frames of an animation
+
+        Args:
+            frames: List of PIL Image frames
+            method: Background removal method
+            progress_callback: Optional callable(done, total) invoked per frame
+            **kwargs: Additional parameters for the removal method
+
+        Returns:
+            List of processed frames
+        """
+        processed = []
+        async for index, frame in self.iter_processed_frames(frames, method, **kwargs):
+            processed.append(frame)
+            if progress_callback is not None:
+                progress_callback(index + 1, len(frames))
+        return processed
+
+    async def process_gif(self, input_path: str, output_path: str,
+                          method: str = "auto",
+                          optimize: bool = True,
+                          progress_callback=None,
+                          **kwargs) -> str:
+        """
+        Full extract → remove → encode pipeline as a coroutine
+
+        Args:
+            input_path: Input GIF file path, bytes or binary file object
+            output_path: Output GIF file path or writable binary file object
+            method: Background removal method
+            optimize: Whether to optimize the GIF
+            progress_callback: Optional callable(done, total) invoked per frame
+            **kwargs: Additional parameters for the removal method
+
+        Returns:
+            The output path (or file object)
+        """
+        frames, durations = await self.extract_frames(input_path)
+
+        if method in ('color', 'auto') and 'target_color' not in kwargs:
+            detected = await self._run(self.remover.detect_background_color, frames)
+            if detected['colors']:
+                kwargs['target_color'] = detected['colors'][0]
+                kwargs.setdefault('tolerance', detected['tolerance'])
+
+        processed = await self.process_frames(frames, method, progress_callback, **kwargs)
+        await self.create_gif(processed, durations, output_path, optimize=optimize)
+        return output_path
+
+    def close(self) -> None:
+        """Shut down the executor if it was created by this instance"""
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
@@ -4,35 +4,88 @@ import logging
 from typing import Tuple, List, Optional
 import cv2
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # Remove relative imports, use direct imports
 try:
-    from utils import setup_logging
+    from utils import setup_logging, ProcessingCancelled, RunMetrics
+    from methods import METHODS
+    from onnx_backend import ONNXSegmenter, default_model_path
 except ImportError:
     # Fallback for when running as main
-    from .utils import setup_logging
+    from .utils import setup_logging, ProcessingCancelled, RunMetrics
+    from .methods import METHODS
+    from .onnx_backend import ONNXSegmenter, default_model_path
+
+# Frame-level options consumed by process_frame for the mask refinement stage
+REFINE_PARAMS = ('refine_radius', 'refine_eps', 'morph_kernel')
 
 class BackgroundRemover:
     """
     Advanced background removal with multiple methods including AI
     """
     
-    def __init__(self, log_level=logging.INFO):
+    def __init__(self, log_level=logging.INFO, trace: bool = False, methods=None):
         self.logger = setup_logging('BackgroundRemover', log_level)
+        self.methods = methods or METHODS  # Method registry used for dispatch
         self.ai_model = None
+        self._ai_session = None
+        self._ai_unavailable = False
+        self._ai_lock = threading.Lock()
+        self._onnx_segmenters = {}
+        self._onnx_failed = set()
+        self._onnx_lock = threading.Lock()
+        # Per-frame events are counted here; detail is only logged when tracing
+        self.metrics = RunMetrics()
+        self.trace = trace
+    
+    def _trace(self, message: str) -> None:
+        """Per-frame detail, logged at DEBUG only when tracing is enabled"""
+        if self.trace:
+            self.logger.debug(message)
     
     def _load_ai_model(self):
-        """Lazy loading of AI model"""
-        if self.ai_model is None:
-            try:
-                from rembg import remove as rembg_remove
-                self.ai_model = rembg_remove
-                self.logger.info("✅ AI model loaded successfully")
-            except ImportError:
-                self.logger.warning("❌ Rembg not available. Install with: pip install rembg")
-                self.ai_model = None
+        """
+        Lazy loading of AI model
+        
+        One rembg session is created and kept on the remover, so the model
+        is loaded once instead of on every frame.
+        """
+        with self._ai_lock:
+            if self.ai_model is None and not self._ai_unavailable:
+                try:
+                    from rembg import remove as rembg_remove, new_session
+                    self._ai_session = new_session()
+                    self.ai_model = rembg_remove
+                    self.logger.info("✅ AI model loaded successfully")
+                except ImportError:
+                    # Remember the failure so the import isn't retried every frame
+                    self.logger.warning("❌ Rembg not available. Install with: pip install rembg")
+                    self._ai_unavailable = True
+                except Exception as e:
+                    self.logger.warning(f"❌ Failed to load AI model: {e}")
+                    self._ai_unavailable = True
         return self.ai_model
     
+    def log_summary(self, reset: bool = True) -> dict:
+        """
+        Log the per-run counters once as a structured summary
+        
+        Args:
+            reset: Clear the counters afterwards for the next run
+        
+        Returns:
+            The counters that were logged
+        """
+        summary = self.metrics.snapshot()
+        has_failures = any(key.startswith('failures.') for key in summary)
+        self.logger.log(logging.WARNING if has_failures else logging.INFO,
+                        f"Run summary: {self.metrics.to_json()}")
+        if reset:
+            self.metrics.reset()
+        return summary
+    
     def pil_to_cv2(self, pil_image: Image.Image) -> np.ndarray:
         """Convert PIL Image to OpenCV format (BGR)"""
         # Convert PIL RGB to OpenCV BGR
@@ -57,7 +110,8 @@ class BackgroundRemover:
         """
         ai_remove = self._load_ai_model()
         if ai_remove is None:
-            self.logger.warning("AI model not available, falling back to edge detection")
+            self.metrics.increment('fallback.ai_unavailable')
+            self._trace("AI model not available, falling back to edge detection")
             return self.remove_background_edges(image)
         
         try:
@@ -68,18 +122,72 @@ class BackgroundRemover:
                 image_rgb = image
             
             # Use AI to remove background
-            result = ai_remove(image_rgb)
+            result = ai_remove(image_rgb, session=self._ai_session)
             
             # Ensure result is RGBA
             if result.mode != 'RGBA':
                 result = result.convert('RGBA')
                 
-            self.logger.info("✅ AI background removal completed")
+            self._trace("✅ AI background removal completed")
             return result
             
         except Exception as e:
-            self.logger.error(f"AI background removal failed: {e}")
-            self.logger.warning("Falling back to edge detection")
+            self.metrics.increment('fallback.ai_error')
+            self._trace(f"AI background removal failed, falling back to edge detection: {e}")
+            return self.remove_background_edges(image)
+    
+    def _get_onnx_segmenter(self, model_path: Optional[str], 
+                            intra_op_threads: Optional[int] = None,
+                            inter_op_threads: Optional[int] = None,
+                            int8: bool = False):
+        """Load (once) and cache an ONNX Runtime session; None if unavailable"""
+        model_path = model_path or default_model_path()
+        key = (model_path, intra_op_threads, inter_op_threads, int8)
+        if key in self._onnx_segmenters:
+            return self._onnx_segmenters[key]
+        
+        with self._onnx_lock:
+            if key not in self._onnx_segmenters and key not in self._onnx_failed:
+                try:
+                    if model_path is None:
+                        raise ValueError("No ONNX model configured (pass model_path or set GIF_BG_ONNX_MODEL)")
+                    path = ONNXSegmenter.quantize(model_path) if int8 else model_path
+                    self._onnx_segmenters[key] = ONNXSegmenter(
+                        path, intra_op_threads, inter_op_threads, log_level=self.logger.level)
+                except Exception as e:
+                    self.logger.warning(f"❌ ONNX backend not available: {e}")
+                    self._onnx_failed.add(key)
+        return self._onnx_segmenters.get(key)
+    
+    def remove_background_onnx(self, image: Image.Image, 
+                               model_path: Optional[str] = None,
+                               intra_op_threads: Optional[int] = None,
+                               inter_op_threads: Optional[int] = None,
+                               int8: bool = False) -> Image.Image:
+        """
+        Remove background with a local ONNX segmentation model (offline)
+        
+        Args:
+            image: PIL Image
+            model_path: Path to the .onnx model (default: $GIF_BG_ONNX_MODEL)
+            intra_op_threads: ONNX Runtime threads used within an operator
+            inter_op_threads: ONNX Runtime threads used across operators
+            int8: Use a dynamically quantized INT8 copy of the model
+        
+        Returns:
+            Image with transparent background
+        """
+        segmenter = self._get_onnx_segmenter(model_path, intra_op_threads, inter_op_threads, int8)
+        if segmenter is None:
+            self.metrics.increment('fallback.onnx_unavailable')
+            self._trace("ONNX model not available, falling back to edge detection")
+            return self.remove_background_edges(image)
+        
+        try:
+            return segmenter.remove_background(image)
+        except Exception as e:
+            self.metrics.increment('fallback.onnx_error')
+            self._trace(f"ONNX background removal failed, falling back to edge detection: {e}")
             return self.remove_background_edges(image)
     
     def remove_background_color_based(self, image: Image.Image, target_color: Tuple[int, int, int], 
@@ -119,6 +227,79 @@ class BackgroundRemover:
         
         return Image.fromarray(result)
     
+    def detect_background_color(self, frames: List[Image.Image],
+                                max_frames: int = 8,
+                                border: int = 2,
+                                bin_size: int = 8,
+                                top_k: int = 3,
+                                min_share: float = 0.05) -> dict:
+        """
+        Detect the dominant background color(s) from frame borders
+        
+        Border pixels from an evenly spaced subset of frames are quantized
+        into color bins and counted in one vectorized histogram, so the key
+        color is found without a trial removal per frame.
+        
+        Args:
+            frames: List of PIL Image frames (RGB or RGBA)
+            max_frames: Maximum number of frames to sample
+            border: Border width in pixels to sample on each side
+            bin_size: Quantization step per channel (power of two)
+            top_k: Maximum number of candidate colors to return
+            min_share: Minimum share of border pixels for a candidate color
+        
+        Returns:
+            Dictionary with 'colors' (list of RGB tuples, dominant first),
+            'shares' (fraction of border pixels per color) and a suggested
+            'tolerance' for the dominant color
+        """
+        if not frames:
+            raise ValueError("No frames provided for background detection")
+        
+        step = max(1, len(frames) // max(1, max_frames))
+        samples = []
+        for frame in frames[::step][:max_frames]:
+            arr = np.asarray(frame.convert('RGBA'))
+            b = max(1, min(border, arr.shape[0] // 2, arr.shape[1] // 2))
+            edge = np.concatenate([
+                arr[:b].reshape(-1, 4),
+                arr[-b:].reshape(-1, 4),
+                arr[b:-b, :b].reshape(-1, 4),
+                arr[b:-b, -b:].reshape(-1, 4),
+            ])
+            # Pixels that are already transparent carry no color information
+            samples.append(edge[edge[:, 3] > 0, :3])
+        
+        pixels = np.concatenate(samples).astype(np.int32)
+        if len(pixels) == 0:
+            return {'colors': [], 'shares': [], 'tolerance': 0}
+        
+        shift = max(0, int(bin_size).bit_length() - 1)
+        bins_per_channel = 256 >> shift
+        quantized = pixels >> shift
+        bin_index = (quantized[:, 0] * bins_per_channel + quantized[:, 1]) * bins_per_channel + quantized[:, 2]
+        counts = np.bincount(bin_index, minlength=bins_per_channel ** 3)
+        
+        colors = []
+        shares = []
+        for idx in np.argsort(counts)[::-1][:top_k]:
+            share = counts[idx] / len(pixels)
+            if share < min_share and colors:
+                break
+            members = pixels[bin_index == idx]
+            colors.append(tuple(int(c) for c in np.round(members.mean(axis=0))))
+            shares.append(float(share))
+        
+        # Suggest a tolerance covering the spread of pixels near the dominant
+        # color (Chebyshev distance matches the per-channel inRange test)
+        distance = np.abs(pixels - np.array(colors[0])).max(axis=1)
+        nearby = distance[distance <= 4 * (1 << shift)]
+        spread = int(np.percentile(nearby, 98)) if len(nearby) else 0
+        tolerance = int(np.clip(spread + (1 << shift), 10, 100))
+        
+        self.logger.debug(f"Detected background colors {colors} (shares {shares}), tolerance {tolerance}")
+        return {'colors': colors, 'shares': shares, 'tolerance': tolerance}
+    
     def remove_background_edges(self, image: Image.Image, 
                               blur_kernel: int = 5, 
                               canny_low: int = 50, 
@@ -168,75 +349,304 @@ class BackgroundRemover:
             return Image.fromarray(result_array)
             
         except Exception as e:
-            self.logger.error(f"Edge-based removal failed: {e}")
+            self.metrics.increment('failures.edges')
+            self._trace(f"Edge-based removal failed: {e}")
             return image  # Return original if edge detection fails
     
+    def remove_background_auto(self, image: Image.Image,
+                               target_color: Optional[Tuple[int, int, int]] = None,
+                               tolerance: Optional[int] = None) -> Image.Image:
+        """
+        Smart removal: AI first, then color keying, then edge detection
+        
+        Args:
+            image: PIL Image in RGBA format
+            target_color: Background key for the color step (detected if None)
+            tolerance: Color tolerance for the color step
+        
+        Returns:
+            Image with transparent background
+        """
+        # Try AI first if available
+        ai_remove = self._load_ai_model()
+        if ai_remove is not None:
+            self._trace("Auto: Trying AI method first")
+            try:
+                result = self.remove_background_ai(image)
+                # Check if AI produced good results
+                alpha_channel = np.array(result)[:, :, 3]
+                transparent_pixels = np.sum(alpha_channel == 0)
+                total_pixels = alpha_channel.size
+                
+                if transparent_pixels / total_pixels > 0.1:  # If we have significant transparency
+                    self.metrics.increment('auto.ai')
+                    self._trace("Auto: AI method produced good results")
+                    return result
+            except Exception as e:
+                self.metrics.increment('failures.auto_ai')
+                self._trace(f"Auto: AI method failed: {e}")
+        
+        # Fall back to color-based for solid backgrounds
+        self._trace("Auto: Trying color-based method")
+        try:
+            if target_color is None:
+                detected = self.detect_background_color([image], top_k=1)
+                target_color = detected['colors'][0] if detected['colors'] else (255, 255, 255)
+                if tolerance is None:
+                    tolerance = detected['tolerance']
+            result = self.remove_background_color_based(image, target_color, 40 if tolerance is None else tolerance)
+            alpha_channel = np.array(result)[:, :, 3]
+            if np.mean(alpha_channel) > 10:  # If we have some transparency
+                self.metrics.increment('auto.color')
+                self._trace("Auto: Color-based method produced good results")
+                return result
+        except Exception as e:
+            self.metrics.increment('failures.auto_color')
+            self._trace(f"Auto: Color-based method failed: {e}")
+        
+        # Final fallback to edge-based
+        self.metrics.increment('auto.edges')
+        self._trace("Auto: Using edge-based method as fallback")
+        return self.remove_background_edges(image)
+    
     def remove_background_adaptive(self, image: Image.Image, 
                                  method: str = "auto", 
                                  **kwargs) -> Image.Image:
         """
         Adaptive background removal with multiple methods
         
+        Methods are looked up in the method registry (see methods.py), so
+        methods registered by other packages work here too.
+        
         Args:
             image: PIL Image in RGBA format
-            method: Removal method ("color", "edges", "ai", "auto")
+            method: Removal method ("color", "edges", "ai", "auto" or a registered name)
             **kwargs: Additional parameters for specific methods
         
         Returns:
             Image with transparent background
         """
-        self.logger.info(f"Using {method} method for background removal")
+        spec = self.methods.get(method)
+        if spec is None:
+            self.logger.warning(f"Unknown method: {method}. Returning original image.")
+            return image
+        
+        self.metrics.increment(f'method.{method}')
+        self._trace(f"Using {method} method for background removal")
+        return spec.func(self, image, **spec.resolve_params(kwargs))
+    
+    @staticmethod
+    def _tile_starts(length: int, tile: int, overlap: int) -> List[int]:
+        """Tile origins along one axis; the last tile is aligned to the end"""
+        if length <= tile:
+            return [0]
+        starts = list(range(0, length - tile + 1, tile - overlap))
+        if starts[-1] + tile < length:
+            starts.append(length - tile)
+        return starts
+    
+    def remove_background_tiled(self, image: Image.Image, 
+                                method: str = "auto",
+                                tile_size: int = 512,
+                                tile_overlap: int = 32,
+                                tile_workers: Optional[int] = None,
+                                **kwargs) -> Image.Image:
+        """
+        Remove background from a large frame in overlapping tiles
         
-        if method == "color":
-            target_color = kwargs.get('target_color', (255, 255, 255))  # Default: white
-            tolerance = kwargs.get('tolerance', 40)
-            return self.remove_background_color_based(image, target_color, tolerance)
+        Each tile runs through the regular removal method, so per-call
+        temporaries (and AI inference memory) scale with the tile rather
+        than the frame. Tile masks are blended with linear ramps across the
+        overlaps to hide seams, and tiles run in parallel when the method
+        is thread-safe.
         
-        elif method == "edges":
-            blur_kernel = kwargs.get('blur_kernel', 5)
-            canny_low = kwargs.get('canny_low', 50)
-            canny_high = kwargs.get('canny_high', 150)
-            return self.remove_background_edges(image, blur_kernel, canny_low, canny_high)
+        Args:
+            image: PIL Image in RGBA format
+            method: Background removal method applied per tile
+            tile_size: Tile width/height in pixels
+            tile_overlap: Overlap between neighbouring tiles in pixels
+            tile_workers: Threads for tiles (default: CPU count)
+            **kwargs: Additional parameters for the removal method
         
-        elif method == "ai":
-            return self.remove_background_ai(image)
+        Returns:
+            Image with transparent background
+        """
+        tile_size = max(16, tile_size)
+        overlap = max(0, min(tile_overlap, tile_size // 2))
+        width, height = image.size
         
-        elif method == "auto":
-            # Try AI first if available
-            ai_remove = self._load_ai_model()
-            if ai_remove is not None:
-                self.logger.info("Auto: Trying AI method first")
-                try:
-                    result = self.remove_background_ai(image)
-                    # Check if AI produced good results
-                    alpha_channel = np.array(result)[:, :, 3]
-                    transparent_pixels = np.sum(alpha_channel == 0)
-                    total_pixels = alpha_channel.size
-                    
-                    if transparent_pixels / total_pixels > 0.1:  # If we have significant transparency
-                        self.logger.info("Auto: AI method produced good results")
-                        return result
-                except Exception as e:
-                    self.logger.warning(f"Auto: AI method failed: {e}")
-            
-            # Fall back to color-based for solid backgrounds
-            self.logger.info("Auto: Trying color-based method")
-            try:
-                result = self.remove_background_color_based(image, (255, 255, 255), 40)
-                alpha_channel = np.array(result)[:, :, 3]
-                if np.mean(alpha_channel) > 10:  # If we have some transparency
-                    self.logger.info("Auto: Color-based method produced good results")
-                    return result
-            except Exception as e:
-                self.logger.warning(f"Auto: Color-based method failed: {e}")
-            
-            # Final fallback to edge-based
-            self.logger.info("Auto: Using edge-based method as fallback")
-            return self.remove_background_edges(image)
+        # Key the whole frame with one color rather than one per tile
+        if method in ('color', 'auto') and kwargs.get('target_color') is None:
+            detected = self.detect_background_color([image], top_k=1)
+            if detected['colors']:
+                kwargs['target_color'] = detected['colors'][0]
+                kwargs.setdefault('tolerance', detected['tolerance'])
+        
+        boxes = [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+                 for y in self._tile_starts(height, tile_size, overlap)
+                 for x in self._tile_starts(width, tile_size, overlap)]
+        
+        def run_tile(box):
+            tile = image.crop(box)
+            return np.asarray(self.remove_background_adaptive(tile, method, **kwargs).convert('RGBA'))[:, :, 3]
         
+        spec = self.methods.get(method)
+        workers = max(1, tile_workers or os.cpu_count() or 1)
+        if workers > 1 and len(boxes) > 1 and (spec is None or spec.parallelism == "thread"):
+            with ThreadPoolExecutor(max_workers=min(workers, len(boxes))) as pool:
+                masks = list(pool.map(run_tile, boxes))
         else:
-            self.logger.warning(f"Unknown method: {method}. Returning original image.")
-            return image
+            masks = [run_tile(box) for box in boxes]
+        
+        accumulated = np.zeros((height, width), dtype=np.float32)
+        weights = np.zeros((height, width), dtype=np.float32)
+        for (x0, y0, x1, y1), mask in zip(boxes, masks):
+            # Weight ramps up across overlaps, except on the frame border
+            ramp_x = np.ones(x1 - x0, dtype=np.float32)
+            ramp_y = np.ones(y1 - y0, dtype=np.float32)
+            if overlap:
+                rise = (np.arange(overlap, dtype=np.float32) + 1) / (overlap + 1)
+                if x0 > 0:
+                    ramp_x[:overlap] = np.minimum(ramp_x[:overlap], rise[:x1 - x0])
+                if x1 < width:
+                    ramp_x[-overlap:] = np.minimum(ramp_x[-overlap:], rise[::-1][-(x1 - x0):])
+                if y0 > 0:
+                    ramp_y[:overlap] = np.minimum(ramp_y[:overlap], rise[:y1 - y0])
+                if y1 < height:
+                    ramp_y[-overlap:] = np.minimum(ramp_y[-overlap:], rise[::-1][-(y1 - y0):])
+            weight = np.outer(ramp_y, ramp_x)
+            accumulated[y0:y1, x0:x1] += mask * weight
+            weights[y0:y1, x0:x1] += weight
+        
+        result = np.array(image.convert('RGBA'))
+        result[:, :, 3] = (accumulated / np.maximum(weights, 1e-6) + 0.5).astype(np.uint8)
+        self.metrics.increment('tiles', len(boxes))
+        return Image.fromarray(result)
+    
+    @staticmethod
+    def guided_filter(guide: np.ndarray, mask: np.ndarray, radius: int, eps: float) -> np.ndarray:
+        """
+        Edge-preserving smoothing of a mask guided by a grayscale image
+        
+        The classic guided filter built from box filters only, so the cost
+        per pixel is constant regardless of the radius.
+        
+        Args:
+            guide: float32 grayscale guide in [0, 1]
+            mask: float32 mask in [0, 1]
+            radius: Window radius in pixels
+            eps: Regularization; larger values smooth across weaker edges
+        
+        Returns:
+            float32 filtered mask (not clipped)
+        """
+        window = (2 * radius + 1, 2 * radius + 1)
+        
+        def box(values):
+            return cv2.boxFilter(values, cv2.CV_32F, window, borderType=cv2.BORDER_REFLECT)
+        
+        mean_guide = box(guide)
+        mean_mask = box(mask)
+        var_guide = box(guide * guide) - mean_guide * mean_guide
+        cov = box(guide * mask) - mean_guide * mean_mask
+        
+        a = cov / (var_guide + eps)
+        b = mean_mask - a * mean_guide
+        return box(a) * guide + box(b)
+    
+    def refine_mask(self, image: Image.Image,
+                    refine_radius: Optional[int] = 4,
+                    refine_eps: float = 1e-3,
+                    morph_kernel: int = 0) -> Image.Image:
+        """
+        Smooth the hard alpha mask of a processed frame
+        
+        Optional morphological cleanup (opening to drop specks, then closing
+        to fill pinholes) followed by a guided filter with the frame itself
+        as guide, which turns aliased binary edges into soft alpha that
+        follows the image edges.
+        
+        Args:
+            image: Processed RGBA frame
+            refine_radius: Guided filter radius (0/None skips the filter)
+            refine_eps: Guided filter regularization
+            morph_kernel: Elliptical kernel size for cleanup (0 skips it)
+        
+        Returns:
+            RGBA frame with refined alpha
+        """
+        result = np.array(image.convert('RGBA'))
+        alpha = result[:, :, 3]
+        
+        if morph_kernel and morph_kernel > 1:
+            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (morph_kernel, morph_kernel))
+            alpha = cv2.morphologyEx(alpha, cv2.MORPH_OPEN, kernel)
+            alpha = cv2.morphologyEx(alpha, cv2.MORPH_CLOSE, kernel)
+        
+        # Fully opaque or fully transparent masks have no edges to refine
+        if refine_radius and alpha.min() != alpha.max():
+            guide = cv2.cvtColor(result[:, :, :3], cv2.COLOR_RGB2GRAY).astype(np.float32) / 255.0
+            refined = self.guided_filter(guide, alpha.astype(np.float32) / 255.0, refine_radius, refine_eps)
+            alpha = (np.clip(refined, 0.0, 1.0) * 255 + 0.5).astype(np.uint8)
+        
+        result[:, :, 3] = alpha
+        return Image.fromarray(result)
+    
+    def stabilize_masks(self, frames: List[Image.Image],
+                        window: int = 3,
+                        mode: str = "median",
+                        hysteresis: int = 0) -> List[Image.Image]:
+        """
+        Reduce frame-to-frame mask jitter
+        
+        Works on the stacked alpha channels of the processed frames. A
+        sliding temporal window (centered, edges repeated) replaces each
+        pixel's alpha with the median, or for "majority" the 0/255 vote, of
+        its neighbours in time. Hysteresis then keeps a pixel's previous
+        alpha unless it changes by more than the given amount, so static
+        regions end up with identical masks in consecutive frames.
+        Frames are not motion-aligned; the window should stay short for
+        fast-moving subjects.
+        
+        Args:
+            frames: Processed RGBA frames of equal size
+            window: Odd number of frames per temporal window (1 disables it)
+            mode: "median" or "majority"
+            hysteresis: Minimum alpha change that is passed through (0 disables it)
+        
+        Returns:
+            Frames with stabilized alpha
+        """
+        if mode not in ("median", "majority"):
+            raise ValueError(f"Unknown stabilization mode: {mode}")
+        if window < 1 or window % 2 == 0:
+            raise ValueError("Stabilization window must be a positive odd number")
+        if len(frames) < 2:
+            return list(frames)
+        if len({frame.size for frame in frames}) != 1:
+            raise ValueError("All frames must have the same size")
+        
+        stack = np.stack([np.array(frame.convert('RGBA')) for frame in frames])
+        alpha = stack[..., 3]
+        
+        if window > 1:
+            half = window // 2
+            padded = np.concatenate([alpha[:1].repeat(half, axis=0), alpha, alpha[-1:].repeat(half, axis=0)])
+            windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)
+            if mode == "majority":
+                votes = (windows >= 128).sum(axis=-1)
+                alpha = np.where(votes > half, 255, 0).astype(np.uint8)
+            else:
+                alpha = np.median(windows, axis=-1).astype(np.uint8)
+        
+        if hysteresis > 0:
+            alpha = alpha.copy()
+            for t in range(1, len(alpha)):
+                keep = np.abs(alpha[t].astype(np.int16) - alpha[t - 1]) <= hysteresis
+                alpha[t][keep] = alpha[t - 1][keep]
+        
+        stack[..., 3] = alpha
+        return [Image.fromarray(frame) for frame in stack]
     
     def process_frame(self, frame: Image.Image, method: str = "auto", **kwargs) -> Image.Image:
         """
@@ -245,13 +655,236 @@ class BackgroundRemover:
         Args:
             frame: PIL Image frame
             method: Background removal method
-            **kwargs: Additional parameters for the removal method
+            **kwargs: Additional parameters for the removal method; with
+                ``tile_size`` set, frames larger than one tile are processed
+                by remove_background_tiled; ``refine_radius``/``morph_kernel``
+                run refine_mask on the result; ``removal_scale`` below 1 runs
+                removal on a downscaled copy and applies the upscaled mask
+                to the full-size frame
         
         Returns:
             Processed frame with transparent background
         """
+        self.metrics.increment('frames')
+        tile_size = kwargs.pop('tile_size', None)
+        tile_overlap = kwargs.pop('tile_overlap', 32)
+        tile_workers = kwargs.pop('tile_workers', None)
+        refine = {name: kwargs.pop(name) for name in REFINE_PARAMS if name in kwargs}
+        removal_scale = kwargs.pop('removal_scale', None)
         try:
-            return self.remove_background_adaptive(frame, method, **kwargs)
+            source = frame
+            if removal_scale and removal_scale < 1:
+                size = (max(1, round(frame.width * removal_scale)), max(1, round(frame.height * removal_scale)))
+                source = frame.resize(size, Image.Resampling.BILINEAR)
+            
+            if tile_size and max(source.size) > tile_size:
+                result = self.remove_background_tiled(source, method, tile_size, tile_overlap,
+                                                      tile_workers, **kwargs)
+            else:
+                result = self.remove_background_adaptive(source, method, **kwargs)
+            
+            if source is not frame:
+                mask = np.asarray(result.convert('RGBA'))[:, :, 3]
+                mask = cv2.resize(mask, frame.size, interpolation=cv2.INTER_LINEAR)
+                full = np.array(frame.convert('RGBA'))
+                full[:, :, 3] = np.minimum(full[:, :, 3], mask)
+                result = Image.fromarray(full)
+            if refine.get('refine_radius') or refine.get('morph_kernel'):
+                result = self.refine_mask(result, **refine)
+            return result
         except Exception as e:
-            self.logger.error(f"Background removal failed: {e}")
-            return frame  # Return original frame if removal fails
\ No newline at end of file
+            self.metrics.increment('failures.frame')
+            self._trace(f"Background removal failed: {e}")
+            return frame  # Return original frame if removal fails
+    
+    def _process_chunk(self, frames: List[Image.Image], method: str, **kwargs) -> List[Image.Image]:
+        """Process a group of frames, using the method's batch path when it has one"""
+        spec = self.methods.get(method)
+        if spec is not None and spec.batchable and len(frames) > 1 \
+                and not kwargs.get('tile_size') and not kwargs.get('removal_scale') \
+                and len({frame.size for frame in frames}) == 1:
+            try:
+                results = spec.batch_func(self, frames, **spec.resolve_params(kwargs))
+                refine = {name: kwargs[name] for name in REFINE_PARAMS if name in kwargs}
+                if refine.get('refine_radius') or refine.get('morph_kernel'):
+                    results = [self.refine_mask(result, **refine) for result in results]
+                self.metrics.increment('frames', len(frames))
+                self.metrics.increment(f'method.{method}', len(frames))
+                return results
+            except Exception as e:
+                self.metrics.increment('failures.batch')
+                self._trace(f"Batch {method} removal failed, processing frames one by one: {e}")
+        return [self.process_frame(frame, method, **kwargs) for frame in frames]
+    
+    def changes_alpha(self, frames: List[Image.Image], method: str = "auto", **kwargs) -> bool:
+        """
+        Whether a removal method would change the alpha of any frame
+        
+        Used on a few sampled frames to decide if an input that already
+        looks transparent can skip removal under the chosen method and key.
+        
+        Args:
+            frames: Sampled RGBA frames
+            method: Background removal method
+            **kwargs: Additional parameters for the removal method
+        
+        Returns:
+            True if any processed frame's alpha differs from its input
+        """
+        processed = self.process_frames(frames, method, max_workers=1, **kwargs)
+        return any(not np.array_equal(np.asarray(frame.convert('RGBA'))[:, :, 3],
+                                      np.asarray(result.convert('RGBA'))[:, :, 3])
+                   for frame, result in zip(frames, processed))
+    
+    def process_frames(self, frames: List[Image.Image], 
+                       method: str = "auto",
+                       max_workers: Optional[int] = None,
+                       progress_callback=None,
+                       cancel_event=None,
+                       batch_size: Optional[int] = None,
+                       **kwargs) -> List[Image.Image]:
+        """
+        Process many frames in parallel across a thread pool
+        
+        The registered method's metadata picks the execution strategy:
+        methods marked "thread" run on a thread pool (OpenCV and NumPy
+        release the GIL, so threads scale across cores without copying
+        frames between processes), "internal"/"serial" methods run one frame
+        at a time, and batchable methods receive several frames per call.
+        Only a small window of work is queued ahead, which lets a cancel
+        request take effect between frames.
+        
+        Args:
+            frames: List of PIL Image frames
+            method: Background removal method
+            max_workers: Number of worker threads (default: CPU count)
+            progress_callback: Optional callable(done, total), called from
+                the calling thread as frames complete
+            cancel_event: Optional threading.Event; when set, pending frames
+                are dropped and ProcessingCancelled is raised
+            batch_size: Frames per call for batchable methods (default: chosen
+                so every worker gets a few batches)
+            **kwargs: Additional parameters for the removal method
+        
+        Returns:
+            List of processed frames in input order
+        """
+        total = len(frames)
+        spec = self.methods.get(method)
+        workers = max(1, min(max_workers or os.cpu_count() or 1, total or 1))
+        if spec is not None and spec.parallelism != "thread":
+            workers = 1
+        
+        if spec is not None and spec.batchable:
+            chunk = batch_size or max(1, min(16, total // (workers * 4) or 1))
+        else:
+            chunk = 1
+        chunks = [(start, frames[start:start + chunk]) for start in range(0, total, chunk)]
+        
+        if workers > 1 and kwargs.get('tile_size'):
+            # Frames already run in parallel; don't nest a tile pool per frame
+            kwargs.setdefault('tile_workers', 1)
+        
+        results = [None] * total
+        done_count = 0
+        
+        if workers == 1:
+            for start, group in chunks:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ProcessingCancelled(f"Cancelled after {done_count}/{total} frames")
+                results[start:start + len(group)] = self._process_chunk(group, method, **kwargs)
+                done_count += len(group)
+                if progress_callback is not None:
+                    progress_callback(done_count, total)
+            return results
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = {}
+            next_chunk = 0
+            
+            def fill():
+                nonlocal next_chunk
+                while next_chunk < len(chunks) and len(pending) < workers * 2:
+                    start, group = chunks[next_chunk]
+                    future = pool.submit(self._process_chunk, group, method, **kwargs)
+                    pending[future] = (start, len(group))
+                    next_chunk += 1
+            
+            fill()
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    start, count = pending.pop(future)
+                    results[start:start + count] = future.result()
+                    done_count += count
+                    if progress_callback is not None:
+                        progress_callback(done_count, total)
+                
+                if cancel_event is not None and cancel_event.is_set():
+                    for future in pending:
+                        future.cancel()
+                    raise ProcessingCancelled(f"Cancelled after {done_count}/{total} frames")
+                fill()
+        
+        return results
+    
+    def process_frames_fast(self, frames: List[Image.Image], 
+                            durations: List[int],
+                            method: str = "auto",
+                            keyframe_interval: int = 2,
+                            skip_mode: str = "interpolate",
+                            **kwargs) -> Tuple[List[Image.Image], List[int]]:
+        """
+        Fast mode: run background removal on keyframes only
+        
+        Every ``keyframe_interval``-th frame (and the last frame) is processed
+        with the full removal method. Skipped frames either get a mask derived
+        from the neighbouring keyframes or are dropped with their durations
+        merged into the preceding keyframe, so total playback time is unchanged.
+        
+        Args:
+            frames: List of PIL Image frames in RGBA format
+            durations: Frame durations in milliseconds
+            method: Background removal method used on keyframes
+            keyframe_interval: Distance between keyframes (1 = every frame)
+            skip_mode: "reuse" (previous keyframe mask), "interpolate"
+                (blend of surrounding keyframe masks) or "drop"
+            **kwargs: Passed to process_frames (e.g. max_workers, method parameters)
+        
+        Returns:
+            Tuple of (processed frames, durations)
+        """
+        if skip_mode not in ("reuse", "interpolate", "drop"):
+            raise ValueError(f"Unknown skip mode: {skip_mode}")
+        if len(frames) != len(durations):
+            raise ValueError("Frames and durations lists must have same length")
+        
+        interval = max(1, keyframe_interval)
+        keyframes = list(range(0, len(frames), interval))
+        if frames and keyframes[-1] != len(frames) - 1 and skip_mode != "drop":
+            keyframes.append(len(frames) - 1)
+        
+        processed_keys = self.process_frames([frames[i] for i in keyframes], method, **kwargs)
+        
+        if skip_mode == "drop":
+            # Each keyframe absorbs the durations of the frames it replaces
+            merged = [sum(durations[k:k + interval]) for k in keyframes]
+            return processed_keys, merged
+        
+        masks = {k: np.asarray(result.convert('RGBA'))[:, :, 3] 
+                 for k, result in zip(keyframes, processed_keys)}
+        results = dict(zip(keyframes, processed_keys))
+        
+        for prev_key, next_key in zip(keyframes, keyframes[1:]):
+            for i in range(prev_key + 1, next_key):
+                if skip_mode == "reuse":
+                    mask = masks[prev_key]
+                else:
+                    weight = (i - prev_key) / (next_key - prev_key)
+                    mask = ((1 - weight) * masks[prev_key] + weight * masks[next_key] + 0.5).astype(np.uint8)
+                
+                frame_array = np.array(frames[i].convert('RGBA'))
+                frame_array[:, :, 3] = np.minimum(frame_array[:, :, 3], mask)
+                results[i] = Image.fromarray(frame_array)
+        
+        return [results[i] for i in range(len(frames))], list(durations)
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from PIL import Image
+
+# Remove relative imports, use direct imports
+try:
+    from gif_processor import GIFProcessor, OUTPUT_SUFFIXES
+    from background_remover import BackgroundRemover
+    from utils import setup_logging, create_output_path
+except ImportError:
+    # Fallback for when running as main
+    from .gif_processor import GIFProcessor, OUTPUT_SUFFIXES
+    from .background_remover import BackgroundRemover
+    from .utils import setup_logging, create_output_path
+
+def file_sha256(path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def settings_key(settings: dict) -> str:
+    """Stable short hash of processing settings"""
+    encoded = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()[:16]
+
+def can_copy_unchanged(processor: GIFProcessor, remover: BackgroundRemover,
+                       input_path, method: str = "auto", **kwargs) -> bool:
+    """Whether an input is already transparent and the method would not change its sampled alpha"""
+    check = processor.check_transparency(input_path)
+    return check['can_copy'] and not remover.changes_alpha(check['samples'], method, **kwargs)
+
+def _atomic_replace(tmp_path: Path, final_path: Path) -> None:
+    """Move a finished temporary file into place"""
+    os.replace(str(tmp_path), str(final_path))
+
+class JobJournal:
+    """
+    Append-only JSON-lines record of finished batch outputs
+
+    Each line records the input hash, settings key and output path of one
+    completed file; all three must match for a file to count as done.
+    Lines are flushed and fsynced as they are written, so a crash loses at
+    most the file that was being processed.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._done = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Partially written last line
+                    if entry.get('status') == 'done':
+                        self._done.setdefault((entry['input_hash'], entry['settings']), set()).add(entry['output'])
+
+    def is_done(self, input_hash: str, key: str, output_path) -> bool:
+        """Whether this output is recorded as finished and still exists"""
+        return str(output_path) in self._done.get((input_hash, key), ()) and Path(output_path).exists()
+
+    def mark_done(self, input_path, input_hash: str, key: str, output_path) -> None:
+        entry = {
+            'status': 'done',
+            'input': str(input_path),
+            'input_hash': input_hash,
+            'settings': key,
+            'output': str(output_path),
+            'time': time.time()
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._done.setdefault((input_hash, key), set()).add(str(output_path))
+
+class FrameCheckpoint:
+    """
+    Per-frame results of one long GIF, stored as lossless PNGs
+
+    Frames are written atomically, so after a restart every file present is
+    a complete frame and only the missing indices need to be recomputed.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def _frame_path(self, index: int) -> Path:
+        return self.directory / f"frame_{index:06d}.png"
+
+    def completed(self) -> Dict[int, Path]:
+        if not self.directory.exists():
+            return {}
+        return {int(p.stem.split('_')[1]): p for p in self.directory.glob('frame_*.png')}
+
+    def save(self, index: int, frame: Image.Image) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        final_path = self._frame_path(index)
+        tmp_path = final_path.with_suffix('.tmp')
+        frame.save(tmp_path, format='PNG', compress_level=1)
+        _atomic_replace(tmp_path, final_path)
+
+    def load(self, index: int) -> Image.Image:
+        with Image.open(self._frame_path(index)) as frame:
+            return frame.convert('RGBA')
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+class BatchRunner:
+    """
+    Resumable batch processing of many GIFs
+
+    Finished outputs are recorded in a JobJournal keyed by input hash and
+    settings, so a restarted run skips them. GIFs with at least
+    ``checkpoint_min_frames`` frames are processed in chunks whose frames
+    are checkpointed, so an interrupted long GIF resumes where it stopped.
+    Inputs that already have a transparent background (such as outputs of
+    an earlier run) are copied instead of reprocessed unless
+    ``skip_transparent`` is False.
+    """
+
+    def __init__(self, journal_path,
+                 checkpoint_dir=None,
+                 processor: Optional[GIFProcessor] = None,
+                 remover: Optional[BackgroundRemover] = None,
+                 checkpoint_min_frames: int = 100,
+                 chunk_size: int = 32,
+                 max_workers: Optional[int] = None,
+                 skip_transparent: bool = True,
+                 log_level=logging.INFO):
+        self.logger = setup_logging('BatchRunner', log_level)
+        self.journal = JobJournal(journal_path)
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else \
+            Path(journal_path).parent / '.gif_bg_checkpoints'
+        self.processor = processor or GIFProcessor(log_level=log_level)
+        self.remover = remover or BackgroundRemover(log_level=log_level)
+        self.checkpoint_min_frames = checkpoint_min_frames
+        self.chunk_size = max(1, chunk_size)
+        self.max_workers = max_workers
+        self.skip_transparent = skip_transparent
+
+    def output_path_for(self, input_path, output_dir=None, suffix: str = "_nobg",
+                        output_format: str = "gif") -> Path:
+        output_path = create_output_path(input_path, suffix).with_suffix(OUTPUT_SUFFIXES[output_format])
+        if output_dir is not None:
+            output_path = Path(output_dir) / output_path.name
+        return output_path
+
+    def run(self, inputs: Iterable, output_dir=None, suffix: str = "_nobg",
+            method: str = "auto", output_format: str = "gif", preset: str = "balanced",
+            **kwargs) -> dict:
+        """
+        Process every input, skipping ones already recorded as done
+
+        Args:
+            inputs: GIF file paths
+            output_dir: Directory for outputs (default: next to each input)
+            suffix: Suffix added to output file names
+            method: Background removal method
+            output_format: 'gif', 'webp' or 'apng'
+            preset: Encoder preset, one of ENCODER_PRESETS
+            **kwargs: Additional parameters for the removal method
+
+        Returns:
+            Dictionary with 'processed', 'skipped' and 'failed' path lists
+        """
+        # Decode-time resizing and limits change the output too, so they are part of the key
+        decode = dict(self.processor.limits, scale=self.processor.scale,
+                      max_size=self.processor.max_size, max_fps=self.processor.max_fps)
+        settings = dict(kwargs, method=method, output_format=output_format, preset=preset, suffix=suffix,
+                        decode=decode)
+        key = settings_key(settings)
+        stats = {'processed': [], 'skipped': [], 'failed': []}
+
+        for input_path in inputs:
+            input_hash = file_sha256(input_path)
+            output_path = self.output_path_for(input_path, output_dir, suffix, output_format)
+            if self.journal.is_done(input_hash, key, output_path):
+                self.logger.debug(f"Skipping {input_path}: already processed as {output_path}")
+                stats['skipped'].append(str(input_path))
+                continue
+
+            try:
+                self.process_one(input_path, output_path, input_hash, key, method,
+                                 output_format, preset, **kwargs)
+                self.journal.mark_done(input_path, input_hash, key, output_path)
+                stats['processed'].append(str(input_path))
+            except Exception as e:
+                self.logger.error(f"❌ Failed to process {input_path}: {e}")
+                stats['failed'].append(str(input_path))
+
+        self.logger.info(f"✅ Batch finished: {len(stats['processed'])} processed, "
+                         f"{len(stats['skipped'])} skipped, {len(stats['failed'])} failed")
+        return stats
+
+    def process_one(self, input_path, output_path, input_hash: str, key: str,
+                    method: str = "auto", output_format: str = "gif", preset: str = "balanced",
+                    **kwargs) -> None:
+        """Process a single GIF, checkpointing frames if it is long"""
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_name(output_path.name + '.part')
+
+        if (self.skip_transparent and output_format == 'gif'
+                and can_copy_unchanged(self.processor, self.remover, input_path, method, **kwargs)):
+            self.logger.info(f"⏭️  {input_path} already has a transparent background; copying it unchanged")
+            shutil.copyfile(input_path, tmp_path)
+            _atomic_replace(tmp_path, output_path)
+            return
+
+        frames, durations = self.processor.extract_frames(input_path)
+
+        if method in ('color', 'auto') and kwargs.get('target_color') is None:
+            detected = self.remover.detect_background_color(frames)
+            if detected['colors']:
+                kwargs['target_color'] = detected['colors'][0]
+                kwargs.setdefault('tolerance', detected['tolerance'])
+
+        if len(frames) >= self.checkpoint_min_frames:
+            checkpoint = FrameCheckpoint(self.checkpoint_dir / f"{input_hash[:16]}_{key}_{Path(output_path).stem}")
+            processed = self._process_with_checkpoint(frames, checkpoint, method, **kwargs)
+        else:
+            checkpoint = None
+            processed = self.remover.process_frames(frames, method, max_workers=self.max_workers, **kwargs)
+
+        # Write to a temporary name so a crash never leaves a truncated output
+        with open(tmp_path, 'wb') as f:
+            self.processor.save_animation(processed, durations, f, output_format=output_format,
+                                          preset=preset, max_workers=self.max_workers)
+        _atomic_replace(tmp_path, output_path)
+
+        if checkpoint is not None:
+            checkpoint.clear()
+
+    def _process_with_checkpoint(self, frames: List[Image.Image], checkpoint: FrameCheckpoint,
+                                 method: str, **kwargs) -> List[Image.Image]:
+        results = {index: checkpoint.load(index) for index in checkpoint.completed() if index < len(frames)}
+        remaining = [i for i in range(len(frames)) if i not in results]
+        if results:
+            self.logger.info(f"Resuming from checkpoint: {len(results)}/{len(frames)} frames already done")
+
+        for start in range(0, len(remaining), self.chunk_size):
+            indices = remaining[start:start + self.chunk_size]
+            chunk = self.remover.process_frames([frames[i] for i in indices], method,
+                                                max_workers=self.max_workers, **kwargs)
+            for index, frame in zip(indices, chunk):
+                checkpoint.save(index, frame)
+                results[index] = frame
+
+        return [results[i] for i in range(len(frames))]
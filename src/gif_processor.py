@@ -1,9 +1,17 @@
+import hashlib
+import io
+import json
+import math
 import os
-from PIL import Image, ImageSequence
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageSequence, features
 import numpy as np
+import cv2
 from pathlib import Path
 import logging
-from typing import List, Tuple, Optional
+from typing import BinaryIO, Iterator, List, Tuple, Optional, Union
+from collections import OrderedDict
 
 # Remove relative imports, use direct imports
 try:
@@ -12,61 +20,395 @@ except ImportError:
     # Fallback for when running as main
     from .utils import validate_gif, setup_logging
 
+# A GIF can be given as a filesystem path, raw bytes or a binary file object
+GIFSource = Union[str, os.PathLike, bytes, bytearray, BinaryIO]
+
+# Video clips are decoded with OpenCV instead of Pillow
+VIDEO_EXTENSIONS = ('.mp4', '.webm', '.mov', '.mkv', '.avi', '.m4v')
+
+# Animated output formats; WebP and APNG keep full 8-bit alpha
+OUTPUT_FORMATS = ('gif', 'webp', 'apng')
+FORMAT_EXTENSIONS = {'.gif': 'gif', '.webp': 'webp', '.png': 'apng', '.apng': 'apng'}
+OUTPUT_SUFFIXES = {'gif': '.gif', 'webp': '.webp', 'apng': '.png'}
+
+# Encoder settings per speed/quality preset
+ENCODER_PRESETS = {
+    'fast': {'gif': {'optimize': False},
+             'webp': {'quality': 75, 'method': 0},
+             'apng': {'compress_level': 1}},
+    'balanced': {'gif': {'optimize': True},
+                 'webp': {'quality': 85, 'method': 4},
+                 'apng': {'compress_level': 6}},
+    'best': {'gif': {'optimize': True},
+             'webp': {'quality': 95, 'method': 6},
+             'apng': {'compress_level': 9, 'optimize': True}},
+}
+
 class GIFProcessor:
     """
     Handles GIF frame extraction and reconstruction
     """
     
-    def __init__(self, log_level=logging.INFO):
+    def __init__(self, log_level=logging.INFO, cache_size: int = 0,
+                 max_dimension: Optional[int] = None,
+                 max_frames: Optional[int] = None,
+                 max_pixels: Optional[int] = None,
+                 max_size: Optional[int] = None,
+                 scale: Optional[float] = None,
+                 max_fps: Optional[float] = None):
         self.logger = setup_logging('GIFProcessor', log_level)  # Fixed: pass name and level separately
+        # Inputs exceeding these limits are rejected before any decoding
+        self.limits = {'max_dimension': max_dimension, 'max_frames': max_frames, 'max_pixels': max_pixels}
+        # Decoded frames are resized right away so every later stage works on the smaller frames
+        self.max_size = max_size
+        self.scale = scale
+        # Video inputs are decimated to at most this frame rate
+        self.max_fps = max_fps
+        # Decoded frames of the most recently used GIFs, keyed by path and
+        # modification time (0 disables caching)
+        self.cache_size = cache_size
+        self._frame_cache = OrderedDict()
+    
+    def _resolve_source(self, source: GIFSource, validate: bool = True):
+        """
+        Turn a GIF source into something Image.open accepts
+        
+        File objects are read into memory. Unless ``validate`` is False the
+        GIF header, block structure and size limits are checked first.
+        """
+        if hasattr(source, 'read'):
+            source = source.read()
+        if validate:
+            is_valid, error_msg = validate_gif(source, **self.limits)
+            if not is_valid:
+                raise ValueError(error_msg)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return io.BytesIO(source)
+        return source
+    
+    @staticmethod
+    def _describe(target) -> str:
+        """Short label for a path, bytes or stream in log messages"""
+        if isinstance(target, (bytes, bytearray, memoryview)):
+            return f"<{len(target)} bytes>"
+        if hasattr(target, 'read') or hasattr(target, 'write'):
+            return getattr(target, 'name', '<stream>')
+        return str(target)
+    
+    def target_size(self, size: Tuple[int, int]) -> Tuple[int, int]:
+        """Frame size after applying ``scale`` and then the ``max_size`` bound"""
+        width, height = size
+        factor = self.scale or 1.0
+        if self.max_size:
+            factor = min(factor, self.max_size / max(width, height))
+        if factor >= 1.0 and not self.scale:
+            return size  # max_size only ever shrinks
+        return max(1, round(width * factor)), max(1, round(height * factor))
+    
+    def resize_frame(self, frame: Image.Image) -> Image.Image:
+        """Resize a decoded RGBA frame to target_size with Lanczos resampling"""
+        size = self.target_size(frame.size)
+        if size == frame.size:
+            return frame
+        # Pillow resamples RGBA with premultiplied alpha, so transparent
+        # pixels don't bleed their color into the edges
+        return frame.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    
+    @staticmethod
+    def is_video(source) -> bool:
+        """Whether a source is a video file path (by extension)"""
+        return isinstance(source, (str, os.PathLike)) and Path(source).suffix.lower() in VIDEO_EXTENSIONS
+    
+    def _open_video(self, video_path) -> Tuple[cv2.VideoCapture, float]:
+        """Open a video and check it against the size limits"""
+        if not Path(video_path).exists():
+            raise ValueError(f"File not found: {video_path}")
+        capture = cv2.VideoCapture(str(video_path))
+        if not capture.isOpened():
+            raise ValueError(f"Could not open video: {video_path}")
+        
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        if self.max_fps and self.max_fps < fps:
+            frame_count = int(frame_count * self.max_fps / fps + 1)
+        
+        max_dimension, max_frames, max_pixels = (self.limits['max_dimension'], self.limits['max_frames'],
+                                                 self.limits['max_pixels'])
+        error = None
+        if max_dimension and max(width, height) > max_dimension:
+            error = f"Video too large: {width}x{height} exceeds {max_dimension}px ({video_path})"
+        elif max_frames and frame_count > max_frames:
+            error = f"Too many frames: {frame_count} exceeds {max_frames} ({video_path})"
+        elif max_pixels and width * height * frame_count > max_pixels:
+            error = f"Decoded size {width * height * frame_count} pixels exceeds budget of {max_pixels} ({video_path})"
+        if error:
+            capture.release()
+            raise ValueError(error)
+        return capture, fps
+    
+    def iter_video_frames(self, video_path) -> Iterator[Tuple[Image.Image, int]]:
+        """
+        Stream frames from a video clip (MP4, WebM, ...) via OpenCV
+        
+        Durations come from the clip's frame rate. With ``max_fps`` set,
+        frames are dropped evenly and each kept frame lasts until the next
+        one, so total playback time is unchanged.
+        
+        Yields:
+            Tuples of (RGBA frame, duration in milliseconds)
+        """
+        capture, fps = self._open_video(video_path)
+        step = fps / self.max_fps if self.max_fps and self.max_fps < fps else 1.0
+        
+        def timestamp(index):
+            # Rounded cumulative times, so durations never drift
+            return int(round(index * 1000.0 / fps))
+        
+        try:
+            pending = None  # (frame, source index) waiting for its duration
+            next_keep = 0.0
+            index = 0
+            while True:
+                ok, bgr = capture.read()
+                if not ok:
+                    break
+                if index >= next_keep - 1e-9:
+                    next_keep += step
+                    frame = self.resize_frame(Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGBA)))
+                    if pending is not None:
+                        yield pending[0], timestamp(index) - timestamp(pending[1])
+                    pending = (frame, index)
+                index += 1
+            if pending is not None:
+                yield pending[0], timestamp(index) - timestamp(pending[1])
+        finally:
+            capture.release()
     
-    def extract_frames(self, gif_path: str) -> Tuple[List[Image.Image], List[int]]:
+    def extract_frames(self, gif_path: GIFSource) -> Tuple[List[Image.Image], List[int]]:
         """
         Extract all frames from GIF with their durations
         
+        Args:
+            gif_path: File path, GIF bytes or a binary file object; video
+                file paths are decoded with iter_video_frames
+        
         Returns:
             Tuple of (frames, durations)
         """
-        is_valid, error_msg = validate_gif(gif_path)
-        if not is_valid:
-            raise ValueError(error_msg)
+        if self.is_video(gif_path):
+            frames, durations = [], []
+            for frame, duration in self.iter_video_frames(gif_path):
+                frames.append(frame)
+                durations.append(duration)
+            self.logger.info(f"✅ Extracted {len(frames)} frames from video {gif_path}")
+            return frames, durations
+        
+        source = self._resolve_source(gif_path)
+        
+        cache_key = None
+        if self.cache_size > 0 and source is gif_path:
+            stat = os.stat(gif_path)
+            cache_key = (os.path.abspath(gif_path), stat.st_mtime_ns, stat.st_size)
+            if cache_key in self._frame_cache:
+                self._frame_cache.move_to_end(cache_key)
+                frames, durations = self._frame_cache[cache_key]
+                self.logger.debug(f"Using cached frames for {gif_path}")
+                return list(frames), list(durations)
         
         try:
-            with Image.open(gif_path) as gif:
+            with Image.open(source) as gif:
                 frames = []
                 durations = []
                 
                 for frame in ImageSequence.Iterator(gif):
                     # Convert to RGBA to ensure transparency support
-                    rgba_frame = frame.convert('RGBA')
+                    rgba_frame = self.resize_frame(frame.convert('RGBA'))
                     frames.append(rgba_frame)
                     
                     # Get frame duration (default to 100ms if not specified)
                     duration = frame.info.get('duration', 100)
                     durations.append(duration)
                 
-                self.logger.info(f"✅ Extracted {len(frames)} frames from {gif_path}")
+                self.logger.info(f"✅ Extracted {len(frames)} frames from {self._describe(gif_path)}")
+                
+                if cache_key is not None:
+                    self._frame_cache[cache_key] = (frames, durations)
+                    while len(self._frame_cache) > self.cache_size:
+                        self._frame_cache.popitem(last=False)
+                    return list(frames), list(durations)
                 return frames, durations
                 
         except Exception as e:
-            self.logger.error(f"❌ Failed to extract frames from {gif_path}: {str(e)}")
+            self.logger.error(f"❌ Failed to extract frames from {self._describe(gif_path)}: {str(e)}")
             raise
     
+    def iter_frames(self, gif_path: GIFSource) -> Iterator[Tuple[Image.Image, int]]:
+        """
+        Stream frames from a GIF one at a time
+        
+        Unlike extract_frames, only the current frame is held in memory,
+        so decoding can overlap with downstream processing.
+        
+        Yields:
+            Tuples of (RGBA frame, duration in milliseconds)
+        """
+        if self.is_video(gif_path):
+            yield from self.iter_video_frames(gif_path)
+            return
+        with Image.open(self._resolve_source(gif_path)) as gif:
+            for frame in ImageSequence.Iterator(gif):
+                yield self.resize_frame(frame.convert('RGBA')), frame.info.get('duration', 100)
+    
+    def quantize_frame(self, frame: Image.Image, colors: int = 255,
+                       dither: bool = False,
+                       alpha_threshold: int = 128,
+                       method: Optional[Image.Quantize] = None) -> Image.Image:
+        """
+        Convert an RGBA frame to a GIF-ready palette image
+        
+        Opaque pixels are quantized to at most ``colors`` palette entries and
+        pixels with alpha below ``alpha_threshold`` are mapped to one extra
+        reserved index, recorded in ``info['transparency']``. Frames prepared
+        this way are written by create_gif without any further quantization.
+        
+        Args:
+            frame: PIL Image frame (RGBA)
+            colors: Number of palette colors for opaque pixels (max 255)
+            dither: Whether to apply Floyd-Steinberg dithering
+            alpha_threshold: Alpha below this value becomes transparent
+            method: Pillow quantizer (default: median cut; FASTOCTREE is
+                much faster at a small quality cost)
+        
+        Returns:
+            Palette ('P') image with a transparency index
+        """
+        colors = max(1, min(255, colors))
+        rgba = frame.convert('RGBA')
+        alpha = np.asarray(rgba)[:, :, 3]
+        
+        rgb = rgba.convert('RGB')
+        paletted = rgb.quantize(colors=colors, method=method, dither=Image.Dither.NONE)
+        if dither:
+            # Pillow only dithers when remapping onto a given palette
+            palette_image = Image.new('P', (1, 1))
+            palette_image.putpalette(paletted.getpalette()[:colors * 3])
+            paletted = rgb.quantize(palette=palette_image, dither=Image.Dither.FLOYDSTEINBERG)
+        
+        indices = np.array(paletted)
+        indices[alpha < alpha_threshold] = colors
+        
+        palette = paletted.getpalette()[:colors * 3]
+        palette += [0] * (colors * 3 - len(palette))
+        result = Image.fromarray(indices, 'P')
+        result.putpalette(palette + [0, 0, 0])
+        result.info['transparency'] = colors
+        return result
+    
+    @staticmethod
+    def _is_quantized(frame: Image.Image) -> bool:
+        return frame.mode == 'P' and 'transparency' in frame.info
+    
+    def quantize_frames(self, frames: List[Image.Image],
+                        colors: int = 255,
+                        dither: bool = False,
+                        max_workers: Optional[int] = None,
+                        method: Optional[Image.Quantize] = None) -> List[Image.Image]:
+        """
+        Run quantize_frame over many frames in parallel
+        
+        Pillow releases the GIL while quantizing, so a thread pool scales
+        with the number of cores. Frames that are already quantized are
+        passed through; order is preserved.
+        """
+        def quantize(frame):
+            if self._is_quantized(frame):
+                return frame
+            return self.quantize_frame(frame, colors, dither, method=method)
+        
+        workers = max(1, min(len(frames), max_workers or os.cpu_count() or 1))
+        if workers == 1:
+            return [quantize(frame) for frame in frames]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(quantize, frames))
+    
+    @staticmethod
+    def _frame_blocks(frame: Image.Image, duration: int) -> bytes:
+        """
+        Encode one quantized frame to the GIF blocks of an animation frame
+        
+        Only the palette entries the frame uses are kept, in a local color
+        table padded to the next power of two, and the LZW minimum code size
+        matches that table. Pillow's GIF encoder does the LZW work (it always
+        writes 8-bit codes when saving, hence the direct call), so the
+        blocks can be spliced into any animation.
+        """
+        indices = np.asarray(frame)
+        transparency = frame.info['transparency']
+        used = np.union1d(np.unique(indices), [transparency])
+        lookup = np.zeros(256, dtype=np.uint8)
+        lookup[used] = np.arange(len(used))
+        
+        table_bits = max(1, (len(used) - 1).bit_length())
+        code_size = max(2, table_bits)  # GIF requires at least 2
+        source_palette = np.zeros((256, 3), dtype=np.uint8)
+        entries = np.array(frame.getpalette() or [], dtype=np.uint8).reshape(-1, 3)[:256]
+        source_palette[:len(entries)] = entries
+        palette = np.zeros((1 << table_bits, 3), dtype=np.uint8)
+        palette[:len(used)] = source_palette[used]
+        
+        compact = Image.fromarray(lookup[indices], 'P')
+        image_data = bytes([code_size]) + compact.tobytes('gif', 'P', code_size, 0) + b'\0'
+        
+        width, height = frame.size
+        descriptor = struct.pack('<BHHHHB', 0x2C, 0, 0, width, height, 0x80 | (table_bits - 1))
+        # Graphic control: restore to background (disposal 2) with the transparent index
+        control = struct.pack('<4BHBB', 0x21, 0xF9, 4, (2 << 2) | 1,
+                              int(round(duration / 10)), int(lookup[transparency]), 0)
+        return control + descriptor + palette.tobytes() + image_data
+    
+    def _write_spliced_gif(self, frames: List[Image.Image], durations: List[int],
+                           output_path, loop: int, max_workers: Optional[int]) -> None:
+        """LZW-encode quantized frames in parallel and concatenate their blocks"""
+        workers = max(1, min(len(frames), max_workers or os.cpu_count() or 1))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            blocks = list(executor.map(self._frame_blocks, frames, durations))
+        
+        width, height = frames[0].size
+        header = b'GIF89a' + struct.pack('<HHBBB', width, height, 0, 0, 0)
+        header += b'\x21\xFF\x0BNETSCAPE2.0' + struct.pack('<BBHB', 3, 1, loop, 0)
+        content = header + b''.join(blocks) + b'\x3B'
+        
+        if hasattr(output_path, 'write'):
+            output_path.write(content)
+        else:
+            Path(output_path).write_bytes(content)
+    
     def create_gif(self, 
                    frames: List[Image.Image], 
                    durations: List[int], 
-                   output_path: str,
+                   output_path: Union[str, os.PathLike, BinaryIO],
                    optimize: bool = True,
-                   loop: int = 0) -> None:
+                   loop: int = 0,
+                   max_workers: Optional[int] = None,
+                   parallel_encode: bool = False) -> None:
         """
         Create a GIF from processed frames
         
+        Frames that aren't quantized yet are quantized in parallel first
+        (fast octree, like Pillow's own RGBA conversion), so the final write
+        only has to assemble palette images.
+        
         Args:
             frames: List of PIL Image objects
             durations: List of frame durations in milliseconds
-            output_path: Output file path
+            output_path: Output file path or writable binary file object
             optimize: Whether to optimize the GIF
             loop: Number of loops (0 = infinite)
+            max_workers: Threads for quantization/encoding (default: CPU count)
+            parallel_encode: Also LZW-encode frames in parallel and splice
+                the blocks together (skips Pillow's inter-frame optimization)
         """
         try:
             if not frames:
@@ -75,33 +417,380 @@ class GIFProcessor:
             if len(frames) != len(durations):
                 raise ValueError("Frames and durations lists must have same length")
             
-            # Save first frame and append subsequent frames
-            first_frame = frames[0]
-            remaining_frames = frames[1:]
+            if not all(self._is_quantized(frame) for frame in frames):
+                frames = self.quantize_frames(frames, max_workers=max_workers,
+                                              method=Image.Quantize.FASTOCTREE)
+            
+            if parallel_encode:
+                self._write_spliced_gif(frames, durations, output_path, loop, max_workers)
+            else:
+                # Pillow's palette optimization drops the reserved transparent
+                # entry from frames that don't use it, which breaks disposal
+                # for the frames after them, so it is only kept when safe
+                if optimize:
+                    optimize = all((np.asarray(frame) == frame.info['transparency']).any() for frame in frames)
+                
+                # Cheap sequential write; each frame replaces the previous one
+                # so old pixels don't show through
+                frames[0].save(
+                    output_path,
+                    format='GIF',
+                    save_all=True,
+                    append_images=frames[1:],
+                    duration=durations,
+                    loop=loop,
+                    optimize=optimize,
+                    transparency=frames[0].info['transparency'],
+                    disposal=2
+                )
+            
+            self.logger.info(f"✅ Created GIF with {len(frames)} frames: {self._describe(output_path)}")
+            
+        except Exception as e:
+            self.logger.error(f"❌ Failed to create GIF {self._describe(output_path)}: {str(e)}")
+            raise
+    
+    def encode_gif(self, 
+                   frames: List[Image.Image], 
+                   durations: List[int],
+                   optimize: bool = True,
+                   loop: int = 0) -> bytes:
+        """
+        Encode processed frames to GIF bytes in memory
+        
+        Returns:
+            The encoded GIF file contents
+        """
+        buffer = io.BytesIO()
+        self.create_gif(frames, durations, buffer, optimize=optimize, loop=loop)
+        return buffer.getvalue()
+    
+    def trim_frames(self, frames: List[Image.Image],
+                    padding: int = 0,
+                    alpha_threshold: int = 0) -> Tuple[List[Image.Image], Tuple[int, int, int, int]]:
+        """
+        Crop the whole animation to the union bounding box of visible pixels
+        
+        The box is computed once over the stacked alpha channels, so every
+        frame keeps the same size and position relative to the others.
+        
+        Args:
+            frames: Processed RGBA frames of equal size
+            padding: Transparent margin kept around the box (clamped to the frame)
+            alpha_threshold: Pixels with alpha above this value count as visible
+        
+        Returns:
+            Tuple of (cropped frames, (left, top, right, bottom) box); frames
+            are returned unchanged when nothing is visible
+        """
+        if not frames:
+            return [], (0, 0, 0, 0)
+        width, height = frames[0].size
+        if any(frame.size != (width, height) for frame in frames):
+            raise ValueError("All frames must have the same size")
+        
+        alpha = np.stack([np.asarray(frame.convert('RGBA'))[:, :, 3] for frame in frames])
+        visible = (alpha > alpha_threshold).any(axis=0)
+        rows = np.flatnonzero(visible.any(axis=1))
+        cols = np.flatnonzero(visible.any(axis=0))
+        if rows.size == 0:
+            return list(frames), (0, 0, width, height)
+        
+        box = (max(0, int(cols[0]) - padding), max(0, int(rows[0]) - padding),
+               min(width, int(cols[-1]) + 1 + padding), min(height, int(rows[-1]) + 1 + padding))
+        if box == (0, 0, width, height):
+            return list(frames), box
+        
+        self.logger.debug(f"Trimming {width}x{height} frames to box {box}")
+        return [frame.crop(box) for frame in frames], box
+    
+    @staticmethod
+    def _shelf_pack(sizes: List[Tuple[int, int]], padding: int,
+                    max_width: Optional[int] = None) -> Tuple[List[Tuple[int, int]], Tuple[int, int]]:
+        """
+        Place rectangles on horizontal shelves, tallest first
+        
+        Returns:
+            Tuple of (top-left position per size, (sheet width, sheet height))
+        """
+        if not sizes:
+            return [], (1, 1)
+        area = sum((w + padding) * (h + padding) for w, h in sizes)
+        width = max_width or max(int(math.ceil(math.sqrt(area) * 1.1)), 1)
+        width = max(width, max(w for w, _ in sizes) + padding)
+        
+        positions = [None] * len(sizes)
+        x = y = shelf_height = 0
+        for index in sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0])):
+            w, h = sizes[index]
+            if x + w + padding > width and x > 0:
+                # Start a new shelf below the current one
+                y += shelf_height
+                x = shelf_height = 0
+            positions[index] = (x, y)
+            x += w + padding
+            shelf_height = max(shelf_height, h + padding)
+        
+        used_width = max(px + w for (px, _), (w, _) in zip(positions, sizes))
+        return positions, (max(1, used_width), max(1, y + shelf_height - padding))
+    
+    def create_sprite_sheet(self, frames: List[Image.Image],
+                            durations: List[int],
+                            output_path: Union[str, os.PathLike, BinaryIO],
+                            padding: int = 1,
+                            max_width: Optional[int] = None) -> dict:
+        """
+        Pack processed frames into one RGBA PNG atlas
+        
+        Each frame is trimmed to its own visible pixels, identical trimmed
+        frames share one rectangle, and the unique sprites are placed with a
+        shelf packer. Works on the in-memory frames, so the output never has
+        to be decoded again.
+        
+        Args:
+            frames: Processed RGBA frames
+            durations: Frame durations in milliseconds
+            output_path: Output PNG path or writable binary file object
+            padding: Transparent gap between sprites in pixels
+            max_width: Maximum sheet width (default: roughly square)
+        
+        Returns:
+            Manifest dict: 'size', 'source_size' and per frame 'rect'
+            [x, y, w, h] in the sheet, 'offset' [x, y] of the trimmed sprite
+            within the original frame, and 'duration'; fully transparent
+            frames get an empty rect
+        """
+        if not frames:
+            raise ValueError("No frames provided to create sprite sheet")
+        if len(frames) != len(durations):
+            raise ValueError("Frames and durations lists must have same length")
+        
+        sprites, sprite_ids, frame_entries = [], {}, []
+        for frame in frames:
+            rgba = frame.convert('RGBA')
+            box = rgba.getchannel('A').getbbox()
+            if box is None:
+                frame_entries.append((None, (0, 0)))
+                continue
+            sprite = rgba.crop(box)
+            key = (sprite.size, hashlib.blake2b(sprite.tobytes(), digest_size=16).digest())
+            if key not in sprite_ids:
+                sprite_ids[key] = len(sprites)
+                sprites.append(sprite)
+            frame_entries.append((sprite_ids[key], box[:2]))
+        
+        positions, sheet_size = self._shelf_pack([sprite.size for sprite in sprites], padding, max_width)
+        sheet = Image.new('RGBA', sheet_size, (0, 0, 0, 0))
+        for sprite, position in zip(sprites, positions):
+            sheet.paste(sprite, position)
+        sheet.save(output_path, format='PNG', optimize=True)
+        
+        manifest_frames = []
+        for index, ((sprite_id, offset), duration) in enumerate(zip(frame_entries, durations)):
+            if sprite_id is None:
+                rect = [0, 0, 0, 0]
+            else:
+                rect = list(positions[sprite_id]) + list(sprites[sprite_id].size)
+            manifest_frames.append({'index': index, 'rect': rect, 'offset': list(offset), 'duration': int(duration)})
+        
+        self.logger.info(f"✅ Created sprite sheet with {len(sprites)} unique sprites for {len(frames)} frames "
+                         f"({sheet_size[0]}x{sheet_size[1]}): {self._describe(output_path)}")
+        return {'size': list(sheet_size), 'source_size': list(frames[0].size), 'frames': manifest_frames}
+    
+    @staticmethod
+    def write_manifest(manifest: dict, manifest_path) -> None:
+        """Write a sprite sheet manifest as JSON"""
+        Path(manifest_path).write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    
+    @staticmethod
+    def output_format_for(output_path, default: str = 'gif') -> str:
+        """Animated output format implied by a file name's extension"""
+        if isinstance(output_path, (str, os.PathLike)):
+            return FORMAT_EXTENSIONS.get(Path(output_path).suffix.lower(), default)
+        return default
+    
+    def save_animation(self,
+                       frames: List[Image.Image],
+                       durations: List[int],
+                       output_path: Union[str, os.PathLike, BinaryIO],
+                       output_format: Optional[str] = None,
+                       preset: str = 'balanced',
+                       loop: int = 0,
+                       max_workers: Optional[int] = None,
+                       parallel_encode: bool = False) -> None:
+        """
+        Write processed frames as an animated GIF, WebP or APNG
+        
+        WebP and APNG are written straight from the RGBA frames, so soft
+        alpha edges survive and no later re-encode is needed.
+        
+        Args:
+            frames: List of PIL Image objects
+            durations: List of frame durations in milliseconds
+            output_path: Output file path or writable binary file object
+            output_format: 'gif', 'webp' or 'apng' (default: from the file extension)
+            preset: Encoder preset, one of ENCODER_PRESETS
+            loop: Number of loops (0 = infinite)
+            max_workers: GIF only: threads for quantization/encoding
+            parallel_encode: GIF only: LZW-encode frames in parallel
+        """
+        output_format = (output_format or self.output_format_for(output_path)).lower()
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        if preset not in ENCODER_PRESETS:
+            raise ValueError(f"Unknown encoder preset: {preset}")
+        options = ENCODER_PRESETS[preset][output_format]
+        
+        if output_format == 'gif':
+            self.create_gif(frames, durations, output_path, loop=loop, max_workers=max_workers,
+                            parallel_encode=parallel_encode, **options)
+            return
+        
+        try:
+            if not frames:
+                raise ValueError("No frames provided to create animation")
+            if len(frames) != len(durations):
+                raise ValueError("Frames and durations lists must have same length")
+            
+            frames = [frame.convert('RGBA') for frame in frames]
+            if output_format == 'webp':
+                if not features.check('webp'):
+                    raise RuntimeError("Pillow was built without WebP support")
+                save_options = {'format': 'WEBP', 'lossless': False, 'exact': False}
+            else:
+                # Each frame fully replaces the previous one
+                save_options = {'format': 'PNG', 'disposal': 0, 'blend': 0}
             
-            first_frame.save(
+            frames[0].save(
                 output_path,
-                format='GIF',
                 save_all=True,
-                append_images=remaining_frames,
+                append_images=frames[1:],
                 duration=durations,
                 loop=loop,
-                optimize=optimize,
-                transparency=0  # Set transparency index
+                **save_options,
+                **options
             )
             
-            self.logger.info(f"✅ Created GIF with {len(frames)} frames: {output_path}")
+            self.logger.info(f"✅ Created {output_format.upper()} with {len(frames)} frames: {self._describe(output_path)}")
             
         except Exception as e:
-            self.logger.error(f"❌ Failed to create GIF {output_path}: {str(e)}")
+            self.logger.error(f"❌ Failed to create {output_format.upper()} {self._describe(output_path)}: {str(e)}")
             raise
     
-    def get_gif_info(self, gif_path: str) -> dict:
+    def encode_to_budget(self,
+                         frames: List[Image.Image],
+                         durations: List[int],
+                         max_bytes: int,
+                         palette_sizes: Tuple[int, ...] = (255, 192, 128, 96, 64, 48, 32, 24, 16),
+                         decimations: Tuple[int, ...] = (1, 2, 3),
+                         scales: Tuple[float, ...] = (1.0, 0.75, 0.5, 0.35, 0.25),
+                         loop: int = 0) -> Tuple[bytes, dict]:
+        """
+        Encode a GIF that fits a byte budget with as little loss as possible
+        
+        Settings are relaxed in order: palette size first (binary search,
+        file size grows with the palette), then frame decimation (keeping
+        every Nth frame, durations merged so timing is unchanged), then
+        scale. Once a palette fits, dithering is tried on top of it and kept
+        if it still fits. Quantized frames are cached per (scale, palette,
+        dither), so decimated attempts and repeated probes reuse them and
+        each attempt only costs the cheap pre-quantized write.
+        
+        Args:
+            frames: Processed RGBA frames
+            durations: Frame durations in milliseconds
+            max_bytes: Byte budget for the encoded GIF
+            palette_sizes: Candidate palette sizes, largest first
+            decimations: Candidate frame steps, smallest first
+            scales: Candidate scale factors, largest first
+            loop: Number of loops (0 = infinite)
+        
+        Returns:
+            Tuple of (GIF bytes, settings dict with 'colors', 'dither',
+            'decimation', 'scale', 'bytes', 'attempts' and 'fits'); if
+            nothing fits, the smallest attempt is returned with fits=False
+        """
+        if not frames:
+            raise ValueError("No frames provided to create GIF")
+        
+        scaled_cache = {}
+        quantized_cache = {}
+        attempts = []
+        
+        def quantized(scale, colors, dither, index):
+            key = (scale, colors, dither, index)
+            if key not in quantized_cache:
+                if (scale, index) not in scaled_cache:
+                    frame = frames[index]
+                    if scale != 1.0:
+                        size = (max(1, round(frame.width * scale)), max(1, round(frame.height * scale)))
+                        frame = frame.resize(size, Image.Resampling.LANCZOS)
+                    scaled_cache[(scale, index)] = frame
+                quantized_cache[key] = self.quantize_frame(scaled_cache[(scale, index)], colors, dither)
+            return quantized_cache[key]
+        
+        def attempt(scale, decimation, colors, dither):
+            indices = list(range(0, len(frames), decimation))
+            merged = [sum(durations[i:i + decimation]) for i in indices]
+            buffer = io.BytesIO()
+            self.create_gif([quantized(scale, colors, dither, i) for i in indices], merged,
+                            buffer, optimize=True, loop=loop)
+            data = buffer.getvalue()
+            settings = {'colors': colors, 'dither': dither, 'decimation': decimation,
+                        'scale': scale, 'bytes': len(data)}
+            attempts.append(settings)
+            self.logger.debug(f"Size attempt {settings}")
+            return data, settings
+        
+        best = None
+        for scale in scales:
+            for decimation in decimations:
+                # Largest palette that fits, assuming size grows with palette size
+                low, high, fitting = 0, len(palette_sizes) - 1, None
+                while low <= high:
+                    middle = (low + high) // 2
+                    data, settings = attempt(scale, decimation, palette_sizes[middle], False)
+                    if best is None or len(data) < len(best[0]):
+                        best = (data, settings)
+                    if len(data) <= max_bytes:
+                        fitting = (data, settings)
+                        high = middle - 1
+                    else:
+                        low = middle + 1
+                
+                if fitting is not None:
+                    data, settings = attempt(scale, decimation, fitting[1]['colors'], True)
+                    if len(data) <= max_bytes:
+                        fitting = (data, settings)
+                    data, settings = fitting
+                    result = dict(settings, attempts=len(attempts), fits=True)
+                    self.logger.info(f"✅ Fitted GIF into {len(data)} bytes (budget {max_bytes}): {result}")
+                    return data, result
+        
+        data, settings = best
+        result = dict(settings, attempts=len(attempts), fits=False)
+        self.logger.warning(f"No settings fit the budget of {max_bytes} bytes; smallest was {len(data)}")
+        return data, result
+    
+    def get_gif_info(self, gif_path: GIFSource) -> dict:
         """
-        Get basic information about GIF file
+        Get basic information about GIF file (path, bytes or file object)
         """
+        if self.is_video(gif_path):
+            capture, fps = self._open_video(gif_path)
+            try:
+                frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+                return {
+                    'frame_count': frame_count,
+                    'size': (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))),
+                    'mode': 'RGB',
+                    'is_animated': frame_count > 1,
+                    'duration': frame_count / fps
+                }
+            finally:
+                capture.release()
         try:
-            with Image.open(gif_path) as gif:
+            with Image.open(self._resolve_source(gif_path, validate=False)) as gif:
                 frames = list(ImageSequence.Iterator(gif))
                 info = {
                     'frame_count': len(frames),
@@ -112,15 +801,149 @@ class GIFProcessor:
                 }
                 return info
         except Exception as e:
-            self.logger.error(f"❌ Failed to get GIF info for {gif_path}: {str(e)}")
+            self.logger.error(f"❌ Failed to get GIF info for {self._describe(gif_path)}: {str(e)}")
             raise
     
+    def check_transparency(self, gif_path: GIFSource,
+                           samples: int = 4,
+                           border: int = 2,
+                           min_share: float = 0.98) -> dict:
+        """
+        Cheap pre-check for inputs whose background is already removed
+        
+        The input is validated against the size limits like any other
+        input, then the header is read: a GIF whose first frame declares no
+        transparent palette index (or any image without alpha) returns
+        without decoding a frame. Otherwise only the border alpha of the
+        first few frames is sampled, since seeking to a later GIF frame
+        decodes every frame before it. When nearly all border pixels are
+        transparent, the background looks removed already; whether the
+        chosen method would still change anything is for the caller to
+        decide by running it on the returned samples.
+        
+        Args:
+            gif_path: Input GIF (path, bytes or file object)
+            samples: Number of leading frames to sample
+            border: Border width in pixels to sample on each side
+            min_share: Minimum share of fully transparent border pixels in
+                every sampled frame
+        
+        Returns:
+            Dictionary with 'format', 'has_transparency',
+            'border_transparency' (lowest transparent border share among the
+            sampled frames), 'frames_sampled', 'samples' (the sampled RGBA
+            frames), 'already_transparent' and 'can_copy' (the input can be
+            copied unchanged as the GIF output)
+        """
+        result = {'format': None, 'has_transparency': False, 'border_transparency': 0.0,
+                  'frames_sampled': 0, 'samples': [], 'already_transparent': False, 'can_copy': False}
+        if self.is_video(gif_path):
+            result['format'] = 'VIDEO'
+            return result
+        
+        with Image.open(self._resolve_source(gif_path)) as image:
+            result['format'] = image.format
+            result['has_transparency'] = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+            if not result['has_transparency']:
+                return result
+            
+            shares = []
+            for index, frame in enumerate(ImageSequence.Iterator(image)):
+                if index >= max(1, samples):
+                    break
+                rgba = frame.convert('RGBA')
+                result['samples'].append(rgba)
+                alpha = np.asarray(rgba)[:, :, 3]
+                b = max(1, min(border, alpha.shape[0] // 2, alpha.shape[1] // 2))
+                edge = np.concatenate([alpha[:b].ravel(), alpha[-b:].ravel(),
+                                       alpha[b:-b, :b].ravel(), alpha[b:-b, -b:].ravel()])
+                shares.append(float(np.mean(edge == 0)))
+        
+        result['frames_sampled'] = len(shares)
+        result['border_transparency'] = min(shares)
+        result['already_transparent'] = result['border_transparency'] >= min_share
+        # Resizing would still change the output, so only a plain GIF can be copied as is
+        result['can_copy'] = (result['already_transparent'] and result['format'] == 'GIF'
+                              and not self.scale and not self.max_size)
+        self.logger.debug(f"Transparency check for {self._describe(gif_path)}: "
+                          f"{ {k: v for k, v in result.items() if k != 'samples'} }")
+        return result
+    
+    def sample_frames(self, gif_path: GIFSource, 
+                      count: int = 4, 
+                      max_size: int = 160) -> Tuple[List[Image.Image], List[int]]:
+        """
+        Get a few evenly spaced frames downscaled for quick previews
+        
+        Args:
+            gif_path: Input GIF path
+            count: Number of frames to sample
+            max_size: Maximum width/height of the sampled frames
+        
+        Returns:
+            Tuple of (sampled frames, their frame indices)
+        """
+        frames, _ = self.extract_frames(gif_path)
+        count = max(1, min(count, len(frames)))
+        indices = sorted(set(int(round(i * (len(frames) - 1) / max(1, count - 1))) for i in range(count)))
+        
+        sampled = []
+        for index in indices:
+            frame = frames[index]
+            scale = max_size / max(frame.size)
+            if scale < 1:
+                new_size = (max(1, round(frame.width * scale)), max(1, round(frame.height * scale)))
+                frame = frame.resize(new_size, Image.BILINEAR)
+            sampled.append(frame)
+        return sampled, indices
+    
+    def create_contact_sheet(self, 
+                             originals: List[Image.Image], 
+                             processed: List[Image.Image],
+                             padding: int = 4,
+                             checker_size: int = 8) -> Image.Image:
+        """
+        Build a preview sheet: originals on the top row, processed frames
+        composited over a checkerboard on the bottom row
+        
+        Args:
+            originals: Sampled input frames
+            processed: Corresponding processed frames
+            padding: Space between cells in pixels
+            checker_size: Checkerboard square size in pixels
+        
+        Returns:
+            RGB contact sheet image
+        """
+        if not originals or len(originals) != len(processed):
+            raise ValueError("Originals and processed frames must be non-empty and the same length")
+        
+        cell_w = max(frame.width for frame in originals)
+        cell_h = max(frame.height for frame in originals)
+        sheet_w = len(originals) * (cell_w + padding) + padding
+        sheet_h = 2 * (cell_h + padding) + padding
+        
+        # Vectorized checkerboard so transparency is visible
+        yy, xx = np.mgrid[0:cell_h, 0:cell_w]
+        checker = np.where(((yy // checker_size + xx // checker_size) % 2)[..., None] == 0, 200, 255)
+        checker = Image.fromarray(np.repeat(checker, 3, axis=2).astype(np.uint8)).convert('RGBA')
+        
+        sheet = Image.new('RGB', (sheet_w, sheet_h), (64, 64, 64))
+        for i, (original, result) in enumerate(zip(originals, processed)):
+            x = padding + i * (cell_w + padding)
+            sheet.paste(original.convert('RGB'), (x, padding))
+            
+            cell = checker.crop((0, 0, result.width, result.height))
+            cell.alpha_composite(result.convert('RGBA'))
+            sheet.paste(cell.convert('RGB'), (x, 2 * padding + cell_h))
+        return sheet
+    
     def preview_frames(self, gif_path: str, max_frames: int = 5) -> None:
         """
         Preview first few frames of GIF (for debugging)
         """
         info = self.get_gif_info(gif_path)
-        print(f"📊 GIF Info: {gif_path}")
+        print(f"📊 GIF Info: {self._describe(gif_path)}")
         print(f"  - Frames: {info['frame_count']}")
         print(f"  - Size: {info['size']}")
         print(f"  - Mode: {info['mode']}")
@@ -0,0 +1,157 @@
+import os
+import struct
+from pathlib import Path
+from typing import BinaryIO, List, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+# Mask file layout (little-endian):
+#   header   MAGIC, width u16, height u16, frame count u32
+#   index    per frame: data offset u64, data length u32, duration u32, encoding u8
+#   data     one encoded mask per frame
+# The index lets any single frame be decoded without touching the others.
+MAGIC = b'GBGMASK1'
+_HEADER = struct.Struct('<8sHHI')
+_INDEX_ENTRY = struct.Struct('<QIIB')
+
+# Per-frame encodings
+ENCODING_RLE = 0   # Runs of equal alpha per row: run count u32, lengths u16[], values u8[]
+ENCODING_BITS = 1  # 1-bit masks (alpha 0/255) packed 8 pixels per byte, rows byte-aligned
+
+def encode_mask(alpha: np.ndarray, encoding: str = 'auto') -> Tuple[int, bytes]:
+    """
+    Encode one 2-D uint8 alpha mask
+
+    Args:
+        alpha: Alpha values (0-255) of shape (height, width)
+        encoding: 'rle', 'bits' (alpha is thresholded at 128) or 'auto' to
+            pick the smaller lossless encoding
+
+    Returns:
+        Tuple of (encoding id, encoded bytes)
+    """
+    if encoding not in ('auto', 'rle', 'bits'):
+        raise ValueError(f"Unknown mask encoding: {encoding}")
+    alpha = np.ascontiguousarray(alpha, dtype=np.uint8)
+    height, width = alpha.shape
+
+    if encoding == 'bits':
+        return ENCODING_BITS, np.packbits(alpha >= 128, axis=1).tobytes()
+
+    # Run boundaries: every row start plus every change within a row
+    flat = alpha.reshape(-1)
+    change = np.ones(flat.size, dtype=bool)
+    change[1:] = flat[1:] != flat[:-1]
+    change[::width] = True
+    starts = np.flatnonzero(change)
+    lengths = np.diff(np.append(starts, flat.size)).astype('<u2')
+    rle = struct.pack('<I', starts.size) + lengths.tobytes() + flat[starts].tobytes()
+
+    # Packed bits are only lossless for pure 0/255 masks
+    if encoding == 'auto' and np.isin(alpha, (0, 255)).all():
+        bits = np.packbits(alpha >= 128, axis=1).tobytes()
+        if len(bits) < len(rle):
+            return ENCODING_BITS, bits
+    return ENCODING_RLE, rle
+
+def decode_mask(encoding: int, data: bytes, width: int, height: int) -> np.ndarray:
+    """Decode one mask back to a (height, width) uint8 array"""
+    if encoding == ENCODING_BITS:
+        packed = np.frombuffer(data, dtype=np.uint8).reshape(height, -1)
+        return np.unpackbits(packed, axis=1, count=width) * np.uint8(255)
+    if encoding == ENCODING_RLE:
+        (runs,) = struct.unpack_from('<I', data)
+        lengths = np.frombuffer(data, dtype='<u2', count=runs, offset=4)
+        values = np.frombuffer(data, dtype=np.uint8, count=runs, offset=4 + runs * 2)
+        return np.repeat(values, lengths).reshape(height, width)
+    raise ValueError(f"Unknown mask encoding: {encoding}")
+
+def save_masks(frames: List[Image.Image], durations: List[int],
+               output_path: Union[str, os.PathLike, BinaryIO],
+               encoding: str = 'auto') -> None:
+    """
+    Write the alpha channel of processed frames as a mask file
+
+    Args:
+        frames: Processed frames (any mode; alpha is taken after RGBA conversion)
+        durations: Frame durations in milliseconds
+        output_path: Output file path or writable binary file object
+        encoding: 'auto', 'rle' or 'bits'
+    """
+    if not frames:
+        raise ValueError("No frames provided to save masks")
+    if len(frames) != len(durations):
+        raise ValueError("Frames and durations lists must have same length")
+    width, height = frames[0].size
+
+    blobs = []
+    for frame in frames:
+        if frame.size != (width, height):
+            raise ValueError("All frames must have the same size")
+        blobs.append(encode_mask(np.asarray(frame.convert('RGBA'))[:, :, 3], encoding))
+
+    offset = _HEADER.size + _INDEX_ENTRY.size * len(blobs)
+    index = []
+    for (mask_encoding, data), duration in zip(blobs, durations):
+        index.append(_INDEX_ENTRY.pack(offset, len(data), int(duration), mask_encoding))
+        offset += len(data)
+
+    content = b''.join([_HEADER.pack(MAGIC, width, height, len(blobs))] + index + [data for _, data in blobs])
+    if hasattr(output_path, 'write'):
+        output_path.write(content)
+    else:
+        Path(output_path).write_bytes(content)
+
+class MaskFile:
+    """
+    Random-access reader for mask files written by save_masks
+
+    Only the header and index are read up front; masks[i] seeks to and
+    decodes a single frame.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"Not a mask file: {self.path}")
+            magic, self.width, self.height, count = _HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"Not a mask file: {self.path}")
+            index = f.read(_INDEX_ENTRY.size * count)
+            if len(index) < _INDEX_ENTRY.size * count:
+                raise ValueError(f"Truncated mask file: {self.path}")
+        self._index = [_INDEX_ENTRY.unpack_from(index, i * _INDEX_ENTRY.size) for i in range(count)]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    @property
+    def durations(self) -> List[int]:
+        return [entry[2] for entry in self._index]
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        offset, length, _, encoding = self._index[index]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        return decode_mask(encoding, data, self.width, self.height)
+
+    def apply(self, frames: List[Image.Image]) -> List[Image.Image]:
+        """Re-apply the stored masks to the original frames"""
+        if len(frames) != len(self):
+            raise ValueError(f"Mask file has {len(self)} frames but the GIF has {len(frames)}")
+        results = []
+        for i, frame in enumerate(frames):
+            if frame.size != self.size:
+                raise ValueError(f"Mask size {self.size} does not match frame size {frame.size}")
+            rgba = np.array(frame.convert('RGBA'))
+            rgba[:, :, 3] = np.minimum(rgba[:, :, 3], self[i])
+            results.append(Image.fromarray(rgba))
+        return results
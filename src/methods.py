@@ -0,0 +1,187 @@
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Cost classes, cheapest first
+COST_CLASSES = ("cheap", "moderate", "expensive")
+
+# How frames of one method may be spread across workers:
+#   "thread"   - thread-safe and releases the GIL (NumPy/OpenCV); use a thread pool
+#   "internal" - parallelizes itself (e.g. an inference runtime); run frames one by one
+#   "serial"   - not thread-safe; run frames one by one
+PARALLELISM_MODES = ("thread", "internal", "serial")
+
+ENTRY_POINT_GROUP = "gif_bg_remover.methods"
+
+class RemovalMethod:
+    """
+    A background removal method plus the metadata the scheduler needs
+
+    Args:
+        name: Method name used on the command line and in process_frame
+        func: Callable(remover, image, **params) -> RGBA image
+        cost: One of COST_CLASSES
+        parallelism: One of PARALLELISM_MODES
+        batch_func: Optional callable(remover, images, **params) -> list of
+            images that processes several same-sized frames at once
+        params: Parameter names mapped to their defaults
+        required: Parameter names that must be supplied by the caller
+        description: One-line description for help output
+    """
+
+    def __init__(self, name: str, func: Callable,
+                 cost: str = "moderate",
+                 parallelism: str = "thread",
+                 batch_func: Optional[Callable] = None,
+                 params: Optional[Dict] = None,
+                 required: Tuple[str, ...] = (),
+                 description: str = ""):
+        if cost not in COST_CLASSES:
+            raise ValueError(f"Unknown cost class for {name}: {cost}")
+        if parallelism not in PARALLELISM_MODES:
+            raise ValueError(f"Unknown parallelism mode for {name}: {parallelism}")
+        self.name = name
+        self.func = func
+        self.cost = cost
+        self.parallelism = parallelism
+        self.batch_func = batch_func
+        self.params = dict(params or {})
+        self.required = tuple(required)
+        self.description = description
+
+    @property
+    def batchable(self) -> bool:
+        return self.batch_func is not None
+
+    def resolve_params(self, kwargs: dict) -> dict:
+        """Pick this method's parameters from kwargs, filling in defaults"""
+        missing = [name for name in self.required if kwargs.get(name) is None]
+        if missing:
+            raise ValueError(f"Method '{self.name}' requires parameters: {', '.join(missing)}")
+        return {name: kwargs.get(name, default) for name, default in self.params.items()}
+
+    def __repr__(self):
+        return (f"RemovalMethod({self.name!r}, cost={self.cost!r}, "
+                f"parallelism={self.parallelism!r}, batchable={self.batchable})")
+
+class MethodRegistry:
+    """
+    Name → RemovalMethod lookup
+
+    Third-party packages can add methods through the
+    ``gif_bg_remover.methods`` entry point group; each entry point must load
+    a RemovalMethod (or a zero-argument callable returning one). Entry
+    points are only scanned the first time an unknown name is requested or
+    the full list of names is needed.
+    """
+
+    def __init__(self):
+        self._methods = {}
+        self._entry_points_loaded = False
+        self.logger = logging.getLogger('MethodRegistry')
+
+    def register(self, method: RemovalMethod, replace: bool = False) -> RemovalMethod:
+        """Add a method; refuses to shadow an existing name unless replace=True"""
+        if method.name in self._methods and not replace:
+            raise ValueError(f"Removal method already registered: {method.name}")
+        self._methods[method.name] = method
+        return method
+
+    def unregister(self, name: str) -> None:
+        self._methods.pop(name, None)
+
+    def get(self, name: str) -> Optional[RemovalMethod]:
+        if name not in self._methods:
+            self.load_entry_points()
+        return self._methods.get(name)
+
+    def names(self) -> List[str]:
+        self.load_entry_points()
+        return list(self._methods)
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> None:
+        """Register methods advertised by installed packages (once)"""
+        if self._entry_points_loaded:
+            return
+        self._entry_points_loaded = True
+        try:
+            from importlib.metadata import entry_points
+        except ImportError:
+            return
+
+        found = entry_points()
+        if hasattr(found, 'select'):
+            found = found.select(group=group)
+        else:
+            found = found.get(group, [])
+
+        for entry_point in found:
+            try:
+                method = entry_point.load()
+                if not isinstance(method, RemovalMethod):
+                    method = method()
+                self.register(method)
+            except Exception as e:
+                self.logger.warning(f"Could not load removal method '{entry_point.name}': {e}")
+
+def _resolve_key(remover, image, target_color, tolerance):
+    """Fill in a missing key color/tolerance from the image borders"""
+    if target_color is None:
+        detected = remover.detect_background_color([image], top_k=1)
+        target_color = detected['colors'][0] if detected['colors'] else (255, 255, 255)
+        if tolerance is None:
+            tolerance = detected['tolerance']
+    return target_color, 40 if tolerance is None else tolerance
+
+def _color(remover, image, target_color=None, tolerance=None):
+    target_color, tolerance = _resolve_key(remover, image, target_color, tolerance)
+    return remover.remove_background_color_based(image, target_color, tolerance)
+
+def _color_batch(remover, images, target_color=None, tolerance=None):
+    """Vectorized color keying over a stack of same-sized frames"""
+    target_color, tolerance = _resolve_key(remover, images[0], target_color, tolerance)
+    stack = np.stack([np.asarray(image.convert('RGBA')) for image in images])
+
+    # Same test as cv2.inRange on clamped per-channel bounds
+    diff = np.abs(stack[..., :3].astype(np.int16) - np.array(target_color, dtype=np.int16))
+    background = (diff <= tolerance).all(axis=-1)
+
+    result = stack.copy()
+    result[..., 3][background] = 0
+    return [Image.fromarray(frame) for frame in result]
+
+def _edges(remover, image, blur_kernel=5, canny_low=50, canny_high=150):
+    return remover.remove_background_edges(image, blur_kernel, canny_low, canny_high)
+
+def _ai(remover, image):
+    return remover.remove_background_ai(image)
+
+def _onnx(remover, image, model_path=None, intra_op_threads=None, inter_op_threads=None, int8=False):
+    return remover.remove_background_onnx(image, model_path, intra_op_threads, inter_op_threads, int8)
+
+def _auto(remover, image, target_color=None, tolerance=None):
+    return remover.remove_background_auto(image, target_color, tolerance)
+
+METHODS = MethodRegistry()
+
+METHODS.register(RemovalMethod(
+    "color", _color, cost="cheap", parallelism="thread", batch_func=_color_batch,
+    params={'target_color': None, 'tolerance': None},
+    description="Remove specific background colors"))
+METHODS.register(RemovalMethod(
+    "edges", _edges, cost="moderate", parallelism="thread",
+    params={'blur_kernel': 5, 'canny_low': 50, 'canny_high': 150},
+    description="Detect and keep foreground objects"))
+METHODS.register(RemovalMethod(
+    "ai", _ai, cost="expensive", parallelism="internal",
+    description="AI segmentation (rembg)"))
+METHODS.register(RemovalMethod(
+    "onnx", _onnx, cost="expensive", parallelism="internal",
+    params={'model_path': None, 'intra_op_threads': None, 'inter_op_threads': None, 'int8': False},
+    description="Offline AI segmentation with a local ONNX model"))
+METHODS.register(RemovalMethod(
+    "auto", _auto, cost="expensive", parallelism="internal",  # May fall through to the AI session
+    params={'target_color': None, 'tolerance': None},
+    description="Smart detection (AI → Color → Edges)"))
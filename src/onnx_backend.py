@@ -0,0 +1,159 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Remove relative imports, use direct imports
+try:
+    from utils import setup_logging
+except ImportError:
+    # Fallback for when running as main
+    from .utils import setup_logging
+
+# Tiny stand-in segmentation model shipped with the package so the ONNX path
+# can be exercised without downloading anything (see create_test_model.py)
+BUNDLED_TEST_MODEL = Path(__file__).parent / "models" / "tiny_segmenter.onnx"
+
+# Environment variable pointing at the default local model on offline nodes
+MODEL_ENV_VAR = "GIF_BG_ONNX_MODEL"
+
+# Directory for derived models (INT8 copies); defaults to the user cache dir
+CACHE_ENV_VAR = "GIF_BG_CACHE_DIR"
+
+def cache_dir() -> Path:
+    """Writable per-user cache directory for derived models"""
+    if os.environ.get(CACHE_ENV_VAR):
+        return Path(os.environ[CACHE_ENV_VAR])
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'gif_bg_remover'
+
+class ONNXSegmenter:
+    """
+    Offline AI background removal with ONNX Runtime on CPU
+
+    Loads a local salient-object segmentation model (e.g. an exported U^2-Net,
+    input NCHW float32 image, first output a 1-channel foreground map) and
+    never touches the network.
+    """
+
+    # ImageNet normalization used by U^2-Net style models
+    MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+    STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+    def __init__(self, model_path: str,
+                 intra_op_threads: Optional[int] = None,
+                 inter_op_threads: Optional[int] = None,
+                 input_size: Tuple[int, int] = (320, 320),
+                 log_level=logging.INFO):
+        self.logger = setup_logging('ONNXSegmenter', log_level)
+        self.model_path = str(model_path)
+        if not Path(self.model_path).exists():
+            raise FileNotFoundError(f"ONNX model not found: {self.model_path}")
+
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("onnxruntime not available. Install with: pip install onnxruntime")
+
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        # Fixed spatial dims in the model win over the configured size
+        height, width = model_input.shape[2:4]
+        self.input_size = (width if isinstance(width, int) else input_size[0],
+                           height if isinstance(height, int) else input_size[1])
+        self.logger.info(f"✅ ONNX model loaded: {self.model_path} (input {self.input_size[0]}x{self.input_size[1]})")
+
+    def predict_mask(self, image: Image.Image) -> np.ndarray:
+        """
+        Predict the foreground alpha mask for an image
+
+        Returns:
+            uint8 mask (0-255) with the image's height and width
+        """
+        rgb = np.asarray(image.convert('RGB'))
+        resized = cv2.resize(rgb, self.input_size, interpolation=cv2.INTER_AREA)
+        tensor = (resized.astype(np.float32) / 255.0 - self.MEAN) / self.STD
+        tensor = np.ascontiguousarray(tensor.transpose(2, 0, 1)[None])
+
+        prediction = self.session.run(None, {self.input_name: tensor})[0]
+        prediction = np.squeeze(prediction).astype(np.float32)
+
+        low, high = float(prediction.min()), float(prediction.max())
+        if high - low > 1e-6:
+            prediction = (prediction - low) / (high - low)
+        else:
+            prediction = np.clip(prediction, 0, 1)
+
+        mask = cv2.resize(prediction, (rgb.shape[1], rgb.shape[0]), interpolation=cv2.INTER_LINEAR)
+        return (mask * 255 + 0.5).astype(np.uint8)
+
+    def remove_background(self, image: Image.Image) -> Image.Image:
+        """Apply the predicted mask to the image's alpha channel"""
+        result = np.array(image.convert('RGBA'))
+        result[:, :, 3] = np.minimum(result[:, :, 3], self.predict_mask(image))
+        return Image.fromarray(result)
+
+    @staticmethod
+    def quantize(model_path: str, output_path: Optional[str] = None) -> str:
+        """
+        Create a dynamically quantized INT8 copy of a model
+
+        Weights are stored as INT8 and activations quantized on the fly,
+        which is usually markedly faster on CPU for a small accuracy cost.
+        By default the copy goes to the user cache directory, named after a
+        hash of the source model, so a read-only install works and a changed
+        model is never served a stale copy. It is only created if it doesn't
+        exist yet.
+
+        Args:
+            model_path: Source ONNX model
+            output_path: Explicit path for the INT8 copy (default: cache)
+
+        Returns:
+            Path of the INT8 model
+        """
+        model_path = Path(model_path)
+        if output_path:
+            output_path = Path(output_path)
+        else:
+            digest = hashlib.sha256()
+            with open(model_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            output_path = cache_dir() / f"{model_path.stem}.{digest.hexdigest()[:16]}.int8.onnx"
+        if output_path.exists():
+            return str(output_path)
+
+        try:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+        except ImportError:
+            raise ImportError("onnxruntime quantization tools not available. Install with: pip install onnxruntime onnx")
+
+        # Quantize to a temporary name so an interrupted run never leaves a broken model
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_name(f"{output_path.stem}.{os.getpid()}.tmp.onnx")
+        try:
+            quantize_dynamic(str(model_path), str(tmp_path), weight_type=QuantType.QInt8)
+            os.replace(str(tmp_path), str(output_path))
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return str(output_path)
+
+def default_model_path() -> Optional[str]:
+    """Model path from the GIF_BG_ONNX_MODEL environment variable, if set"""
+    return os.environ.get(MODEL_ENV_VAR) or None
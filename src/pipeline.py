@@ -0,0 +1,176 @@
+import logging
+import os
+import queue
+import threading
+from typing import Optional
+
+# Remove relative imports, use direct imports
+try:
+    from gif_processor import GIFProcessor
+    from background_remover import BackgroundRemover
+    from utils import setup_logging, ProcessingCancelled
+except ImportError:
+    # Fallback for when running as main
+    from .gif_processor import GIFProcessor
+    from .background_remover import BackgroundRemover
+    from .utils import setup_logging, ProcessingCancelled
+
+_DONE = object()
+
+class GIFPipeline:
+    """
+    Overlapped decode → remove → encode pipeline
+
+    A decoder thread streams frames into a bounded queue, a pool of removal
+    workers drains it into a second bounded queue, and the calling thread
+    quantizes finished frames in order as they arrive. The final GIF write
+    only assembles already-paletted frames, so wall time approaches that of
+    the slowest stage instead of the sum of all three.
+    """
+
+    def __init__(self,
+                 processor: Optional[GIFProcessor] = None,
+                 remover: Optional[BackgroundRemover] = None,
+                 max_workers: Optional[int] = None,
+                 queue_size: Optional[int] = None,
+                 log_level=logging.INFO):
+        self.logger = setup_logging('GIFPipeline', log_level)
+        self.processor = processor or GIFProcessor(log_level=log_level)
+        self.remover = remover or BackgroundRemover(log_level=log_level)
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.queue_size = max(1, queue_size or self.max_workers * 2)
+
+    def run(self, input_path: str, output_path: str,
+            method: str = "auto",
+            optimize: bool = True,
+            progress_callback=None,
+            cancel_event=None,
+            output_format: str = "gif",
+            preset: Optional[str] = None,
+            **kwargs) -> dict:
+        """
+        Process a GIF through the three overlapped stages
+
+        Args:
+            input_path: Input GIF file path, bytes or binary file object
+            output_path: Output GIF file path or writable binary file object
+            method: Background removal method
+            optimize: Whether to optimize the GIF
+            progress_callback: Optional callable(done, total) called from this
+                thread as frames are encoded (total is None until decoding ends)
+            cancel_event: Optional threading.Event to stop between frames
+            output_format: 'gif', 'webp' or 'apng'
+            preset: Encoder preset for WebP/APNG (default: from optimize)
+            **kwargs: Additional parameters for the removal method
+
+        Returns:
+            Dictionary with 'frames' and 'duration' (seconds) of the output
+        """
+        # Methods that are not thread-safe or that parallelize internally get one worker
+        spec = self.remover.methods.get(method)
+        workers = self.max_workers if spec is None or spec.parallelism == "thread" else 1
+        
+        frames_in = queue.Queue(maxsize=self.queue_size)
+        frames_out = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        errors = []
+        decoded = {'count': None}
+
+        def stopped():
+            return stop.is_set() or (cancel_event is not None and cancel_event.is_set())
+
+        def put(q, item):
+            # Blocking put that gives up once the pipeline is stopping
+            while not stopped():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def decode():
+            count = 0
+            try:
+                for frame, duration in self.processor.iter_frames(input_path):
+                    if count == 0 and method in ('color', 'auto') and 'target_color' not in kwargs:
+                        # Streaming: key color comes from the first frame's borders
+                        detected = self.remover.detect_background_color([frame])
+                        if detected['colors']:
+                            kwargs['target_color'] = detected['colors'][0]
+                            kwargs.setdefault('tolerance', detected['tolerance'])
+                    if not put(frames_in, (count, frame, duration)):
+                        return
+                    count += 1
+                decoded['count'] = count
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                for _ in range(workers):
+                    put(frames_in, _DONE)
+
+        def remove():
+            try:
+                while not stopped():
+                    try:
+                        item = frames_in.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if item is _DONE:
+                        break
+                    index, frame, duration = item
+                    result = self.remover.process_frame(frame, method, **kwargs)
+                    if not put(frames_out, (index, result, duration)):
+                        return
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                put(frames_out, _DONE)
+
+        threads = [threading.Thread(target=decode, name='gif-decode', daemon=True)]
+        threads += [threading.Thread(target=remove, name=f'gif-remove-{i}', daemon=True)
+                    for i in range(workers)]
+        for thread in threads:
+            thread.start()
+
+        # Encode stage: reorder and quantize frames as soon as they are ready
+        # (WebP/APNG keep RGBA frames and encode them in one go at the end)
+        quantize = output_format == "gif"
+        encoded, durations = [], []
+        reorder = {}
+        workers_left = workers
+        try:
+            while workers_left and not stopped():
+                try:
+                    item = frames_out.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    workers_left -= 1
+                    continue
+                index, result, duration = item
+                reorder[index] = (result, duration)
+                while len(encoded) in reorder:
+                    result, duration = reorder.pop(len(encoded))
+                    encoded.append(self.processor.quantize_frame(result) if quantize else result)
+                    durations.append(duration)
+                    if progress_callback is not None:
+                        progress_callback(len(encoded), decoded['count'])
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        if errors:
+            raise errors[0]
+        if cancel_event is not None and cancel_event.is_set():
+            raise ProcessingCancelled(f"Cancelled after {len(encoded)} frames")
+
+        if quantize:
+            self.processor.create_gif(encoded, durations, output_path, optimize=optimize)
+        else:
+            self.processor.save_animation(encoded, durations, output_path, output_format,
+                                          preset or ('balanced' if optimize else 'fast'))
+        return {'frames': len(encoded), 'duration': sum(durations) / 1000.0}
@@ -1,27 +1,173 @@
+import json
 import logging
+import threading
+from collections import Counter
 from pathlib import Path
 
+_logging_configured = False
+
+class ProcessingCancelled(Exception):
+    """Raised when a cancel request stops processing between frames"""
+
+class RunMetrics:
+    """
+    Thread-safe per-run counters
+    
+    Hot paths only bump counters; the totals are logged once per run as a
+    single structured summary instead of one log line per frame.
+    """
+    
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+    
+    def increment(self, key, amount=1):
+        """Add ``amount`` to counter ``key``"""
+        with self._lock:
+            self._counts[key] += amount
+    
+    def snapshot(self):
+        """Return a plain dict copy of the current counters"""
+        with self._lock:
+            return dict(self._counts)
+    
+    def reset(self):
+        """Clear all counters"""
+        with self._lock:
+            self._counts.clear()
+    
+    def to_json(self):
+        """Counters as a compact JSON object with sorted keys"""
+        return json.dumps(self.snapshot(), sort_keys=True)
+
 def setup_logging(name=None, level=logging.INFO):
-    """Setup basic logging configuration"""
-    logging.basicConfig(
-        level=level,  # Use the level parameter, not the name
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    return logging.getLogger(name)  # Use name for the logger, not for level
+    """Setup basic logging configuration (the root handler is configured once)"""
+    global _logging_configured
+    if not _logging_configured:
+        logging.basicConfig(
+            level=level,  # Use the level parameter, not the name
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+        _logging_configured = True
+    logger = logging.getLogger(name)  # Use name for the logger, not for level
+    logger.setLevel(level)
+    return logger
 
-def validate_gif(file_path):
+def inspect_gif(data):
+    """
+    Read the GIF header and walk its block structure without decoding
+    
+    Only block headers and sub-block lengths are read, so this costs a
+    tiny fraction of a full decode. Stray bytes between blocks (such as
+    zero padding before the trailer) are skipped, as Pillow and browsers
+    do.
+    
+    Args:
+        data: GIF file contents (bytes-like)
+    
+    Returns:
+        Dictionary with 'version', 'width', 'height' (logical screen) and
+        'frame_count'
+    
+    Raises:
+        ValueError: If the header or block structure is invalid
+    """
+    data = memoryview(data)
+    if len(data) < 13 or bytes(data[:6]) not in (b'GIF87a', b'GIF89a'):
+        raise ValueError("Missing GIF87a/GIF89a header")
+    
+    width = data[6] | (data[7] << 8)
+    height = data[8] | (data[9] << 8)
+    if width == 0 or height == 0:
+        raise ValueError(f"Invalid logical screen size {width}x{height}")
+    
+    pos = 13
+    if data[10] & 0x80:
+        pos += 3 << ((data[10] & 0x07) + 1)  # Global color table
+    
+    def skip_sub_blocks(pos):
+        while True:
+            if pos >= len(data):
+                raise ValueError("Truncated data sub-block")
+            size = data[pos]
+            pos += 1 + size
+            if size == 0:
+                return pos
+    
+    frame_count = 0
+    while pos < len(data):
+        introducer = data[pos]
+        if introducer == 0x3B:  # Trailer
+            break
+        elif introducer == 0x21:  # Extension: label + sub-blocks
+            pos = skip_sub_blocks(pos + 2)
+        elif introducer == 0x2C:  # Image descriptor
+            if pos + 10 > len(data):
+                raise ValueError("Truncated image descriptor")
+            packed = data[pos + 9]
+            pos += 10
+            if packed & 0x80:
+                pos += 3 << ((packed & 0x07) + 1)  # Local color table
+            pos = skip_sub_blocks(pos + 1)  # LZW minimum code size + image data
+            frame_count += 1
+        else:
+            pos += 1  # Stray byte between blocks
+    
+    if frame_count == 0:
+        raise ValueError("GIF contains no image data")
+    
+    return {
+        'version': bytes(data[3:6]).decode('ascii'),
+        'width': width,
+        'height': height,
+        'frame_count': frame_count
+    }
+
+def validate_gif(file_path, max_dimension=None, max_frames=None, max_pixels=None):
     """
     Validate if file exists and is a GIF
+    
+    Checks the GIF signature and block structure and, optionally, size
+    limits, so corrupt or oversized inputs are rejected before decoding.
+    
+    Args:
+        file_path: File path or GIF contents as bytes
+        max_dimension: Maximum logical screen width/height
+        max_frames: Maximum number of frames
+        max_pixels: Maximum decoded pixels (width * height * frames)
+    
     Returns: (is_valid, error_message)
     """
-    path = Path(file_path)
+    if isinstance(file_path, (bytes, bytearray, memoryview)):
+        data = file_path
+        label = "<in-memory GIF>"
+    else:
+        path = Path(file_path)
+        label = file_path
+        
+        if not path.exists():
+            return False, f"File not found: {file_path}"
+        
+        if path.suffix.lower() not in ['.gif']:
+            return False, f"Not a GIF file: {file_path}"
+        
+        data = path.read_bytes()
+    
+    try:
+        info = inspect_gif(data)
+    except ValueError as e:
+        return False, f"Not a valid GIF file: {label} ({e})"
+    
+    if max_dimension and max(info['width'], info['height']) > max_dimension:
+        return False, f"GIF too large: {info['width']}x{info['height']} exceeds {max_dimension}px ({label})"
     
-    if not path.exists():
-        return False, f"File not found: {file_path}"
+    if max_frames and info['frame_count'] > max_frames:
+        return False, f"Too many frames: {info['frame_count']} exceeds {max_frames} ({label})"
     
-    if path.suffix.lower() not in ['.gif']:
-        return False, f"Not a GIF file: {file_path}"
+    decoded_pixels = info['width'] * info['height'] * info['frame_count']
+    if max_pixels and decoded_pixels > max_pixels:
+        return False, f"Decoded size {decoded_pixels} pixels exceeds budget of {max_pixels} ({label})"
     
     return True, "Valid GIF file"
 
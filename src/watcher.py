@@ -0,0 +1,262 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import shutil
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+# Remove relative imports, use direct imports
+try:
+    from gif_processor import GIFProcessor, OUTPUT_SUFFIXES
+    from background_remover import BackgroundRemover
+    from batch import can_copy_unchanged
+    from utils import setup_logging, create_output_path
+except ImportError:
+    # Fallback for when running as main
+    from .gif_processor import GIFProcessor, OUTPUT_SUFFIXES
+    from .background_remover import BackgroundRemover
+    from .batch import can_copy_unchanged
+    from .utils import setup_logging, create_output_path
+
+# inotify event flags (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+_EVENT_HEADER = struct.Struct('iIII')
+
+def _inotify_open(directory) -> Optional[int]:
+    """Non-blocking inotify descriptor watching a directory, or None if unsupported"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(str(directory)), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+def _inotify_read(fd: int) -> List[str]:
+    """File names from all queued inotify events"""
+    names = []
+    try:
+        data = os.read(fd, 65536)
+    except BlockingIOError:
+        return names
+    offset = 0
+    while offset + _EVENT_HEADER.size <= len(data):
+        _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+        offset += _EVENT_HEADER.size
+        name = data[offset:offset + length].rstrip(b'\0')
+        offset += length
+        if name:
+            names.append(os.fsdecode(name))
+    return names
+
+class FolderWatcher:
+    """
+    Long-running folder watcher that removes backgrounds from new GIFs
+
+    One GIFProcessor/BackgroundRemover pair stays resident, so models are
+    loaded once instead of per file. New files are noticed through inotify
+    on Linux (polling elsewhere) and only processed once their size and
+    modification time have been stable for ``settle_time`` seconds, so
+    files still being copied in are never read half-written. GIFs that
+    already have a transparent background are copied instead of reprocessed
+    unless ``skip_transparent`` is False.
+    """
+
+    def __init__(self, directory,
+                 output_dir=None,
+                 suffix: str = "_nobg",
+                 method: str = "auto",
+                 output_format: str = "gif",
+                 preset: str = "balanced",
+                 max_workers: int = 2,
+                 settle_time: float = 1.0,
+                 poll_interval: float = 1.0,
+                 use_inotify: bool = True,
+                 skip_transparent: bool = True,
+                 processor: Optional[GIFProcessor] = None,
+                 remover: Optional[BackgroundRemover] = None,
+                 log_level=logging.INFO,
+                 **kwargs):
+        self.logger = setup_logging('FolderWatcher', log_level)
+        self.directory = Path(directory)
+        if not self.directory.is_dir():
+            raise ValueError(f"Watch directory not found: {directory}")
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.suffix = suffix
+        self.method = method
+        self.output_format = output_format
+        self.preset = preset
+        self.max_workers = max(1, max_workers or 1)
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.skip_transparent = skip_transparent
+        self.processor = processor or GIFProcessor(log_level=log_level)
+        self.remover = remover or BackgroundRemover(log_level=log_level)
+        self.kwargs = kwargs
+
+        self._pending = {}    # path -> (size, mtime_ns, time the signature was first seen)
+        self._in_flight = set()
+        self._done = {}       # path -> (size, mtime_ns) that was processed
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+
+    def output_path_for(self, input_path) -> Path:
+        output_path = create_output_path(input_path, self.suffix).with_suffix(OUTPUT_SUFFIXES[self.output_format])
+        if self.output_dir is not None:
+            output_path = self.output_dir / output_path.name
+        return output_path
+
+    def _wants(self, path: Path) -> bool:
+        """Whether a directory entry is an input GIF (not one of our outputs)"""
+        return (path.suffix.lower() == '.gif'
+                and not path.name.startswith('.')
+                and not path.stem.endswith(self.suffix))
+
+    def process_file(self, input_path) -> Path:
+        """Remove the background from one GIF using the resident remover"""
+        # Write under a temporary name so consumers never see a partial output
+        output_path = self.output_path_for(input_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_name(output_path.name + '.part')
+
+        if (self.skip_transparent and self.output_format == 'gif'
+                and can_copy_unchanged(self.processor, self.remover, str(input_path), self.method, **self.kwargs)):
+            self.logger.info(f"⏭️  {Path(input_path).name} already has a transparent background; copying it unchanged")
+            shutil.copyfile(input_path, tmp_path)
+            os.replace(str(tmp_path), str(output_path))
+            return output_path
+
+        frames, durations = self.processor.extract_frames(str(input_path))
+        kwargs = dict(self.kwargs)
+
+        if self.method in ('color', 'auto') and 'target_color' not in kwargs:
+            detected = self.remover.detect_background_color(frames)
+            if detected['colors']:
+                kwargs['target_color'] = detected['colors'][0]
+                kwargs.setdefault('tolerance', detected['tolerance'])
+
+        # Files already run in parallel; frames of one file only when there is one file worker
+        frame_workers = None if self.max_workers == 1 else 1
+        processed = self.remover.process_frames(frames, self.method, max_workers=frame_workers, **kwargs)
+
+        with open(tmp_path, 'wb') as f:
+            self.processor.save_animation(processed, durations, f, output_format=self.output_format,
+                                          preset=self.preset, max_workers=frame_workers)
+        os.replace(str(tmp_path), str(output_path))
+        return output_path
+
+    def _run_job(self, path: Path, signature) -> None:
+        try:
+            output_path = self.process_file(path)
+            self.logger.info(f"✅ {path.name} → {output_path}")
+            with self._lock:
+                self.processed += 1
+        except Exception as e:
+            self.logger.error(f"❌ Failed to process {path}: {e}")
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                self._in_flight.discard(path)
+                self._done[path] = signature
+
+    def _note(self, path: Path) -> None:
+        """Start (or keep) debouncing a candidate file"""
+        if self._wants(path) and path not in self._pending:
+            self._pending[path] = None
+
+    def _wait_for_changes(self, fd: Optional[int], timeout: float) -> None:
+        if fd is None:
+            time.sleep(timeout)
+            for path in self.directory.iterdir():
+                self._note(path)
+            return
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if ready:
+            for name in _inotify_read(fd):
+                self._note(self.directory / name)
+
+    def _ready_files(self) -> List[tuple]:
+        """Pending files whose size and mtime have settled"""
+        now = time.monotonic()
+        ready = []
+        for path, state in list(self._pending.items()):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                del self._pending[path]
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            with self._lock:
+                busy = path in self._in_flight
+                unchanged = self._done.get(path) == signature
+            if unchanged:
+                del self._pending[path]
+            elif busy:
+                continue  # Re-check once the running job has finished
+            elif state is None or state[:2] != signature:
+                self._pending[path] = signature + (now,)
+            elif stat.st_size > 0 and now - state[2] >= self.settle_time:
+                del self._pending[path]
+                ready.append((path, signature))
+        return ready
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> dict:
+        """
+        Watch the folder until stop_event is set (or KeyboardInterrupt)
+
+        GIFs already in the folder are processed first unless their output
+        exists and is newer than the input.
+
+        Returns:
+            Dictionary with 'processed' and 'failed' counts
+        """
+        stop_event = stop_event or threading.Event()
+        fd = _inotify_open(self.directory) if self.use_inotify else None
+        self.logger.info(f"👀 Watching {self.directory} ({'inotify' if fd is not None else 'polling'})")
+
+        for path in self.directory.iterdir():
+            if not self._wants(path):
+                continue
+            output_path = self.output_path_for(path)
+            stat = path.stat()
+            if output_path.exists() and output_path.stat().st_mtime_ns >= stat.st_mtime_ns:
+                # Up to date: remember it so polling does not pick it up again
+                self._done[path] = (stat.st_size, stat.st_mtime_ns)
+            else:
+                self._note(path)
+
+        tick = max(0.01, min(self.poll_interval, self.settle_time / 2 or self.poll_interval))
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='gif-watch')
+        try:
+            while not stop_event.is_set():
+                self._wait_for_changes(fd, tick)
+                for path, signature in self._ready_files():
+                    with self._lock:
+                        self._in_flight.add(path)
+                    executor.submit(self._run_job, path, signature)
+        finally:
+            executor.shutdown(wait=True)
+            if fd is not None:
+                os.close(fd)
+
+        return {'processed': self.processed, 'failed': self.failed}
@@ -0,0 +1,31 @@
+"""Shared fixtures for the test modules"""
+import tempfile
+
+from PIL import Image
+
+def write_test_gif(path=None, num_frames=4, size=(40, 40), step=1, duration=100):
+    """
+    Write a white-background GIF with a red square moving right
+
+    Args:
+        path: Output path (default: a new temporary .gif file)
+        num_frames: Number of frames
+        size: Frame size (width, height)
+        step: Pixels the 10x10 square moves per frame, starting at (5, 10)
+        duration: Frame duration in ms, or a list of per-frame durations
+
+    Returns:
+        The path the GIF was written to
+    """
+    if path is None:
+        with tempfile.NamedTemporaryFile(suffix='.gif', delete=False) as f:
+            path = f.name
+
+    frames = []
+    for i in range(num_frames):
+        img = Image.new('RGB', size, color=(255, 255, 255))
+        img.paste((255, 0, 0), (5 + i * step, 10, 15 + i * step, 20))
+        frames.append(img)
+    frames[0].save(path, format='GIF', save_all=True,
+                   append_images=frames[1:], duration=duration, loop=0)
+    return path
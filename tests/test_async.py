@@ -0,0 +1,100 @@
+import unittest
+from pathlib import Path
+import asyncio
+import sys
+import os
+import threading
+import time
+
+# Add the parent directory to Python path to import src modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.async_api import AsyncGIFProcessor
+from src.background_remover import BackgroundRemover
+from src.methods import MethodRegistry, RemovalMethod
+from tests.helpers import write_test_gif
+from PIL import Image
+import numpy as np
+
+class TestAsyncAPI(unittest.TestCase):
+    
+    def setUp(self):
+        self.async_processor = AsyncGIFProcessor(max_concurrency=2)
+    
+    def tearDown(self):
+        self.async_processor.close()
+    
+    def test_process_gif(self):
+        """Test the full async pipeline with several GIFs in flight"""
+        inputs = [write_test_gif(duration=80) for _ in range(3)]
+        outputs = [path.replace('.gif', '_out.gif') for path in inputs]
+        progress = []
+        
+        async def run():
+            return await asyncio.gather(*[
+                self.async_processor.process_gif(
+                    src, dst, method='color',
+                    progress_callback=lambda done, total: progress.append((done, total)))
+                for src, dst in zip(inputs, outputs)
+            ])
+        
+        try:
+            results = asyncio.run(run())
+            self.assertEqual(results, outputs)
+            self.assertEqual(len(progress), 12)
+            for path in outputs:
+                with Image.open(path) as gif:
+                    self.assertEqual(gif.n_frames, 4)
+        finally:
+            for path in inputs + outputs:
+                if os.path.exists(path):
+                    os.unlink(path)
+    
+    def test_iterator_order_and_cancellation(self):
+        """Test that frames are yielded in order and the iterator can stop early"""
+        frames = [Image.new('RGBA', (20, 20), color=(255, 255, 255, 255)) for _ in range(6)]
+        
+        async def run():
+            seen = []
+            iterator = self.async_processor.iter_processed_frames(
+                frames, method='color', target_color=(255, 255, 255))
+            async for index, frame in iterator:
+                seen.append(index)
+                self.assertEqual(np.array(frame)[0, 0, 3], 0)
+                if index == 2:
+                    break
+            await iterator.aclose()
+            return seen
+        
+        self.assertEqual(asyncio.run(run()), [0, 1, 2])
+    
+    def test_serial_methods_run_one_at_a_time(self):
+        """Test that only "thread" methods run frames concurrently"""
+        lock = threading.Lock()
+        active = {'now': 0, 'max': 0}
+        
+        def slow_identity(remover, image):
+            with lock:
+                active['now'] += 1
+                active['max'] = max(active['max'], active['now'])
+            time.sleep(0.05)
+            with lock:
+                active['now'] -= 1
+            return image.convert('RGBA')
+        
+        registry = MethodRegistry()
+        registry.register(RemovalMethod('model', slow_identity, parallelism='internal'))
+        registry.register(RemovalMethod('numpy', slow_identity, parallelism='thread'))
+        frames = [Image.new('RGB', (8, 8))] * 4
+        
+        for method, expected in (('model', 1), ('numpy', 2)):
+            active['max'] = 0
+            processor = AsyncGIFProcessor(max_concurrency=2, remover=BackgroundRemover(methods=registry))
+            try:
+                asyncio.run(processor.process_frames(frames, method))
+            finally:
+                processor.close()
+            self.assertEqual(active['max'], expected, method)
+
+if __name__ == '__main__':
+    unittest.main()
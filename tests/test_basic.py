@@ -1,7 +1,10 @@
 import unittest
 from pathlib import Path
 import os
-from src.utils import validate_gif, create_output_path
+import io
+import tempfile
+from PIL import Image
+from src.utils import validate_gif, inspect_gif, create_output_path
 
 class TestBasicFunctions(unittest.TestCase):
     
@@ -10,6 +13,50 @@ class TestBasicFunctions(unittest.TestCase):
         self.assertFalse(is_valid)
         self.assertIn("not found", message)
     
+    def test_validate_gif_magic_bytes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fake = Path(tmp) / "fake.gif"
+            fake.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 32)
+            is_valid, message = validate_gif(fake)
+            self.assertFalse(is_valid)
+            self.assertIn("header", message)
+    
+    def test_validate_gif_structure_and_limits(self):
+        buffer = io.BytesIO()
+        frames = [Image.new('RGB', (30, 20), (i * 50, 0, 0)) for i in range(4)]
+        frames[0].save(buffer, format='GIF', save_all=True, append_images=frames[1:])
+        data = buffer.getvalue()
+        
+        info = inspect_gif(data)
+        self.assertEqual((info['width'], info['height'], info['frame_count']), (30, 20, 4))
+        
+        self.assertTrue(validate_gif(data)[0])
+        self.assertFalse(validate_gif(data, max_dimension=25)[0])
+        self.assertFalse(validate_gif(data, max_frames=3)[0])
+        self.assertFalse(validate_gif(data, max_pixels=30 * 20 * 3)[0])
+        self.assertTrue(validate_gif(data, max_dimension=30, max_frames=4, max_pixels=30 * 20 * 4)[0])
+        
+        # Truncated in the middle of the image data
+        is_valid, message = validate_gif(data[:len(data) // 2])
+        self.assertFalse(is_valid)
+        self.assertIn("Truncated", message)
+    
+    def test_validate_gif_padding_before_trailer(self):
+        buffer = io.BytesIO()
+        frames = [Image.new('RGB', (30, 20), (i * 50, 0, 0)) for i in range(3)]
+        frames[0].save(buffer, format='GIF', save_all=True, append_images=frames[1:])
+        data = buffer.getvalue()
+        # Zero padding before the trailer, which Pillow decodes without complaint
+        padded = data[:-1] + b'\x00\x00' + data[-1:]
+        with Image.open(io.BytesIO(padded)) as gif:
+            self.assertEqual(gif.n_frames, 3)
+        
+        self.assertEqual(inspect_gif(padded)['frame_count'], 3)
+        self.assertTrue(validate_gif(padded)[0])
+        
+        # Padding alone is still not a GIF
+        self.assertFalse(validate_gif(data[:13] + b'\x00\x00' + b';')[0])
+    
     def test_create_output_path(self):
         input_path = "test/test.gif"
         output_path = create_output_path(input_path)
@@ -0,0 +1,133 @@
+import unittest
+from pathlib import Path
+import tempfile
+import shutil
+import sys
+
+# Add the parent directory to Python path to import src modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.batch import BatchRunner, FrameCheckpoint, JobJournal, file_sha256, settings_key
+from src.gif_processor import GIFProcessor
+from tests.helpers import write_test_gif
+from PIL import Image
+import numpy as np
+
+class TestBatch(unittest.TestCase):
+    
+    def setUp(self):
+        self.work_dir = Path(tempfile.mkdtemp())
+    
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+    
+    def test_completed_outputs_skipped(self):
+        """Test a rerun skips finished GIFs and redoes ones whose settings changed"""
+        # Identical content under two names still gives two outputs
+        inputs = [write_test_gif(self.work_dir / name, size=(30, 30)) for name in ('a.gif', 'b.gif')]
+        journal = self.work_dir / 'out' / 'journal.jsonl'
+        
+        stats = BatchRunner(journal).run(inputs, output_dir=self.work_dir / 'out', method='color')
+        self.assertEqual(len(stats['processed']), 2)
+        self.assertTrue((self.work_dir / 'out' / 'a_nobg.gif').exists())
+        
+        # A fresh runner (as after a crash) reads the journal back
+        stats = BatchRunner(journal).run(inputs, output_dir=self.work_dir / 'out', method='color')
+        self.assertEqual(len(stats['skipped']), 2)
+        self.assertEqual(stats['processed'], [])
+        
+        # Missing outputs and different settings are reprocessed
+        (self.work_dir / 'out' / 'a_nobg.gif').unlink()
+        stats = BatchRunner(journal).run(inputs, output_dir=self.work_dir / 'out', method='color')
+        self.assertEqual(stats['processed'], [str(inputs[0])])
+        stats = BatchRunner(journal).run(inputs, output_dir=self.work_dir / 'out', method='color', tolerance=10)
+        self.assertEqual(len(stats['processed']), 2)
+    
+    def test_frame_checkpoint_resume(self):
+        """Test only frames missing from the checkpoint are recomputed"""
+        input_path = write_test_gif(self.work_dir / 'long.gif', num_frames=6, size=(30, 30))
+        runner = BatchRunner(self.work_dir / 'journal.jsonl', checkpoint_min_frames=4, chunk_size=2)
+        input_hash = file_sha256(input_path)
+        key = settings_key({'method': 'color'})
+        
+        # Simulate an interrupted run that finished frames 0-3
+        checkpoint = FrameCheckpoint(runner.checkpoint_dir / f"{input_hash[:16]}_{key}_long_nobg")
+        for index in range(4):
+            checkpoint.save(index, Image.new('RGBA', (30, 30), (0, 255, 10 * index, 255)))
+        
+        calls = []
+        process_frames = runner.remover.process_frames
+        def counting_process_frames(frames, method, **kwargs):
+            calls.append(len(frames))
+            return process_frames(frames, method, **kwargs)
+        runner.remover.process_frames = counting_process_frames
+        
+        output_path = self.work_dir / 'long_nobg.gif'
+        runner.process_one(input_path, output_path, input_hash, key, method='color')
+        self.assertEqual(calls, [2])
+        self.assertFalse(checkpoint.directory.exists())
+        
+        with Image.open(output_path) as gif:
+            self.assertEqual(gif.n_frames, 6)
+            first = np.array(gif.convert('RGBA'))
+            self.assertEqual(tuple(first[0, 0, :3]), (0, 255, 0))
+            gif.seek(5)
+            last = np.array(gif.convert('RGBA'))
+            self.assertEqual(last[0, 0, 3], 0)
+    
+    def test_transparent_input_copied(self):
+        """Test inputs that already have a transparent background are copied, not reprocessed"""
+        first = BatchRunner(self.work_dir / 'journal.jsonl').run(
+            [write_test_gif(self.work_dir / 'a.gif', size=(30, 30))], output_dir=self.work_dir / 'pass1', method='color')
+        self.assertEqual(len(first['processed']), 1)
+        processed = self.work_dir / 'pass1' / 'a_nobg.gif'
+        
+        runner = BatchRunner(self.work_dir / 'journal.jsonl')
+        # Copied inputs are never fully decoded
+        runner.processor.extract_frames = None
+        stats = runner.run([processed], output_dir=self.work_dir / 'pass2', method='color')
+        self.assertEqual(len(stats['processed']), 1)
+        self.assertEqual((self.work_dir / 'pass2' / 'a_nobg_nobg.gif').read_bytes(), processed.read_bytes())
+    
+    def test_resize_settings_in_key(self):
+        """Test changing the decode-time scale reprocesses instead of skipping"""
+        input_path = write_test_gif(self.work_dir / 'a.gif', size=(30, 30))
+        journal = self.work_dir / 'journal.jsonl'
+        output_path = self.work_dir / 'out' / 'a_nobg.gif'
+        
+        BatchRunner(journal, processor=GIFProcessor(scale=0.5)).run(
+            [input_path], output_dir=self.work_dir / 'out', method='color')
+        with Image.open(output_path) as gif:
+            self.assertEqual(gif.size, (15, 15))
+        
+        stats = BatchRunner(journal, processor=GIFProcessor()).run(
+            [input_path], output_dir=self.work_dir / 'out', method='color')
+        self.assertEqual(len(stats['processed']), 1)
+        with Image.open(output_path) as gif:
+            self.assertEqual(gif.size, (30, 30))
+    
+    def test_output_format(self):
+        """Test batch outputs use the requested format and matching extension"""
+        input_path = write_test_gif(self.work_dir / 'a.gif', size=(30, 30))
+        stats = BatchRunner(self.work_dir / 'journal.jsonl').run(
+            [input_path], output_dir=self.work_dir / 'out', method='color', output_format='webp', preset='fast')
+        self.assertEqual(len(stats['processed']), 1)
+        with Image.open(self.work_dir / 'out' / 'a_nobg.webp') as output:
+            self.assertEqual(output.format, 'WEBP')
+            self.assertEqual(output.n_frames, 4)
+    
+    def test_journal_ignores_partial_line(self):
+        """Test a truncated final journal line (crash mid-write) is ignored"""
+        journal_path = self.work_dir / 'journal.jsonl'
+        output = write_test_gif(self.work_dir / 'done.gif', size=(30, 30))
+        journal = JobJournal(journal_path)
+        journal.mark_done('in.gif', 'abc', 'key', output)
+        with open(journal_path, 'a', encoding='utf-8') as f:
+            f.write('{"status": "done", "inpu')
+        
+        reloaded = JobJournal(journal_path)
+        self.assertTrue(reloaded.is_done('abc', 'key', output))
+        self.assertFalse(reloaded.is_done('abc', 'other', output))
+
+if __name__ == '__main__':
+    unittest.main()
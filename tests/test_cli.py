@@ -0,0 +1,100 @@
+import unittest
+from pathlib import Path
+import tempfile
+import shutil
+import subprocess
+import sys
+import json
+
+from tests.helpers import write_test_gif
+from PIL import Image
+
+MAIN = Path(__file__).parent.parent / 'main.py'
+
+class TestCLI(unittest.TestCase):
+    
+    def setUp(self):
+        self.work_dir = Path(tempfile.mkdtemp())
+    
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+    
+    def run_main(self, *args):
+        return subprocess.run([sys.executable, str(MAIN)] + [str(a) for a in args],
+                              cwd=self.work_dir, capture_output=True, text=True, timeout=120)
+    
+    def test_sprite_sheet_path(self):
+        """Test --sprite-sheet PATH keeps the chosen name and writes a manifest next to it"""
+        input_path = write_test_gif(self.work_dir / 'input.gif', size=(40, 30))
+        result = self.run_main(input_path, '--method', 'color', '--sprite-sheet', 'atlas.png')
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        
+        with Image.open(self.work_dir / 'atlas.png') as sheet:
+            self.assertEqual(sheet.mode, 'RGBA')
+        manifest = json.loads((self.work_dir / 'atlas.json').read_text(encoding='utf-8'))
+        self.assertEqual(manifest['image'], 'atlas.png')
+        self.assertEqual(len(manifest['frames']), 4)
+
+    def test_transparent_input_copy_respects_limits(self):
+        """Test an already-transparent input is copied, but never past the input limits"""
+        input_path = write_test_gif(self.work_dir / 'input.gif', num_frames=5, size=(40, 30))
+        result = self.run_main(input_path, '--method', 'color', '-o', 'pass1.gif')
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        
+        result = self.run_main('pass1.gif', '-o', 'pass2.gif')
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn('Copied input unchanged', result.stdout)
+        self.assertEqual((self.work_dir / 'pass2.gif').read_bytes(), (self.work_dir / 'pass1.gif').read_bytes())
+        
+        result = self.run_main('pass1.gif', '-o', 'pass3.gif', '--max-frames', '2')
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('Too many frames', result.stdout)
+        self.assertFalse((self.work_dir / 'pass3.gif').exists())
+
+    def test_target_size_requires_gif(self):
+        """Test --target-size is rejected for WebP/APNG output instead of being ignored"""
+        input_path = write_test_gif(self.work_dir / 'input.gif', size=(40, 30))
+        result = self.run_main(input_path, '--method', 'color', '--format', 'webp', '--target-size', '5')
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('--target-size only applies to GIF output', result.stdout)
+
+    def test_unknown_output_extension_rejected(self):
+        """Test an output name the encoders cannot produce is rejected up front"""
+        input_path = write_test_gif(self.work_dir / 'input.gif', size=(40, 30))
+        result = self.run_main(input_path, '--method', 'color', '-o', 'clip.mp4')
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("Unsupported output extension '.mp4'", result.stdout)
+        self.assertFalse((self.work_dir / 'clip.mp4').exists())
+
+    def test_transparent_input_with_explicit_key_processed(self):
+        """Test an explicit key color still removes it from an already-transparent input"""
+        # Transparent border (index 0) around a white block (1) with a red square (2)
+        frame = Image.new('P', (40, 30), 0)
+        frame.putpalette([0, 0, 0, 255, 255, 255, 220, 0, 0])
+        frame.paste(1, (5, 5, 35, 25))
+        frame.paste(2, (15, 10, 25, 20))
+        frame.save(self.work_dir / 'keyed.gif', transparency=0)
+        
+        result = self.run_main('keyed.gif', '--method', 'color', '--color', '255', '255', '255', '-o', 'out.gif')
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertNotIn('Copied input unchanged', result.stdout)
+        with Image.open(self.work_dir / 'out.gif') as gif:
+            rgba = gif.convert('RGBA')
+            self.assertEqual(rgba.getpixel((7, 7))[3], 0)
+            self.assertEqual(rgba.getpixel((20, 15)), (220, 0, 0, 255))
+
+    def test_batch_rejects_single_file_options(self):
+        """Test options batch mode cannot honour fail instead of being dropped"""
+        input_path = write_test_gif(self.work_dir / 'input.gif', size=(40, 30))
+        result = self.run_main('--batch', input_path, '--trim', '--target-size', '5')
+        self.assertEqual(result.returncode, 2)
+        self.assertIn('--batch does not support --trim, --target-size', result.stderr)
+        
+        result = self.run_main('--batch', input_path, '--method', 'color', '--format', 'webp',
+                               '--output-dir', 'out')
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        with Image.open(self.work_dir / 'out' / 'input_nobg.webp') as output:
+            self.assertEqual(output.format, 'WEBP')
+
+if __name__ == '__main__':
+    unittest.main()
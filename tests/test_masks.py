@@ -0,0 +1,63 @@
+import unittest
+from pathlib import Path
+import tempfile
+import sys
+import os
+
+# Add the parent directory to Python path to import src modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.masks import save_masks, MaskFile, encode_mask, decode_mask, ENCODING_BITS, ENCODING_RLE
+from PIL import Image
+import numpy as np
+
+class TestMasks(unittest.TestCase):
+    
+    def test_encodings_roundtrip(self):
+        """Test RLE and packed-bit masks decode to the original alpha"""
+        rng = np.random.default_rng(0)
+        soft = rng.integers(0, 256, (9, 21)).astype(np.uint8)
+        binary = (rng.random((9, 21)) > 0.5).astype(np.uint8) * 255
+        
+        encoding, data = encode_mask(soft)
+        self.assertEqual(encoding, ENCODING_RLE)
+        np.testing.assert_array_equal(decode_mask(encoding, data, 21, 9), soft)
+        
+        encoding, data = encode_mask(binary)
+        self.assertEqual(encoding, ENCODING_BITS)
+        self.assertEqual(len(data), 9 * 3)
+        np.testing.assert_array_equal(decode_mask(encoding, data, 21, 9), binary)
+        
+        # A flat mask is a single run per row
+        encoding, data = encode_mask(np.zeros((50, 200), dtype=np.uint8), 'rle')
+        self.assertEqual(len(data), 4 + 50 * 3)
+    
+    def test_save_load_apply(self):
+        """Test masks are indexed per frame and re-applied to the original frames"""
+        originals, processed = [], []
+        for i in range(3):
+            rgb = np.full((16, 24, 3), 40 * i, dtype=np.uint8)
+            originals.append(Image.fromarray(rgb).convert('RGBA'))
+            alpha = np.zeros((16, 24), dtype=np.uint8)
+            alpha[4:8, i:i + 6] = 255 if i < 2 else 128
+            processed.append(Image.fromarray(np.dstack([rgb, alpha])))
+        
+        with tempfile.NamedTemporaryFile(suffix='.masks', delete=False) as f:
+            mask_path = f.name
+        try:
+            save_masks(processed, [100, 110, 120], mask_path)
+            masks = MaskFile(mask_path)
+            self.assertEqual(len(masks), 3)
+            self.assertEqual(masks.size, (24, 16))
+            self.assertEqual(masks.durations, [100, 110, 120])
+            np.testing.assert_array_equal(masks[2], np.asarray(processed[2])[:, :, 3])
+            
+            for result, expected in zip(masks.apply(originals), processed):
+                np.testing.assert_array_equal(np.asarray(result), np.asarray(expected))
+            with self.assertRaises(ValueError):
+                masks.apply(originals[:2])
+        finally:
+            os.unlink(mask_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from pathlib import Path
+import threading
+import sys
+
+# Add the parent directory to Python path to import src modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.background_remover import BackgroundRemover
+from src.methods import METHODS, MethodRegistry, RemovalMethod
+from PIL import Image
+import numpy as np
+
+class TestMethodRegistry(unittest.TestCase):
+    
+    def setUp(self):
+        self.remover = BackgroundRemover()
+    
+    def create_frame(self, fg_color=(255, 0, 0)):
+        """White frame with a colored square"""
+        img = Image.new('RGBA', (40, 40), (255, 255, 255, 255))
+        img.paste(fg_color + (255,), (10, 10, 30, 30))
+        return img
+    
+    def test_builtin_metadata(self):
+        """Test built-in methods declare their capabilities"""
+        for name in ('color', 'edges', 'ai', 'auto'):
+            self.assertIn(name, METHODS.names())
+        self.assertTrue(METHODS.get('color').batchable)
+        self.assertEqual(METHODS.get('color').cost, 'cheap')
+        self.assertEqual(METHODS.get('ai').parallelism, 'internal')
+        # auto can run the AI session, so it is scheduled like ai
+        self.assertEqual(METHODS.get('auto').parallelism, 'internal')
+    
+    def test_batch_matches_single_frame(self):
+        """Test the vectorized color batch gives the same result as per-frame"""
+        frames = [self.create_frame((i * 30, 0, 0)) for i in range(5)]
+        single = [self.remover.process_frame(f, 'color', target_color=(255, 255, 255), tolerance=20)
+                  for f in frames]
+        batched = self.remover.process_frames(frames, 'color', max_workers=2, batch_size=3,
+                                              target_color=(255, 255, 255), tolerance=20)
+        for a, b in zip(single, batched):
+            np.testing.assert_array_equal(np.array(a), np.array(b))
+    
+    def test_custom_method(self):
+        """Test a registered method is dispatched and its metadata honoured"""
+        registry = MethodRegistry()
+        threads = set()
+        
+        def invert_alpha(remover, image, strength=255):
+            threads.add(threading.get_ident())
+            arr = np.array(image)
+            arr[:, :, 3] = strength - arr[:, :, 3]
+            return Image.fromarray(arr)
+        
+        registry.register(RemovalMethod('invert', invert_alpha, cost='cheap',
+                                        parallelism='serial', params={'strength': 255}))
+        with self.assertRaises(ValueError):
+            registry.register(RemovalMethod('invert', invert_alpha))
+        
+        remover = BackgroundRemover(methods=registry)
+        results = remover.process_frames([self.create_frame()] * 4, 'invert', max_workers=4)
+        
+        self.assertEqual(np.array(results[0])[0, 0, 3], 0)
+        self.assertEqual(threads, {threading.get_ident()})  # Serial: run in the calling thread
+        self.assertEqual(remover.metrics.snapshot()['method.invert'], 4)
+    
+    def test_required_params(self):
+        """Test missing required parameters are reported"""
+        method = RemovalMethod('needs_key', lambda remover, image, key: image,
+                               params={'key': None}, required=('key',))
+        with self.assertRaises(ValueError):
+            method.resolve_params({})
+        self.assertEqual(method.resolve_params({'key': 1, 'other': 2}), {'key': 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from pathlib import Path
+import tempfile
+import shutil
+import sys
+import os
+import hashlib
+from unittest import mock
+
+# Add the parent directory to Python path to import src modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.background_remover import BackgroundRemover
+from src.onnx_backend import BUNDLED_TEST_MODEL, CACHE_ENV_VAR, ONNXSegmenter
+from PIL import Image
+import numpy as np
+
+try:
+    import onnxruntime
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+class TestONNXBackend(unittest.TestCase):
+    
+    def setUp(self):
+        self.remover = BackgroundRemover()
+    
+    def create_test_image(self):
+        """White background with a red square"""
+        img = Image.new('RGBA', (80, 60), (255, 255, 255, 255))
+        img.paste((200, 0, 0, 255), (20, 15, 60, 45))
+        return img
+    
+    @unittest.skipUnless(ONNX_AVAILABLE, "onnxruntime not installed")
+    def test_bundled_model(self):
+        """Test the offline backend with the bundled stand-in model"""
+        result = self.remover.process_frame(self.create_test_image(), method='onnx',
+                                            model_path=str(BUNDLED_TEST_MODEL), intra_op_threads=1)
+        alpha = np.array(result)[:, :, 3]
+        
+        self.assertEqual(result.size, (80, 60))
+        self.assertLess(alpha[2, 2], 32)     # Background
+        self.assertGreater(alpha[30, 40], 224)  # Foreground
+        self.assertNotIn('fallback.onnx_unavailable', self.remover.metrics.snapshot())
+    
+    @unittest.skipUnless(ONNX_AVAILABLE, "onnxruntime not installed")
+    def test_int8_model(self):
+        """Test the dynamically quantized variant is created and used"""
+        try:
+            import onnxruntime.quantization
+        except ImportError:
+            self.skipTest("onnxruntime quantization tools not installed")
+        
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.dict(os.environ, {CACHE_ENV_VAR: str(Path(tmp) / 'cache')}):
+            model_path = Path(tmp) / "model.onnx"
+            shutil.copy(BUNDLED_TEST_MODEL, model_path)
+            
+            result = self.remover.remove_background_onnx(self.create_test_image(),
+                                                         model_path=str(model_path), int8=True)
+            self.assertGreater(np.array(result)[30, 40, 3], 200)
+            # Written to the cache, never next to the source model
+            cached = list((Path(tmp) / 'cache').glob('model.*.int8.onnx'))
+            self.assertEqual(len(cached), 1)
+            self.assertEqual(sorted(p.name for p in Path(tmp).iterdir()), ['cache', 'model.onnx'])
+            self.assertEqual(ONNXSegmenter.quantize(str(model_path)), str(cached[0]))
+            
+            # Keyed by the source model's content, so a changed model gets a fresh copy
+            digest = hashlib.sha256(model_path.read_bytes()).hexdigest()[:16]
+            self.assertEqual(cached[0].name, f"model.{digest}.int8.onnx")
+    
+    def test_missing_model_falls_back(self):
+        """Test a missing model falls back to edge detection instead of failing"""
+        result = self.remover.remove_background_onnx(self.create_test_image(),
+                                                     model_path="does_not_exist.onnx")
+        self.assertEqual(result.mode, 'RGBA')
+        self.assertEqual(self.remover.metrics.snapshot()['fallback.onnx_unavailable'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
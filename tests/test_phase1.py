@@ -1,6 +1,7 @@
 import unittest
 from pathlib import Path
 import tempfile
+import io
 import sys
 import os
 
@@ -9,7 +10,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.gif_processor import GIFProcessor
 from src.background_remover import BackgroundRemover
-from PIL import Image
+from PIL import Image, ImageSequence
+import numpy as np
+import cv2
 
 class TestPhase1(unittest.TestCase):
     
@@ -82,5 +85,280 @@ class TestPhase1(unittest.TestCase):
         self.assertEqual(processed.mode, 'RGBA')
         self.assertEqual(processed.size, (50, 50))
 
+    def test_preview_contact_sheet(self):
+        """Test sampled low-resolution frames and contact sheet"""
+        gif_path = self.create_test_gif(num_frames=5)
+        processor = GIFProcessor(cache_size=1)
+        
+        try:
+            samples, indices = processor.sample_frames(gif_path, count=3, max_size=20)
+            self.assertEqual(indices, [0, 2, 4])
+            self.assertEqual(samples[0].size, (20, 20))
+            
+            # Second extraction comes from the cache
+            self.assertEqual(len(processor._frame_cache), 1)
+            frames, _ = processor.extract_frames(gif_path)
+            self.assertEqual(len(frames), 5)
+            
+            processed = [self.remover.process_frame(frame, method='edges') for frame in samples]
+            sheet = processor.create_contact_sheet(samples, processed, padding=2)
+            self.assertEqual(sheet.size, (3 * 22 + 2, 2 * 22 + 2))
+        finally:
+            if os.path.exists(gif_path):
+                os.unlink(gif_path)
+    
+    def test_in_memory_roundtrip(self):
+        """Test extracting from bytes and encoding back to bytes"""
+        gif_path = self.create_test_gif(num_frames=3)
+        
+        try:
+            with open(gif_path, 'rb') as f:
+                data = f.read()
+            
+            frames, durations = self.processor.extract_frames(data)
+            self.assertEqual(len(frames), 3)
+            self.assertEqual(self.processor.get_gif_info(io.BytesIO(data))['frame_count'], 3)
+            
+            encoded = self.processor.encode_gif(frames, durations)
+            self.assertTrue(encoded.startswith(b'GIF8'))
+            frames_again, _ = self.processor.extract_frames(io.BytesIO(encoded))
+            self.assertEqual(len(frames_again), 3)
+        finally:
+            if os.path.exists(gif_path):
+                os.unlink(gif_path)
+    
+    def test_webp_apng_output(self):
+        """Test WebP and APNG output keeps partial alpha and frame timing"""
+        frames = []
+        for i in range(3):
+            frame = np.zeros((20, 20, 4), dtype=np.uint8)
+            frame[5:10, i:i + 5] = (255, 0, 0, 100 + 50 * i)
+            frames.append(Image.fromarray(frame))
+        
+        self.assertEqual(self.processor.output_format_for('out.webp'), 'webp')
+        self.assertEqual(self.processor.output_format_for('out.png'), 'apng')
+        self.assertEqual(self.processor.output_format_for(io.BytesIO()), 'gif')
+        
+        for output_format in ('webp', 'apng'):
+            buffer = io.BytesIO()
+            self.processor.save_animation(frames, [100, 200, 300], buffer, output_format=output_format)
+            with Image.open(io.BytesIO(buffer.getvalue())) as animation:
+                self.assertEqual(animation.n_frames, 3)
+                for i in range(3):
+                    animation.seek(i)
+                    rgba = np.array(animation.convert('RGBA'))
+                    self.assertEqual(int(animation.info['duration']), 100 * (i + 1))
+                    self.assertEqual(rgba[7, i + 2, 3], 100 + 50 * i)
+                    self.assertEqual(rgba[0, 0, 3], 0)
+    
+    def test_trim_frames(self):
+        """Test cropping to the union bounding box across frames"""
+        frames = []
+        for i in range(3):
+            frame = np.zeros((50, 60, 4), dtype=np.uint8)
+            frame[10 + i * 5:15 + i * 5, 20 + i * 3:25 + i * 3] = (255, 0, 0, 255)
+            frames.append(Image.fromarray(frame))
+        
+        trimmed, box = self.processor.trim_frames(frames)
+        self.assertEqual(box, (20, 10, 31, 25))
+        self.assertTrue(all(frame.size == (11, 15) for frame in trimmed))
+        self.assertEqual(np.array(trimmed[2])[14, 10, 3], 255)
+        
+        _, box = self.processor.trim_frames(frames, padding=12)
+        self.assertEqual(box, (8, 0, 43, 37))
+        
+        empty = [Image.new('RGBA', (8, 8), (0, 0, 0, 0))]
+        self.assertEqual(self.processor.trim_frames(empty)[1], (0, 0, 8, 8))
+    
+    def test_sprite_sheet(self):
+        """Test packing trimmed, deduplicated frames into a sprite sheet"""
+        # Frames 0 and 2 show the same sprite at different positions; frame 4 is empty
+        placements = [((8, 5), 10, (0, 200, 0)), ((8, 6), 10, (0, 200, 50)),
+                      ((8, 7), 10, (0, 200, 0)), ((20, 20), 6, (255, 0, 0))]
+        frames = []
+        for (x, y), size, color in placements:
+            frame = np.zeros((40, 40, 4), dtype=np.uint8)
+            frame[y:y + size, x:x + size] = color + (255,)
+            frames.append(Image.fromarray(frame))
+        frames.append(Image.new('RGBA', (40, 40), (0, 0, 0, 0)))
+        
+        output = io.BytesIO()
+        manifest = self.processor.create_sprite_sheet(frames, [100, 110, 120, 130, 140], output)
+        output.seek(0)
+        with Image.open(output) as sheet:
+            self.assertEqual(sheet.mode, 'RGBA')
+            self.assertEqual(list(sheet.size), manifest['size'])
+            sheet = sheet.copy()
+        
+        entries = manifest['frames']
+        self.assertEqual(manifest['source_size'], [40, 40])
+        self.assertEqual([e['duration'] for e in entries], [100, 110, 120, 130, 140])
+        self.assertEqual(entries[0]['rect'], entries[2]['rect'])
+        self.assertEqual(entries[0]['offset'], [8, 5])
+        self.assertEqual(entries[2]['offset'], [8, 7])
+        self.assertEqual(entries[3]['rect'][2:], [6, 6])
+        self.assertEqual(entries[4]['rect'], [0, 0, 0, 0])
+        
+        # Every frame rebuilds exactly from its rect and offset
+        for frame, entry in zip(frames[:4], entries):
+            x, y, w, h = entry['rect']
+            rebuilt = Image.new('RGBA', (40, 40), (0, 0, 0, 0))
+            rebuilt.paste(sheet.crop((x, y, x + w, y + h)), tuple(entry['offset']))
+            self.assertTrue(np.array_equal(np.array(rebuilt), np.array(frame)))
+    
+    def test_check_transparency(self):
+        """Test detecting inputs whose background is already removed"""
+        gif_path = self.create_test_gif(num_frames=2)
+        frames = []
+        for i in range(3):
+            frame = np.zeros((30, 30, 4), dtype=np.uint8)
+            frame[8:20, 5 + i:17 + i] = (255, 0, 0, 255)
+            frames.append(Image.fromarray(frame))
+        transparent = io.BytesIO()
+        self.processor.create_gif(frames, [100] * 3, transparent)
+        
+        try:
+            # Opaque input: decided from the header alone
+            result = self.processor.check_transparency(gif_path)
+            self.assertFalse(result['has_transparency'])
+            self.assertEqual(result['frames_sampled'], 0)
+            self.assertFalse(result['already_transparent'])
+            
+            result = self.processor.check_transparency(transparent.getvalue())
+            self.assertTrue(result['already_transparent'])
+            self.assertTrue(result['can_copy'])
+            self.assertEqual(result['frames_sampled'], 3)
+            
+            # Resizing changes the output, so it is no longer a plain copy
+            resizing = GIFProcessor(scale=0.5)
+            self.assertFalse(resizing.check_transparency(transparent.getvalue())['can_copy'])
+            
+            # Limits apply before anything is decoded or copied
+            with self.assertRaises(ValueError):
+                GIFProcessor(max_frames=2).check_transparency(transparent.getvalue())
+        finally:
+            os.unlink(gif_path)
+    
+    def test_resize_after_decode(self):
+        """Test --max-size/--scale resizing is applied to decoded frames"""
+        gif_path = self.create_test_gif(num_frames=2)
+        
+        try:
+            with Image.open(gif_path) as gif:
+                width, height = gif.size
+            
+            frames, _ = GIFProcessor(max_size=width // 2).extract_frames(gif_path)
+            self.assertEqual(max(frames[0].size), width // 2)
+            frames, _ = GIFProcessor(scale=0.25).extract_frames(gif_path)
+            self.assertEqual(frames[0].size, (round(width * 0.25), round(height * 0.25)))
+            # max_size never upscales
+            frames, _ = GIFProcessor(max_size=width * 4).extract_frames(gif_path)
+            self.assertEqual(frames[0].size, (width, height))
+            streamed = [frame for frame, _ in GIFProcessor(scale=0.5).iter_frames(gif_path)]
+            self.assertEqual(streamed[0].size, (round(width * 0.5), round(height * 0.5)))
+        finally:
+            if os.path.exists(gif_path):
+                os.unlink(gif_path)
+    
+    def test_encode_to_budget(self):
+        """Test the size search fits the budget and reports its settings"""
+        yy, xx = np.mgrid[:60, :80]
+        frames = []
+        for i in range(6):
+            rgb = np.dstack([(xx * 3 + i * 20) % 256, (yy * 4) % 256, ((xx + yy) * 5 + i) % 256])
+            alpha = np.full((60, 80), 255)
+            alpha[:, :10] = 0
+            frames.append(Image.fromarray(np.dstack([rgb, alpha]).astype(np.uint8)))
+        durations = [100] * 6
+        
+        full = len(self.processor.encode_gif([self.processor.quantize_frame(f) for f in frames], durations))
+        data, chosen = self.processor.encode_to_budget(frames, durations, full // 3)
+        self.assertTrue(chosen['fits'])
+        self.assertLessEqual(len(data), full // 3)
+        self.assertEqual(chosen['bytes'], len(data))
+        
+        with Image.open(io.BytesIO(data)) as gif:
+            self.assertEqual(gif.n_frames, len(range(0, 6, chosen['decimation'])))
+            self.assertEqual(gif.size, (round(80 * chosen['scale']), round(60 * chosen['scale'])))
+            self.assertEqual(sum(f.info['duration'] for f in ImageSequence.Iterator(gif)), 600)
+        
+        # An impossible budget still returns the smallest attempt
+        data, chosen = self.processor.encode_to_budget(frames, durations, 10)
+        self.assertFalse(chosen['fits'])
+        self.assertEqual(chosen['bytes'], len(data))
+    
+    def test_quantize_dither(self):
+        """Test dithering changes the quantized pixels but not the palette size"""
+        yy, xx = np.mgrid[:48, :64]
+        rgba = np.dstack([xx * 4, yy * 5, np.full((48, 64), 90), np.full((48, 64), 255)]).astype(np.uint8)
+        frame = Image.fromarray(rgba)
+        
+        plain = np.array(self.processor.quantize_frame(frame, colors=16))
+        dithered = self.processor.quantize_frame(frame, colors=16, dither=True)
+        self.assertEqual(dithered.info['transparency'], 16)
+        self.assertLess(np.array(dithered).max(), 16)
+        self.assertGreater((np.array(dithered) != plain).sum(), 100)
+    
+    def test_video_input(self):
+        """Test video clips stream frames with durations from the frame rate"""
+        with tempfile.NamedTemporaryFile(suffix='.avi', delete=False) as f:
+            video_path = f.name
+        
+        try:
+            writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (32, 24))
+            if not writer.isOpened():
+                self.skipTest("No OpenCV video writer available")
+            for i in range(10):
+                writer.write(np.full((24, 32, 3), i * 20, dtype=np.uint8))
+            writer.release()
+            
+            frames, durations = self.processor.extract_frames(video_path)
+            self.assertEqual(len(frames), 10)
+            self.assertEqual(frames[0].mode, 'RGBA')
+            self.assertEqual(frames[0].size, (32, 24))
+            self.assertEqual(durations, [40] * 10)
+            self.assertEqual(self.processor.get_gif_info(video_path)['frame_count'], 10)
+            
+            # 25 fps → 10 fps keeps every 2.5th frame and the total duration
+            reduced = list(GIFProcessor(max_fps=10).iter_frames(video_path))
+            self.assertEqual(len(reduced), 4)
+            self.assertEqual(sum(duration for _, duration in reduced), 400)
+            
+            with self.assertRaises(ValueError):
+                GIFProcessor(max_frames=5).extract_frames(video_path)
+        finally:
+            os.unlink(video_path)
+    
+    def test_parallel_quantize_and_encode(self):
+        """Test parallel quantization and spliced encoding decode to the same frames"""
+        frames = [Image.new('RGBA', (30, 30), (0, 255, 20 * i, 255)) for i in range(3)]
+        for i in range(3):
+            frame = np.zeros((30, 30, 4), dtype=np.uint8)
+            frame[10:20, 5 + i:15 + i] = (255, 0, 0, 255)
+            frames.append(Image.fromarray(frame))
+        # A many-color frame needs a large local table
+        yy, xx = np.mgrid[:30, :30]
+        frames.append(Image.fromarray(np.dstack([xx * 8, yy * 8, (xx + yy) * 4, np.full((30, 30), 255)]).astype(np.uint8)))
+        durations = [50, 60, 70, 80, 90, 100, 110]
+        
+        decoded, sizes = {}, {}
+        for parallel_encode in (False, True):
+            buffer = io.BytesIO()
+            self.processor.create_gif(frames, durations, buffer, max_workers=3, parallel_encode=parallel_encode)
+            sizes[parallel_encode] = len(buffer.getvalue())
+            with Image.open(io.BytesIO(buffer.getvalue())) as gif:
+                decoded[parallel_encode] = [(np.array(f.convert('RGBA')), f.info['duration'])
+                                            for f in ImageSequence.Iterator(gif)]
+        
+        for (serial, serial_duration), (spliced, spliced_duration) in zip(decoded[False], decoded[True]):
+            np.testing.assert_array_equal(serial, spliced)
+            self.assertEqual(serial_duration, spliced_duration)
+        self.assertEqual([d for _, d in decoded[True]], durations)
+        # Local tables only hold the colors each frame uses
+        self.assertLess(sizes[True], sizes[False] * 1.5)
+        last = decoded[True][-2][0]
+        self.assertEqual(last[0, 0, 3], 0)
+        self.assertEqual(tuple(last[15, 10]), (255, 0, 0, 255))
+    
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -9,8 +9,12 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.gif_processor import GIFProcessor
 from src.background_remover import BackgroundRemover
+from src.utils import ProcessingCancelled
 from PIL import Image
 import numpy as np
+import threading
+import types
+from unittest import mock
 
 class TestPhase2(unittest.TestCase):
     
@@ -102,5 +106,196 @@ class TestPhase2(unittest.TestCase):
         self.assertEqual(result_color.mode, 'RGBA')
         self.assertEqual(result_edges.mode, 'RGBA')
 
+    def test_detect_background_color(self):
+        """Test background color detection from frame borders"""
+        frames = [
+            self.create_test_image_with_background(
+                bg_color=(10, 120, 200),
+                fg_color=(255, 255, 0),
+                shape='square'
+            )
+            for _ in range(4)
+        ]
+        
+        detected = self.remover.detect_background_color(frames)
+        
+        self.assertEqual(detected['colors'][0], (10, 120, 200))
+        self.assertGreater(detected['shares'][0], 0.9)
+        self.assertGreater(detected['tolerance'], 0)
+        
+        # Color method without a target color should key out the detected color
+        result = np.array(self.remover.remove_background_adaptive(frames[0], method='color'))
+        self.assertEqual(result[0, 0, 3], 0)
+        self.assertEqual(result[25, 25, 3], 255)
+
+    def test_process_frames_parallel(self):
+        """Test parallel frame processing keeps order and reports progress"""
+        frames = [
+            self.create_test_image_with_background(
+                bg_color=(255, 255, 255),
+                fg_color=(i * 40, 0, 0),
+                shape='square'
+            )
+            for i in range(6)
+        ]
+        progress = []
+        
+        results = self.remover.process_frames(
+            frames, method='color', max_workers=3,
+            progress_callback=lambda done, total: progress.append((done, total)),
+            target_color=(255, 255, 255)
+        )
+        
+        self.assertEqual(len(results), 6)
+        self.assertEqual(progress[-1], (6, 6))
+        for i, result in enumerate(results):
+            self.assertEqual(result.getpixel((25, 25)), (i * 40, 0, 0, 255))
+            self.assertEqual(result.getpixel((0, 0))[3], 0)
+    
+    def test_process_frames_cancel(self):
+        """Test that a set cancel event stops processing"""
+        frames = [Image.new('RGBA', (20, 20), (255, 255, 255, 255)) for _ in range(4)]
+        cancel_event = threading.Event()
+        cancel_event.set()
+        
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                with self.assertRaises(ProcessingCancelled):
+                    self.remover.process_frames(frames, method='color', max_workers=workers,
+                                                cancel_event=cancel_event)
+
+    def test_process_frames_fast(self):
+        """Test keyframe fast mode preserves frame count and total duration"""
+        frames = [
+            self.create_test_image_with_background(
+                bg_color=(255, 255, 255),
+                fg_color=(255, 0, 0),
+                shape='circle'
+            )
+            for _ in range(7)
+        ]
+        durations = [50, 60, 70, 80, 90, 100, 110]
+        
+        for mode in ('reuse', 'interpolate'):
+            with self.subTest(mode=mode):
+                results, out_durations = self.remover.process_frames_fast(
+                    frames, durations, method='color', keyframe_interval=3,
+                    skip_mode=mode, target_color=(255, 255, 255))
+                self.assertEqual(len(results), 7)
+                self.assertEqual(out_durations, durations)
+                for result in results:
+                    alpha = np.array(result)[:, :, 3]
+                    self.assertEqual(alpha[0, 0], 0)
+                    self.assertEqual(alpha[25, 25], 255)
+        
+        results, out_durations = self.remover.process_frames_fast(
+            frames, durations, method='color', keyframe_interval=3,
+            skip_mode='drop', target_color=(255, 255, 255))
+        self.assertEqual(len(results), 3)
+        self.assertEqual(out_durations, [180, 270, 110])
+        self.assertEqual(sum(out_durations), sum(durations))
+
+    def test_ai_session_reused(self):
+        """Test the rembg session is created once and passed to every frame"""
+        session = object()
+        fake_rembg = types.ModuleType('rembg')
+        fake_rembg.new_session = mock.Mock(return_value=session)
+        fake_rembg.remove = mock.Mock(side_effect=lambda image, session=None: image.convert('RGBA'))
+        
+        with mock.patch.dict(sys.modules, {'rembg': fake_rembg}):
+            remover = BackgroundRemover()
+            frames = [Image.new('RGB', (20, 20), (i * 40, 0, 0)) for i in range(4)]
+            remover.process_frames(frames, method='ai', max_workers=2)
+        
+        fake_rembg.new_session.assert_called_once_with()
+        self.assertEqual(fake_rembg.remove.call_count, 4)
+        self.assertTrue(all(call.kwargs['session'] is session for call in fake_rembg.remove.call_args_list))
+    
+    def test_run_metrics(self):
+        """Test per-frame events are aggregated into run counters"""
+        frames = [Image.new('RGBA', (20, 20), (255, 255, 255, 255)) for _ in range(3)]
+        self.remover.process_frames(frames, method='color', max_workers=2)
+        self.remover.process_frame(frames[0], method='edges')
+        
+        summary = self.remover.log_summary()
+        self.assertEqual(summary['frames'], 4)
+        self.assertEqual(summary['method.color'], 3)
+        self.assertEqual(summary['method.edges'], 1)
+        self.assertEqual(self.remover.metrics.snapshot(), {})
+
+    def test_tiled_removal(self):
+        """Test tiled processing matches whole-frame color keying"""
+        img = Image.new('RGBA', (300, 200), (255, 255, 255, 255))
+        img.paste((0, 0, 200, 255), (40, 30, 260, 170))
+        
+        whole = self.remover.remove_background_color_based(img, (255, 255, 255), 40)
+        tiled = self.remover.process_frame(img, method='color', target_color=(255, 255, 255),
+                                           tolerance=40, tile_size=128, tile_overlap=16, tile_workers=2)
+        
+        np.testing.assert_array_equal(np.array(tiled), np.array(whole))
+        self.assertEqual(self.remover.metrics.snapshot()['tiles'], 6)
+    
+    def test_mask_refinement(self):
+        """Test guided-filter refinement softens edges and cleanup drops specks"""
+        img = Image.new('RGBA', (120, 80), (255, 255, 255, 255))
+        img.paste((200, 30, 30, 255), (30, 20, 90, 60))
+        img.putpixel((5, 5), (0, 0, 0, 255))  # Isolated speck
+        
+        hard = self.remover.process_frame(img, method='color', target_color=(255, 255, 255), tolerance=30)
+        self.assertEqual(set(np.unique(np.array(hard)[:, :, 3])), {0, 255})
+        
+        for frames in ([img], [img, img]):  # Single-frame and batched paths
+            refined = self.remover.process_frames(frames, method='color', target_color=(255, 255, 255),
+                                                  tolerance=30, refine_radius=3, morph_kernel=3)
+            alpha = np.array(refined[0])[:, :, 3]
+            self.assertEqual(alpha[5, 5], 0)
+            self.assertEqual(alpha[40, 60], 255)
+            self.assertEqual(alpha[40, 2], 0)
+            # Soft values only appear along the object's border
+            soft = (alpha > 0) & (alpha < 255)
+            self.assertTrue(soft.any())
+            self.assertFalse(soft[:, :25].any())
+    
+    def test_stabilize_masks(self):
+        """Test temporal filtering removes one-frame flicker in static regions"""
+        frames = []
+        for i in range(5):
+            frame = np.full((10, 10, 4), 255, dtype=np.uint8)
+            frame[:, :5, 3] = 0
+            if i == 2:
+                frame[0, 0, 3] = 255  # Single-frame flicker
+            frame[5, 7, 3] = 250 if i % 2 else 255  # Small alpha jitter
+            frames.append(Image.fromarray(frame))
+        
+        for mode in ('median', 'majority'):
+            stable = self.remover.stabilize_masks(frames, window=3, mode=mode)
+            alphas = np.stack([np.array(frame)[:, :, 3] for frame in stable])
+            self.assertTrue((alphas[:, 0, 0] == 0).all())
+            self.assertTrue((alphas[:, 5, 9] == 255).all())
+        
+        stable = self.remover.stabilize_masks(frames, window=1, hysteresis=8)
+        alphas = np.stack([np.array(frame)[:, :, 3] for frame in stable])
+        self.assertTrue((alphas[:, 5, 7] == 255).all())
+        # Large changes still pass through
+        self.assertEqual(alphas[2, 0, 0], 255)
+        
+        with self.assertRaises(ValueError):
+            self.remover.stabilize_masks(frames, window=2)
+    
+    def test_reduced_size_removal(self):
+        """Test removal at a reduced scale still yields a full-size mask"""
+        img = Image.new('RGBA', (200, 120), (255, 255, 255, 255))
+        img.paste((0, 0, 200, 255), (40, 20, 160, 100))
+        
+        for frames in ([img], [img, img]):
+            results = self.remover.process_frames(frames, method='color', target_color=(255, 255, 255),
+                                                  tolerance=40, removal_scale=0.25)
+            result = np.array(results[0])
+            self.assertEqual(result.shape, (120, 200, 4))
+            self.assertEqual(result[5, 5, 3], 0)
+            self.assertEqual(result[60, 100, 3], 255)
+            # Colors stay at full resolution
+            np.testing.assert_array_equal(result[..., :3], np.array(img)[..., :3])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,65 @@
+import unittest
+from pathlib import Path
+import threading
+import sys
+import os
+
+# Add the parent directory to Python path to import src modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pipeline import GIFPipeline
+from src.utils import ProcessingCancelled
+from tests.helpers import write_test_gif
+from PIL import Image
+import numpy as np
+
+class TestPipeline(unittest.TestCase):
+    
+    def setUp(self):
+        self.pipeline = GIFPipeline(max_workers=3, queue_size=2)
+    
+    def test_pipeline_output(self):
+        """Test frames come out complete, in order and with their durations"""
+        input_path = write_test_gif(num_frames=8, step=2, duration=[40 + 10 * i for i in range(8)])
+        output_path = input_path.replace('.gif', '_out.gif')
+        progress = []
+        
+        try:
+            stats = self.pipeline.run(input_path, output_path, method='color',
+                                      progress_callback=lambda done, total: progress.append(done))
+            self.assertEqual(stats['frames'], 8)
+            self.assertEqual(progress, list(range(1, 9)))
+            
+            with Image.open(output_path) as gif:
+                for i in range(8):
+                    gif.seek(i)
+                    self.assertEqual(gif.info['duration'], 40 + 10 * i)
+                    frame = np.array(gif.convert('RGBA'))
+                    self.assertEqual(frame[0, 0, 3], 0)
+                    self.assertEqual(frame[15, 10 + i * 2, 3], 255)
+                    # Previous frame's square must not show through
+                    if i > 0:
+                        self.assertEqual(frame[15, 5 + (i - 1) * 2, 3], 0)
+        finally:
+            for path in (input_path, output_path):
+                if os.path.exists(path):
+                    os.unlink(path)
+    
+    def test_pipeline_cancel(self):
+        """Test that a set cancel event stops the pipeline"""
+        input_path = write_test_gif(num_frames=8, step=2)
+        output_path = input_path.replace('.gif', '_out.gif')
+        cancel_event = threading.Event()
+        cancel_event.set()
+        
+        try:
+            with self.assertRaises(ProcessingCancelled):
+                self.pipeline.run(input_path, output_path, method='color', cancel_event=cancel_event)
+            self.assertFalse(os.path.exists(output_path))
+        finally:
+            for path in (input_path, output_path):
+                if os.path.exists(path):
+                    os.unlink(path)
+
+if __name__ == '__main__':
+    unittest.main()
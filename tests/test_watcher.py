@@ -0,0 +1,97 @@
+import unittest
+from pathlib import Path
+import tempfile
+import shutil
+import threading
+import time
+import sys
+
+# Add the parent directory to Python path to import src modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.watcher import FolderWatcher
+from tests.helpers import write_test_gif
+from PIL import Image
+import numpy as np
+
+class TestWatcher(unittest.TestCase):
+    
+    def setUp(self):
+        self.watch_dir = Path(tempfile.mkdtemp())
+    
+    def tearDown(self):
+        shutil.rmtree(self.watch_dir, ignore_errors=True)
+    
+    def wait_for(self, path, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if path.exists():
+                return True
+            time.sleep(0.05)
+        return False
+    
+    def test_new_files_processed(self):
+        """Test existing and newly dropped GIFs are processed with inotify and polling"""
+        for use_inotify in (True, False):
+            with self.subTest(use_inotify=use_inotify):
+                write_test_gif(self.watch_dir / f'early_{use_inotify}.gif', num_frames=3, size=(30, 30))
+                watcher = FolderWatcher(self.watch_dir, method='color', settle_time=0.1,
+                                        poll_interval=0.05, use_inotify=use_inotify)
+                stop = threading.Event()
+                thread = threading.Thread(target=watcher.run, args=(stop,))
+                thread.start()
+                try:
+                    self.assertTrue(self.wait_for(self.watch_dir / f'early_{use_inotify}_nobg.gif'))
+                    write_test_gif(self.watch_dir / f'late_{use_inotify}.gif', num_frames=3, size=(30, 30))
+                    output_path = self.watch_dir / f'late_{use_inotify}_nobg.gif'
+                    self.assertTrue(self.wait_for(output_path))
+                finally:
+                    stop.set()
+                    thread.join()
+                
+                self.assertEqual(watcher.failed, 0)
+                with Image.open(output_path) as gif:
+                    self.assertEqual(gif.n_frames, 3)
+                    self.assertEqual(np.array(gif.convert('RGBA'))[0, 0, 3], 0)
+                # Outputs are never picked up as inputs
+                self.assertFalse((self.watch_dir / f'late_{use_inotify}_nobg_nobg.gif').exists())
+    
+    def test_up_to_date_outputs_skipped(self):
+        """Test GIFs whose output is newer are not reprocessed, with inotify and polling"""
+        for use_inotify in (True, False):
+            with self.subTest(use_inotify=use_inotify):
+                input_path = self.watch_dir / f'done_{use_inotify}.gif'
+                write_test_gif(input_path, num_frames=3, size=(30, 30))
+                output_path = self.watch_dir / f'done_{use_inotify}_nobg.gif'
+                output_path.write_bytes(b'existing output')
+                
+                watcher = FolderWatcher(self.watch_dir, method='color', settle_time=0.05,
+                                        poll_interval=0.02, use_inotify=use_inotify)
+                stop = threading.Event()
+                thread = threading.Thread(target=watcher.run, args=(stop,))
+                thread.start()
+                try:
+                    time.sleep(0.5)
+                finally:
+                    stop.set()
+                    thread.join()
+                self.assertEqual(watcher.processed, 0)
+                self.assertEqual(output_path.read_bytes(), b'existing output')
+    
+    def test_debounce_growing_file(self):
+        """Test a file is only ready once its size has stopped changing"""
+        watcher = FolderWatcher(self.watch_dir, settle_time=0.2)
+        path = self.watch_dir / 'growing.gif'
+        path.write_bytes(b'GIF89a')
+        watcher._note(path)
+        
+        self.assertEqual(watcher._ready_files(), [])
+        time.sleep(0.1)
+        path.write_bytes(b'GIF89a' + b'\0' * 100)
+        self.assertEqual(watcher._ready_files(), [])
+        time.sleep(0.25)
+        ready = watcher._ready_files()
+        self.assertEqual([p for p, _ in ready], [path])
+
+if __name__ == '__main__':
+    unittest.main()